@@ -174,8 +174,64 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
+    # paginación por cursor: sin OFFSET ni COUNT(*) por página
+    'DEFAULT_PAGINATION_CLASS': 'gestionVuelos.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 20)),
+    # JSON con orjson (mismos bytes que el JSONRenderer de DRF) y
+    # application/msgpack; orjson y msgpack están fijados en requirements.txt
+    'DEFAULT_RENDERER_CLASSES': [
+        'gestionVuelos.renderers.FastJSONRenderer',
+        'gestionVuelos.renderers.MsgPackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'gestionVuelos.parsers.FastJSONParser',
+        'gestionVuelos.parsers.MsgPackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Caché compartida entre procesos: Redis en producción (REDIS_URL), archivos
+# con CACHE_DIR y, si no, memoria local (correcta solo con un proceso)
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+    SHARED_CACHE = True
+elif os.environ.get('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['CACHE_DIR'],
+        }
+    }
+    SHARED_CACHE = True
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    SHARED_CACHE = False
+
+# Lo que depende de contadores en la caché (generaciones, versiones) solo se
+# activa si todos los procesos ven la misma: con memoria local un worker no
+# se enteraría de las escrituras de otro
+# - get_by_id de los repositorios lee siempre de la base
+REPOSITORY_CACHE = SHARED_CACHE
+# - los GET condicionales no mandan ETag/Last-Modified ni responden 304
+CONDITIONAL_GET = SHARED_CACHE
+
+# Tope de ?page_size= en los listados de la API
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 100))
+
+# Tiempo que un asiento queda retenido por una reserva sin confirmar
+SEAT_HOLD_TTL = timedelta(minutes=15)
+
 # Configuración JWT
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
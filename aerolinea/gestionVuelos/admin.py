@@ -1,7 +1,7 @@
 from django.contrib import admin
 
 # Register your models here.
-from gestionVuelos.models import Flight, Passenger, Seat, Reservation, Ticket, Plane
+from gestionVuelos.models import Airport, Flight, FlightSeat, Passenger, Seat, Reservation, Ticket, Plane
 
 
 @admin.register(Plane)
@@ -15,6 +15,12 @@ class PlaneAdmin(admin.ModelAdmin):
     available_seats.short_description = "Available Seats"
 
 
+@admin.register(Airport)
+class AirportAdmin(admin.ModelAdmin):
+    list_display = ("iata_code", "name", "city")
+    search_fields = ("iata_code", "name", "city")
+
+
 @admin.register(Flight)
 class FlightAdmin(admin.ModelAdmin):
     list_display = (
@@ -77,6 +83,13 @@ class ReservationAdmin(admin.ModelAdmin):
     search_fields = ("flight", "passenger", "seat", "status", "reservation_code")
 
 
+@admin.register(FlightSeat)
+class FlightSeatAdmin(admin.ModelAdmin):
+    list_display = ("id", "flight", "seat", "status", "reservation")
+    list_filter = ("status", "flight")
+    search_fields = ("seat__number", "reservation__reservation_code")
+
+
 @admin.register(Ticket)
 class TicketAdmin(admin.ModelAdmin):
     list_display = (
@@ -0,0 +1,29 @@
+"""
+Altas masivas: POST <recurso>/bulk/ recibe un arreglo de objetos, lo
+valida por conjuntos (ver ``BulkListSerializer``) y lo crea en una sola
+transacción. Si alguna fila falla se responde 400 con los errores por fila,
+en el mismo orden del arreglo, y no se crea nada.
+"""
+
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .serializers import BULK_MAX_ITEMS
+
+
+class BulkCreateMixin:
+    """
+    Agrega la acción ``bulk`` a un viewset cuyo serializer declara
+    ``Meta.list_serializer_class = BulkListSerializer``.
+    """
+    bulk_max_items = BULK_MAX_ITEMS
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        serializer = self.get_serializer(
+            data=request.data, many=True, allow_empty=False, max_length=self.bulk_max_items
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
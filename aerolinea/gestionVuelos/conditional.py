@@ -0,0 +1,90 @@
+"""
+GET condicionales (If-None-Match / If-Modified-Since) para los viewsets:
+el ETag y el Last-Modified salen de las versiones por colección
+(versions.py), así que un cliente que ya tiene la respuesta recibe un 304
+antes de que la vista consulte la base o serialice nada.
+
+Solo se activa con ``settings.CONDITIONAL_GET`` (caché compartida por Redis
+o archivos): con una caché en memoria por proceso las versiones que sube un
+worker no llegarían a los demás, que seguirían respondiendo 304 con datos
+que ya cambiaron.
+"""
+
+import hashlib
+import math
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import versions
+
+
+def enabled() -> bool:
+    return getattr(settings, 'CONDITIONAL_GET', False)
+
+
+class NotModified(Exception):
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+def conditional_response(request, etag=None, last_modified=None):
+    """
+    304 (o 412) si el cliente ya tiene esta versión; si no, None.
+    ``last_modified`` es un timestamp.
+    """
+    if last_modified is not None:
+        last_modified = int(last_modified)
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag=None, last_modified=None):
+    if etag is not None and not response.has_header('ETag'):
+        response['ETag'] = etag
+    if last_modified is not None and not response.has_header('Last-Modified'):
+        response['Last-Modified'] = http_date(math.floor(last_modified))
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Responde 304 en las acciones de ``conditional_collections`` (acción ->
+    modelos que muestra la respuesta) con solo leer las versiones de la
+    caché. El ETag varía con la URL completa, el formato negociado y el
+    usuario, porque cualquiera de ellos cambia el contenido.
+    """
+    conditional_collections = {}
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.conditional_validators = None
+        collections = self.conditional_collections.get(self.action)
+        if not enabled() or not collections or request.method not in ('GET', 'HEAD'):
+            return
+
+        current, modified = versions.current(collections)
+        scope = '|'.join([
+            ','.join(f"{name}:{version}" for name, version in sorted(current.items())),
+            request.get_full_path(),
+            request.accepted_media_type or '',
+            str(request.user.pk or ''),
+        ])
+        etag = f'"{self.basename}-{hashlib.sha1(scope.encode()).hexdigest()[:20]}"'
+        self.conditional_validators = (etag, modified)
+        response = conditional_response(request, etag, modified)
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, 'conditional_validators', None)
+        if validators is not None and response.status_code in (200, 304):
+            set_validators(response, *validators)
+        return response
@@ -0,0 +1,95 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from gestionVuelos.models import Flight, FlightSeat, Passenger, Plane, Reservation, Seat
+from gestionVuelos.seat_bitmap import SEAT_COLUMNS, SeatBitmap, seat_index
+from gestionVuelos.services.seat_inventory import SeatInventoryService
+
+
+class _Rollback(Exception):
+    pass
+
+
+def legacy_seats_occupied(flight):
+    return flight.reservations.filter(status='reserved').count()
+
+
+def legacy_get_available_seats(flight):
+    reserved = flight.reservations.filter(status='reserved').values_list('seat_id', flat=True)
+    return Seat.objects.filter(plane=flight.plane, status='available').exclude(id__in=reserved)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara la disponibilidad por mapa de bits con las consultas sobre "
+        "reservas en un avión de 300 asientos. Los datos se descartan al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seats', type=int, default=300)
+        parser.add_argument('--reserved', type=int, default=150)
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options['seats'], options['reserved'], options['iterations'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, total_seats, reserved, iterations):
+        plane = Plane.objects.create(model='Benchmark', manufacturer='Benchmark', capacity=total_seats)
+        seats = []
+        for position in range(total_seats):
+            row = position // len(SEAT_COLUMNS) + 1
+            column = SEAT_COLUMNS[position % len(SEAT_COLUMNS)]
+            seats.append(Seat(
+                plane=plane, number=f"{row}{column}", row=row, column=column,
+                seat_type='economy', seat_index=seat_index(row, column),
+            ))
+        seats = Seat.objects.bulk_create(seats)
+
+        now = timezone.now()
+        flight = Flight.objects.create(
+            plane=plane, origin='Benchmark', destination='Benchmark',
+            departure_time=now + timedelta(days=1), arrival_time=now + timedelta(days=1, hours=2),
+            duration=timedelta(hours=2), status='scheduled', base_price=Decimal('100.00'),
+        )
+        passenger = Passenger.objects.create(
+            full_name='Benchmark Passenger', document_number=f"BENCH{now.timestamp():.0f}",
+            email='bench@example.com', phone='00000000', birth_date='1990-01-01',
+        )
+        taken = seats[:reserved]
+        Reservation.objects.bulk_create([
+            Reservation(flight=flight, passenger=passenger, seat=seat, status='reserved',
+                        price=flight.base_price, reservation_code=f"BENCH{seat.pk}")
+            for seat in taken
+        ])
+        FlightSeat.objects.filter(flight=flight, seat__in=taken).update(status='reserved')
+        SeatInventoryService.rebuild_bitmap(flight)
+        flight = Flight.objects.select_related('plane').get(pk=flight.pk)
+
+        methods = [
+            ("seats_occupied (COUNT reservas)", lambda: legacy_seats_occupied(flight)),
+            ("seats_occupied (mapa de bits)", lambda: flight.seats_occupied()),
+            ("get_available_seats (subconsulta)", lambda: len(legacy_get_available_seats(flight))),
+            ("get_available_seats (mapa de bits)", lambda: len(flight.get_available_seats())),
+            ("popcount + bit-scan en memoria", lambda: len(SeatBitmap.from_bytes(flight.seat_bitmap).indexes())),
+        ]
+        self.stdout.write(
+            f"Avión de {total_seats} asientos, {reserved} reservados, {iterations} iteraciones "
+            f"({connection.vendor})"
+        )
+        for label, method in methods:
+            method()
+            start = time.perf_counter()
+            for _ in range(iterations):
+                method()
+            elapsed = (time.perf_counter() - start) / iterations * 1_000_000
+            self.stdout.write(f"  {label:<40} {elapsed:10.1f} µs/llamada")
@@ -0,0 +1,45 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from gestionVuelos.services.fleet import FLEET_BATCH_SIZE, FleetService
+
+
+class Command(BaseCommand):
+    help = (
+        "Da de alta aviones con sus mapas de asientos en una sola transacción. "
+        "Acepta un archivo JSON con una lista de {model, manufacturer, capacity} "
+        "o un modelo repetido --count veces."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', nargs='?', help="Archivo JSON con la flota")
+        parser.add_argument('--model')
+        parser.add_argument('--manufacturer')
+        parser.add_argument('--capacity', type=int)
+        parser.add_argument('--count', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=FLEET_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as handle:
+                planes = json.load(handle)
+        elif options['model'] and options['manufacturer'] and options['capacity']:
+            planes = [
+                {
+                    'model': options['model'],
+                    'manufacturer': options['manufacturer'],
+                    'capacity': options['capacity'],
+                }
+                for _ in range(options['count'])
+            ]
+        else:
+            raise CommandError("Indique un archivo JSON o --model, --manufacturer y --capacity")
+
+        try:
+            created = FleetService.onboard(planes, batch_size=options['batch_size'])
+        except (TypeError, ValidationError) as exc:
+            raise CommandError(f"Flota inválida: {exc}")
+        seats = sum(plane.capacity for plane in created)
+        self.stdout.write(self.style.SUCCESS(f"{len(created)} avión(es) y {seats} asiento(s) creados"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from gestionVuelos.services.seat_inventory import SeatInventoryService
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula en bloque reserved_count, available_count y el mapa de bits "
+        "de los vuelos a partir del inventario de asientos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--flight', type=int, action='append', dest='flights',
+            help="ID de vuelo a reconciliar (se puede repetir). Por defecto, todos.",
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixed = SeatInventoryService.reconcile(options['flights'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{fixed} vuelo(s) reconciliado(s)"))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from gestionVuelos.services.seat_inventory import SeatInventoryService
+
+
+class Command(BaseCommand):
+    help = (
+        "Libera por lotes los asientos retenidos por reservas que no se "
+        "confirmaron dentro de SEAT_HOLD_TTL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help="Segundos entre barridos; si es 0 se ejecuta una sola vez.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            released = SeatInventoryService.release_expired_holds(batch_size=options['batch_size'])
+            self.stdout.write(f"{released} retención(es) liberada(s)")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,139 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+RESERVATION_TO_INVENTORY_STATUS = {
+    "reserved": "reserved",
+    "confirmed": "occupied",
+}
+
+
+def populate_flight_seats(apps, schema_editor):
+    Flight = apps.get_model("gestionVuelos", "Flight")
+    Seat = apps.get_model("gestionVuelos", "Seat")
+    FlightSeat = apps.get_model("gestionVuelos", "FlightSeat")
+    Reservation = apps.get_model("gestionVuelos", "Reservation")
+
+    seats_by_plane = {}
+    for seat_id, plane_id in Seat.objects.values_list("id", "plane_id"):
+        seats_by_plane.setdefault(plane_id, []).append(seat_id)
+
+    holders = {
+        (r.flight_id, r.seat_id): r
+        for r in Reservation.objects.exclude(status="cancelled")
+    }
+
+    rows = []
+    for flight_id, plane_id in Flight.objects.values_list("id", "plane_id"):
+        for seat_id in seats_by_plane.get(plane_id, []):
+            reservation = holders.get((flight_id, seat_id))
+            rows.append(
+                FlightSeat(
+                    flight_id=flight_id,
+                    seat_id=seat_id,
+                    reservation=reservation,
+                    status=(
+                        RESERVATION_TO_INVENTORY_STATUS[reservation.status]
+                        if reservation
+                        else "available"
+                    ),
+                )
+            )
+    FlightSeat.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gestionVuelos", "0012_alter_reservation_status"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FlightSeat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("available", "Available"),
+                            ("reserved", "Reserved"),
+                            ("occupied", "Occupied"),
+                        ],
+                        default="available",
+                        max_length=20,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="reservation",
+            name="seat",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="reservations",
+                to="gestionVuelos.seat",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="reservation",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status", "cancelled"), _negated=True),
+                fields=("flight", "seat"),
+                name="unique_active_reservation_per_flight_seat",
+            ),
+        ),
+        migrations.AddField(
+            model_name="flightseat",
+            name="flight",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="seat_inventory",
+                to="gestionVuelos.flight",
+            ),
+        ),
+        migrations.AddField(
+            model_name="flightseat",
+            name="reservation",
+            field=models.OneToOneField(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="flight_seat",
+                to="gestionVuelos.reservation",
+            ),
+        ),
+        migrations.AddField(
+            model_name="flightseat",
+            name="seat",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="flight_inventory",
+                to="gestionVuelos.seat",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="flightseat",
+            index=models.Index(
+                fields=["flight", "status"], name="flightseat_flight_status_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="flightseat",
+            constraint=models.UniqueConstraint(
+                fields=("flight", "seat"), name="unique_flight_seat"
+            ),
+        ),
+        migrations.RunPython(populate_flight_seats, migrations.RunPython.noop),
+    ]
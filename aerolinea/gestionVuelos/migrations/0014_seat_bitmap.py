@@ -0,0 +1,59 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:04
+
+from django.db import migrations, models
+
+SEAT_COLUMNS = ["A", "B", "C", "D", "E", "F"]
+
+
+def populate_seat_bitmaps(apps, schema_editor):
+    Seat = apps.get_model("gestionVuelos", "Seat")
+    Flight = apps.get_model("gestionVuelos", "Flight")
+    FlightSeat = apps.get_model("gestionVuelos", "FlightSeat")
+
+    seats = list(Seat.objects.all())
+    for seat in seats:
+        column = (seat.column or "").upper()
+        if seat.row >= 1 and column in SEAT_COLUMNS:
+            seat.seat_index = (seat.row - 1) * len(SEAT_COLUMNS) + SEAT_COLUMNS.index(
+                column
+            )
+    Seat.objects.bulk_update(seats, ["seat_index"], batch_size=500)
+
+    bitmaps = {}
+    taken = FlightSeat.objects.exclude(status="available").values_list(
+        "flight_id", "seat__seat_index"
+    )
+    for flight_id, index in taken:
+        if index is not None:
+            bitmaps[flight_id] = bitmaps.get(flight_id, 0) | 1 << index
+    for flight_id, value in bitmaps.items():
+        Flight.objects.filter(pk=flight_id).update(
+            seat_bitmap=value.to_bytes((value.bit_length() + 7) // 8, "little")
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gestionVuelos", "0013_flightseat_inventory"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="flight",
+            name="seat_bitmap",
+            field=models.BinaryField(default=b""),
+        ),
+        migrations.AddField(
+            model_name="seat",
+            name="seat_index",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="seat",
+            index=models.Index(
+                fields=["plane", "seat_index"], name="seat_plane_index_idx"
+            ),
+        ),
+        migrations.RunPython(populate_seat_bitmaps, migrations.RunPython.noop),
+    ]
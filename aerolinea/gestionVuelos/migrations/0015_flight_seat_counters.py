@@ -0,0 +1,40 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:06
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_counters(apps, schema_editor):
+    Flight = apps.get_model("gestionVuelos", "Flight")
+    FlightSeat = apps.get_model("gestionVuelos", "FlightSeat")
+
+    totals = FlightSeat.objects.values("flight_id").annotate(
+        total=Count("id"),
+        taken=Count("id", filter=~Q(status="available")),
+    )
+    for row in totals:
+        Flight.objects.filter(pk=row["flight_id"]).update(
+            reserved_count=row["taken"],
+            available_count=row["total"] - row["taken"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gestionVuelos", "0014_seat_bitmap"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="flight",
+            name="available_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="flight",
+            name="reserved_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gestionVuelos", "0015_flight_seat_counters"),
+    ]
+
+    operations = [
+        migrations.AlterConstraint(
+            model_name="reservation",
+            name="unique_active_reservation_per_flight_seat",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status", "cancelled"), _negated=True),
+                fields=("flight", "seat"),
+                name="unique_active_reservation_per_flight_seat",
+                violation_error_code="seat_taken",
+                violation_error_message="The selected seat is already reserved on this flight.",
+            ),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gestionVuelos", "0016_reservation_seat_taken_constraint"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="reservation",
+            name="unique_active_reservation_per_flight_seat",
+        ),
+        migrations.AddField(
+            model_name="flightseat",
+            name="hold_expires_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="reservation",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("reserved", "Reserved"),
+                    ("confirmed", "Confirmed"),
+                    ("cancelled", "Cancelled"),
+                    ("expired", "Expired"),
+                ],
+                default="reserved",
+                max_length=20,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="flightseat",
+            index=models.Index(
+                fields=["status", "hold_expires_at"], name="flightseat_hold_expiry_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="reservation",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    ("status__in", ["cancelled", "expired"]), _negated=True
+                ),
+                fields=("flight", "seat"),
+                name="unique_active_reservation_per_flight_seat",
+                violation_error_code="seat_taken",
+                violation_error_message="The selected seat is already reserved on this flight.",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gestionVuelos", "0017_seat_hold_expiry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="plane",
+            name="layout_version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gestionVuelos", "0018_plane_layout_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="flight",
+            name="inventory_version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,124 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:21
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def normalize_text(value) -> str:
+    # copia de gestionVuelos.normalization al momento de esta migración: la
+    # migración no puede depender de código de la app que cambie después
+    decomposed = unicodedata.normalize("NFKD", str(value or ""))
+    without_accents = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(without_accents.casefold().split())
+
+
+# aeropuertos de las ciudades que ya opera la aerolínea (datos congelados)
+AIRPORTS = [
+    ("AEP", "Aeroparque Jorge Newbery", "Buenos Aires"),
+    ("COR", "Ingeniero Aeronáutico Ambrosio Taravella", "Córdoba"),
+    ("RCU", "Área de Material Río Cuarto", "Río Cuarto"),
+    ("BRC", "Teniente Luis Candelaria", "Bariloche"),
+    ("NQN", "Presidente Perón", "Neuquén"),
+    ("MDZ", "El Plumerillo", "Mendoza"),
+    ("UAQ", "Domingo Faustino Sarmiento", "San Juan"),
+    ("SLA", "Martín Miguel de Güemes", "Salta"),
+    ("TUC", "Teniente General Benjamín Matienzo", "Tucumán"),
+]
+
+
+def seed_airports(apps, schema_editor):
+    Airport = apps.get_model("gestionVuelos", "Airport")
+    Flight = apps.get_model("gestionVuelos", "Flight")
+
+    for iata_code, name, city in AIRPORTS:
+        Airport.objects.get_or_create(
+            iata_code=iata_code,
+            defaults={
+                "name": name,
+                "city": city,
+                "city_normalized": normalize_text(city),
+            },
+        )
+
+    # el texto libre de cada vuelo se mapea por ciudad normalizada
+    airport_by_city = {
+        airport.city_normalized: airport.id for airport in Airport.objects.all()
+    }
+    for field in ("origin", "destination"):
+        cities = Flight.objects.values_list(field, flat=True).distinct()
+        for city in cities:
+            airport_id = airport_by_city.get(normalize_text(city))
+            if airport_id is not None:
+                Flight.objects.filter(**{field: city}).update(
+                    **{f"{field}_airport_id": airport_id}
+                )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gestionVuelos", "0019_flight_inventory_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Airport",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("iata_code", models.CharField(max_length=3, unique=True)),
+                ("name", models.CharField(max_length=100)),
+                ("city", models.CharField(max_length=100)),
+                (
+                    "city_normalized",
+                    models.CharField(db_index=True, editable=False, max_length=100),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="flight",
+            name="destination_airport",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="arrivals",
+                to="gestionVuelos.airport",
+            ),
+        ),
+        migrations.AddField(
+            model_name="flight",
+            name="origin_airport",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="departures",
+                to="gestionVuelos.airport",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(
+                fields=["origin_airport", "destination_airport", "departure_time"],
+                name="flight_route_departure_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(
+                fields=["destination_airport", "departure_time"],
+                name="flight_dest_departure_idx",
+            ),
+        ),
+        migrations.RunPython(seed_airports, migrations.RunPython.noop),
+    ]
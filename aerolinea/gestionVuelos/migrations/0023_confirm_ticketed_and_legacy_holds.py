@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:40
+
+from django.db import migrations
+from django.db.models import Q
+
+
+def confirm_non_expiring_reservations(apps, schema_editor):
+    """
+    Pasa a 'confirmed' (asiento 'occupied', sin vencimiento) las reservas
+    'reserved' que no son retenciones: las que ya tienen boleto y las
+    anteriores a 0017, que quedaron con hold_expires_at NULL y en la web
+    eran reservas completas.
+    """
+    FlightSeat = apps.get_model("gestionVuelos", "FlightSeat")
+    Reservation = apps.get_model("gestionVuelos", "Reservation")
+
+    rows = FlightSeat.objects.filter(status="reserved", reservation__status="reserved").filter(
+        Q(hold_expires_at__isnull=True) | Q(reservation__ticket__isnull=False)
+    )
+    reservation_ids = list(rows.values_list("reservation_id", flat=True))
+    FlightSeat.objects.filter(reservation_id__in=reservation_ids).update(
+        status="occupied", hold_expires_at=None
+    )
+    Reservation.objects.filter(id__in=reservation_ids).update(status="confirmed")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gestionVuelos", "0022_updated_at_stamps"),
+    ]
+
+    operations = [
+        migrations.RunPython(confirm_non_expiring_reservations, migrations.RunPython.noop),
+    ]
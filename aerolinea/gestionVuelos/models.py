@@ -1,12 +1,252 @@
-from django.db import models
-from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models.lookups import Exact, In
+from django.db.models.sql.where import AND
+from django.dispatch import Signal
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
 from django.contrib.auth.models import User
+from django.utils import timezone
 import uuid
 
+from gestionVuelos import versions
+from gestionVuelos.normalization import normalize_text
+from gestionVuelos.seat_bitmap import SeatBitmap, seat_index
+
+
+class LeanSaveMixin:
+    """
+    Escritura sin consultas de validación: ``full_clean()`` consulta la
+    base por cada FK, cada campo único y cada UniqueConstraint; acá los
+    campos y ``clean()`` se validan en memoria y la existencia de las FK y
+    la unicidad quedan a cargo de las restricciones de la base. Un
+    IntegrityError de unicidad se traduce al mismo ValidationError que
+    habría levantado ``full_clean()``.
+    """
+
+    def clean_in_memory(self):
+        errors = {}
+        relations = [field for field in self._meta.concrete_fields if field.is_relation]
+        try:
+            self.clean_fields(exclude=[field.name for field in relations])
+        except ValidationError as exc:
+            errors = exc.update_error_dict(errors)
+        for field in relations:
+            if not field.null and getattr(self, field.attname) is None:
+                errors.setdefault(field.name, []).append(
+                    ValidationError(field.error_messages['null'], code='null')
+                )
+        try:
+            self.clean()
+        except ValidationError as exc:
+            errors = exc.update_error_dict(errors)
+        if errors:
+            raise ValidationError(errors)
+
+    def save_unique(self, *args, **kwargs):
+        """
+        ``Model.save()`` en un savepoint: si la base rechaza un valor
+        repetido, la transacción sigue usable y se levanta ValidationError.
+        """
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError as exc:
+            error = self.unique_violation(exc)
+            if error is None:
+                raise
+            raise error from exc
+
+    def unique_violation(self, exc: IntegrityError):
+        """
+        ValidationError equivalente al IntegrityError de unicidad, o None si
+        el error es de otra restricción. La restricción se reconoce por su
+        nombre (``diag.constraint_name`` en psycopg); SQLite no lo informa y
+        se lee del mensaje. Si ninguna de las dos cosas alcanza (otro motor u
+        otro formato de mensaje) se busca el valor repetido con las mismas
+        consultas que haría ``full_clean()``.
+        """
+        name = getattr(getattr(exc.__cause__, 'diag', None), 'constraint_name', None)
+        if name:
+            constraint = self._unique_constraint(name)
+            if constraint is not None:
+                return self._constraint_error(constraint)
+            columns = self._unique_columns(name)
+            if columns is None:
+                # el nombre existe y no es de unicidad (FK, NOT NULL, CHECK)
+                return None
+        else:
+            columns = self._sqlite_columns(str(exc))
+        if columns is not None:
+            for field in self._meta.concrete_fields:
+                if field.unique and not field.primary_key and columns == [field.column]:
+                    return self._field_error(field)
+            for constraint in self._unique_constraints():
+                if columns == [self._meta.get_field(field).column for field in constraint.fields]:
+                    return self._constraint_error(constraint)
+        return self._unique_error_by_query()
+
+    def _unique_constraints(self):
+        return [
+            constraint for constraint in self._meta.constraints
+            if isinstance(constraint, models.UniqueConstraint) and constraint.fields
+        ]
+
+    def _unique_constraint(self, name: str):
+        return next((constraint for constraint in self._unique_constraints() if constraint.name == name), None)
+
+    def _unique_columns(self, name: str):
+        """
+        Columnas de la restricción o índice único ``name`` de la tabla, o
+        None si no es una restricción de unicidad de esta tabla.
+        """
+        connection = connections[router.db_for_write(type(self), instance=self)]
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, self._meta.db_table)
+        info = constraints.get(name)
+        if info is None or not info['unique'] or info['primary_key']:
+            return None
+        return list(info['columns'])
+
+    def _sqlite_columns(self, message: str):
+        """
+        Columnas del mensaje de SQLite ("UNIQUE constraint failed: tabla.a,
+        tabla.b"), o None si el mensaje no tiene ese formato. Los índices
+        parciales aparecen por nombre ("... failed: index 'nombre'").
+        """
+        prefix = 'UNIQUE constraint failed: '
+        message = message.strip()
+        if not message.startswith(prefix):
+            return None
+        failed = message[len(prefix):]
+        if failed.startswith('index '):
+            constraint = self._unique_constraint(failed[len('index '):].strip("'\""))
+            if constraint is None:
+                return None
+            return [self._meta.get_field(field).column for field in constraint.fields]
+        table = self._meta.db_table + '.'
+        columns = [column.strip() for column in failed.split(',')]
+        if not all(column.startswith(table) for column in columns):
+            return None
+        return [column[len(table):] for column in columns]
+
+    def _field_error(self, field):
+        return ValidationError({field.name: [self.unique_error_message(type(self), (field.name,))]})
+
+    def _constraint_error(self, constraint):
+        # mismos mensajes que UniqueConstraint.validate()
+        if (
+            constraint.condition is None
+            and constraint.violation_error_message == constraint.default_violation_error_message
+        ):
+            error = self.unique_error_message(type(self), constraint.fields)
+        else:
+            error = ValidationError(
+                constraint.get_violation_error_message(), code=constraint.violation_error_code
+            )
+        return ValidationError({NON_FIELD_ERRORS: [error]})
+
+    def _unique_error_by_query(self):
+        try:
+            self.validate_unique()
+            self.validate_constraints()
+        except ValidationError as error:
+            return error
+        return None
+
+
+# escrituras por QuerySet (sin post_save): ``pks`` son los IDs tocados o None si no se conocen
+rows_changed = Signal()
+
+
+class VersionedQuerySet(models.QuerySet):
+    """
+    Las escrituras por QuerySet no emiten señales: acá se mantiene
+    ``updated_at``, se avisa a las versiones por colección (versions.py) y
+    se envía ``rows_changed`` (caché de los repositorios).
+    """
+
+    def _changed(self, *models_changed):
+        versions.changed(*(model._meta.model_name for model in models_changed))
+
+    def _filtered_pks(self):
+        """
+        IDs de un filtro pk=... o pk__in=... (con otras condiciones en AND),
+        o None si no se pueden saber sin consultar.
+        """
+        where = self.query.where
+        if where.negated or where.connector != AND:
+            return None
+        for child in where.children:
+            lhs = getattr(child, 'lhs', None)
+            if (
+                isinstance(child, (Exact, In))
+                and getattr(lhs, 'target', None) == self.model._meta.pk
+                and getattr(lhs, 'alias', None) == self.model._meta.db_table
+                and not hasattr(child.rhs, 'resolve_expression')
+            ):
+                return set(child.rhs) if isinstance(child, In) else {child.rhs}
+        return None
+
+    def update(self, **kwargs):
+        kwargs.setdefault('updated_at', timezone.now())
+        pks = self._filtered_pks()
+        rows = super().update(**kwargs)
+        if rows:
+            self._changed(self.model)
+            rows_changed.send(sender=self.model, pks=pks)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if objs:
+            self._changed(self.model)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        now = timezone.now()
+        for obj in objs:
+            obj.updated_at = now
+        rows = super().bulk_update(objs, [*fields, 'updated_at'], *args, **kwargs)
+        if rows:
+            self._changed(self.model)
+            rows_changed.send(sender=self.model, pks={obj.pk for obj in objs})
+        return rows
+
+    def delete(self):
+        deleted, per_model = super().delete()
+        if deleted:
+            # también las filas borradas en cascada
+            labels = {label for label, count in per_model.items() if count}
+            affected = [model for model in self.model._meta.apps.get_models() if model._meta.label in labels]
+            self._changed(*affected)
+            for model in affected:
+                rows_changed.send(sender=model, pks=None)
+        return deleted, per_model
+
+    def delete_rows(self) -> int:
+        """
+        Un solo DELETE, sin cascada ni señales por fila: para borrados en
+        masa cuyo efecto quien llama aplica una vez. Las filas que apuntan a
+        estas deben borrarse antes.
+        """
+        pks = self._filtered_pks()
+        deleted = self._raw_delete(self.db)
+        if deleted:
+            self._changed(self.model)
+            rows_changed.send(sender=self.model, pks=pks)
+        return deleted
+
+
 class Plane(models.Model):
     model = models.CharField(max_length=30)
     manufacturer = models.CharField(max_length=100)
     capacity = models.IntegerField()
+    # se incrementa cada vez que cambia el avión o alguno de sus asientos;
+    # forma parte de la clave de caché y del ETag del mapa de asientos
+    layout_version = models.PositiveIntegerField(default=1, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = VersionedQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.manufacturer} {self.model} ({self.capacity} pasajeros)"
@@ -24,9 +264,34 @@ class Seat(models.Model):
     row = models.IntegerField()
     column = models.CharField(max_length=1)
     seat_type = models.CharField(max_length=50)
+    # obsoleto: el estado de un asiento depende del vuelo y vive en
+    # FlightSeat.status; la API ya no lo devuelve
     status = models.CharField(
         max_length=20, choices=SEAT_STATUS_CHOICES, default="available"
     )
+    # posición del asiento en el mapa de bits de cada vuelo (ver seat_bitmap.py)
+    seat_index = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = VersionedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['plane', 'seat_index'], name='seat_plane_index_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_seat_index = instance.__dict__.get('seat_index')
+        return instance
+
+    def save(self, *args, **kwargs):
+        try:
+            self.seat_index = seat_index(self.row, self.column)
+        except (TypeError, ValueError) as exc:
+            raise ValidationError({'column': str(exc)})
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Seat {self.number} ({self.status})"
@@ -50,79 +315,300 @@ class Passenger(models.Model):
     document_type = models.CharField(
         max_length=50, choices=DOCUMENT_TYPE_CHOICES, default=DNI
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = VersionedQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.full_name} - {self.document_number}"
 
 
-class Flight(models.Model):
+class AirportQuerySet(VersionedQuerySet):
+    def matching(self, query: str):
+        """
+        Aeropuertos cuyo código IATA es ``query`` o cuya ciudad empieza con él.
+        """
+        normalized = normalize_text(query)
+        if not normalized:
+            return self.none()
+        return self.filter(
+            models.Q(iata_code=query.strip().upper()) | models.Q(city_normalized__startswith=normalized)
+        )
+
+    def for_city(self, city: str):
+        return self.filter(city_normalized=normalize_text(city)).order_by('id').first()
+
+    def city_keys(self, query: str) -> list:
+        """
+        Ciudades normalizadas que corresponden a ``query``; si no hay
+        aeropuerto cargado, el propio texto normalizado.
+        """
+        keys = sorted(set(self.matching(query).values_list('city_normalized', flat=True)))
+        return keys or [normalize_text(query)]
+
+
+class Airport(models.Model):
+    iata_code = models.CharField(max_length=3, unique=True)
+    name = models.CharField(max_length=100)
+    city = models.CharField(max_length=100)
+    # ciudad sin acentos ni mayúsculas: las búsquedas comparan contra este índice
+    city_normalized = models.CharField(max_length=100, db_index=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = AirportQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        self.iata_code = self.iata_code.strip().upper()
+        self.city_normalized = normalize_text(self.city)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.iata_code} - {self.city}"
+
+
+class Flight(LeanSaveMixin, models.Model):
+    # estados de vuelo que ya no se ofrecen a la venta
+    CLOSED_STATUSES = ['cancelled', 'canceled', 'cancelado']
+
     plane = models.ForeignKey(Plane, on_delete=models.CASCADE)
     origin = models.CharField(max_length=100)
     destination = models.CharField(max_length=100)
+    # aeropuertos resueltos a partir de origin/destination (ver _resolve_airports)
+    origin_airport = models.ForeignKey(
+        Airport, on_delete=models.SET_NULL, null=True, blank=True, related_name='departures'
+    )
+    destination_airport = models.ForeignKey(
+        Airport, on_delete=models.SET_NULL, null=True, blank=True, related_name='arrivals'
+    )
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     duration = models.DurationField()
     status = models.CharField(max_length=50)
     base_price = models.DecimalField(max_digits=10, decimal_places=2)
+    # bit i encendido = asiento de índice i tomado en este vuelo
+    seat_bitmap = models.BinaryField(default=b"", editable=False)
+    # contadores desnormalizados, se actualizan junto con el mapa de bits
+    reserved_count = models.PositiveIntegerField(default=0, editable=False)
+    available_count = models.PositiveIntegerField(default=0, editable=False)
+    # se incrementa con cada cambio del inventario; versiona el mapa de asientos cacheado
+    inventory_version = models.PositiveIntegerField(default=1, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = VersionedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # búsqueda por par de ciudades y rango de salida
+            models.Index(
+                fields=['origin_airport', 'destination_airport', 'departure_time'],
+                name='flight_route_departure_idx',
+            ),
+            models.Index(
+                fields=['destination_airport', 'departure_time'],
+                name='flight_dest_departure_idx',
+            ),
+            # orden del listado paginado por cursor
+            models.Index(fields=['departure_time', 'id'], name='flight_departure_id_idx'),
+        ]
 
     def clean(self):
         if self.arrival_time <= self.departure_time:
             raise ValidationError("Arrival time must be after departure time.")
 
     def save(self, *args, **kwargs):
-        self.full_clean()
+        self._resolve_airports()
+        # sin restricciones de unicidad: alcanza con validar en memoria
+        self.clean_in_memory()
         super().save(*args, **kwargs)
+        self._loaded_route = (self.origin, self.destination)
+        self._loaded_departure = (self.origin, self.destination, self.departure_time)
+
+    def _resolve_airports(self):
+        # solo se busca el aeropuerto en el alta o si cambió el texto de la
+        # ciudad; los vuelos sin aeropuerto los completa el alta del aeropuerto
+        loaded = getattr(self, '_loaded_route', None)
+        if loaded is None:
+            origin_changed = self.origin_airport_id is None
+            destination_changed = self.destination_airport_id is None
+        else:
+            origin_changed = loaded[0] != self.origin
+            destination_changed = loaded[1] != self.destination
+        if origin_changed:
+            self.origin_airport = Airport.objects.for_city(self.origin)
+        if destination_changed:
+            self.destination_airport = Airport.objects.for_city(self.destination)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # guardamos el avión original para detectar cambios al guardar
+        instance._loaded_plane_id = instance.__dict__.get('plane_id')
+        instance._loaded_route = (instance.__dict__.get('origin'), instance.__dict__.get('destination'))
+        if 'departure_time' in instance.__dict__:
+            instance._loaded_departure = instance._loaded_route + (instance.departure_time,)
+        return instance
+
+    @property
+    def bitmap(self):
+        return SeatBitmap.from_bytes(self.seat_bitmap)
 
     def seats_occupied(self):
-        return self.reservations.filter(status='reserved').count()
+        return self.reserved_count
 
     def seats_available(self):
-        return self.plane.capacity - self.seats_occupied()
+        return self.available_count
 
     def get_available_seats(self):   #aca determinamos si esta disponible o no el asiento
-        all_seats = Seat.objects.filter(plane=self.plane, status='available')
-        reserved_seats = self.reservations.filter(status='reserved').values_list('seat_id', flat=True)
-        available_seats = all_seats.exclude(id__in=reserved_seats)
-        return available_seats
+        # los asientos tomados salen del mapa de bits, sin consultar reservas;
+        # las retenciones vencidas cuentan como libres aunque no se hayan barrido
+        expired = FlightSeat.objects.filter(flight_id=self.pk).expired_holds().values('seat_id')
+        return Seat.objects.filter(plane_id=self.plane_id).filter(
+            ~models.Q(seat_index__in=self.bitmap.indexes()) | models.Q(id__in=expired)
+        )
 
     def __str__(self):
         return f"{self.origin} → {self.destination} ({self.departure_time})"
 
 
-class Reservation(models.Model):
+class Reservation(LeanSaveMixin, models.Model):
     RESERVATION_STATUS_CHOICES = [
         ("reserved", "Reserved"),
         ("confirmed", "Confirmed"),
         ("cancelled", "Cancelled"),
+        ("expired", "Expired"),
     ]
+    # estados que ya no retienen el asiento
+    INACTIVE_STATUSES = ["cancelled", "expired"]
 
     flight = models.ForeignKey(Flight, on_delete=models.CASCADE, related_name='reservations')
     passenger = models.ForeignKey(Passenger, on_delete=models.CASCADE)
-    seat = models.OneToOneField(Seat, on_delete=models.CASCADE)
+    seat = models.ForeignKey(Seat, on_delete=models.CASCADE, related_name='reservations')
     status = models.CharField(
         max_length=20, choices=RESERVATION_STATUS_CHOICES, default="reserved"
     )
     reservation_date = models.DateTimeField(auto_now_add=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     reservation_code = models.CharField(max_length=20, unique=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = VersionedQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # un asiento solo puede tener una reserva activa por vuelo
+            models.UniqueConstraint(
+                fields=['flight', 'seat'],
+                condition=~models.Q(status__in=["cancelled", "expired"]),
+                name='unique_active_reservation_per_flight_seat',
+                violation_error_code='seat_taken',
+                violation_error_message="The selected seat is already reserved on this flight.",
+            ),
+        ]
+        indexes = [
+            # orden del listado paginado por cursor
+            models.Index(fields=['-reservation_date', '-id'], name='reservation_date_id_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # guardamos vuelo/asiento originales para liberar el inventario si cambian
+        instance._loaded_flight_seat = (
+            instance.__dict__.get('flight_id'),
+            instance.__dict__.get('seat_id'),
+        )
+        return instance
 
     def clean(self):
-        if self.seat.plane != self.flight.plane:
+        if self.seat_id is None or self.flight_id is None:
+            return
+        if Reservation.seat.is_cached(self) and Reservation.flight.is_cached(self):
+            # vuelo y asiento ya cargados: se comparan los IDs de avión en memoria
+            mismatch = self.seat.plane_id != self.flight.plane_id
+        else:
+            mismatch = not Seat.objects.filter(pk=self.seat_id, plane__flight=self.flight_id).exists()
+        if mismatch:
             raise ValidationError(
                 "The selected seat does not belong to the plane of the flight."
             )
 
+    @staticmethod
+    def new_reservation_code() -> str:
+        return str(uuid.uuid4()).replace("-", "")[:20].upper()
+
     def save(self, *args, **kwargs):
         if not self.reservation_code:
-            self.reservation_code = str(uuid.uuid4()).replace("-", "")[:20].upper()
-        self.full_clean()
-        super().save(*args, **kwargs)
+            self.reservation_code = self.new_reservation_code()
+        self.clean_in_memory()
+        # la reserva y el claim del inventario (post_save) son una sola unidad;
+        # el código y el asiento activo únicos los controla la base
+        self.save_unique(*args, **kwargs)
 
     def __str__(self):
         return f"Reservation {self.reservation_code} - {self.passenger.full_name}"
 
 
-class Ticket(models.Model):
+class FlightSeatQuerySet(models.QuerySet):
+
+    def expired_holds(self, now=None):
+        """
+        Retenciones ('reserved') cuyo plazo ya venció. Una reserva con boleto
+        no vence aunque la fila no se haya pasado a 'occupied'.
+        """
+        return self.filter(
+            status='reserved', hold_expires_at__lte=now or timezone.now(), reservation__ticket__isnull=True
+        )
+
+    def taken(self, now=None):
+        """Asientos tomados, sin contar las retenciones vencidas."""
+        return self.exclude(status='available').exclude(
+            status='reserved', hold_expires_at__lte=now or timezone.now()
+        )
+
+
+class FlightSeat(models.Model):
+    """Inventario de un asiento del avión para un vuelo concreto."""
+
+    FLIGHT_SEAT_STATUS_CHOICES = [
+        ("available", "Available"),
+        ("reserved", "Reserved"),
+        ("occupied", "Occupied"),
+    ]
+
+    flight = models.ForeignKey(Flight, on_delete=models.CASCADE, related_name='seat_inventory')
+    seat = models.ForeignKey(Seat, on_delete=models.CASCADE, related_name='flight_inventory')
+    reservation = models.OneToOneField(
+        Reservation, on_delete=models.SET_NULL, null=True, blank=True, related_name='flight_seat'
+    )
+    status = models.CharField(
+        max_length=20, choices=FLIGHT_SEAT_STATUS_CHOICES, default="available"
+    )
+    # vencimiento de la retención; null = sin vencimiento
+    hold_expires_at = models.DateTimeField(null=True, blank=True)
+
+    objects = FlightSeatQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['flight', 'seat'], name='unique_flight_seat'),
+        ]
+        indexes = [
+            models.Index(fields=['flight', 'status'], name='flightseat_flight_status_idx'),
+            models.Index(fields=['status', 'hold_expires_at'], name='flightseat_hold_expiry_idx'),
+        ]
+
+    def is_taken(self, now=None) -> bool:
+        """Mismo criterio que ``FlightSeatQuerySet.taken()`` sobre la fila ya leída."""
+        if self.status == 'available':
+            return False
+        expired = self.hold_expires_at is not None and self.hold_expires_at <= (now or timezone.now())
+        return not (self.status == 'reserved' and expired)
+
+    def __str__(self):
+        return f"{self.flight_id} - Seat {self.seat_id} ({self.status})"
+
+
+class Ticket(LeanSaveMixin, models.Model):
     TICKET_STATUS_CHOICES = [
         ("issued", "Issued"),
         ("cancelled", "Cancelled"),
@@ -134,11 +620,22 @@ class Ticket(models.Model):
     status = models.CharField(
         max_length=20, choices=TICKET_STATUS_CHOICES, default="issued"
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = VersionedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # orden del listado paginado por cursor
+            models.Index(fields=['-issued_at', '-id'], name='ticket_issued_id_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.barcode:
             self.barcode = str(uuid.uuid4()).replace("-", "").upper()
-        super().save(*args, **kwargs)
+        self.clean_in_memory()
+        # código de barras y reserva únicos: los controla la base
+        self.save_unique(*args, **kwargs)
 
     def __str__(self):
         return f"Ticket - {self.reservation.reservation_code}"
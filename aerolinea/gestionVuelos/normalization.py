@@ -0,0 +1,13 @@
+"""
+Normalización de texto libre (ciudades, aeropuertos) para búsquedas:
+sin acentos, en minúsculas y con los espacios colapsados, de modo que
+"Río Cuarto", "rio  cuarto" y "RIO CUARTO" comparen igual.
+"""
+
+import unicodedata
+
+
+def normalize_text(value) -> str:
+    decomposed = unicodedata.normalize("NFKD", str(value or ""))
+    without_accents = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(without_accents.casefold().split())
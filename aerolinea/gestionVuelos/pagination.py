@@ -0,0 +1,117 @@
+"""
+Paginación por cursor (keyset) para la API: cada página filtra por la
+posición del último elemento en lugar de usar OFFSET, y no cuenta la tabla.
+"""
+
+import json
+from base64 import b64decode, b64encode
+from datetime import date, datetime
+from urllib import parse
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Usa el ``ordering`` que ya declara cada viewset (o el que pide el
+    cliente con ?ordering=) más ``id`` como desempate. El cursor guarda el
+    valor de todos los campos del orden, así que la página siguiente es una
+    comparación por tuplas sobre el índice, sin OFFSET para los empates.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 100)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering == (self.ordering,) and getattr(view, 'ordering', None):
+            # viewsets sin OrderingFilter pero con orden propio
+            ordering = tuple([view.ordering] if isinstance(view.ordering, str) else view.ordering)
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse, position = self.cursor if self.cursor else (False, None)
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        # hacia adelante siempre hay página anterior si vinimos con cursor, y viceversa
+        self.has_next = has_more if not reverse else True
+        self.has_previous = position is not None if not reverse else has_more
+        return self.page
+
+    @staticmethod
+    def _after(ordering, position) -> Q:
+        """
+        (a, b, c) > (x, y, z) respetando la dirección de cada campo:
+        a > x  OR  (a = x AND b > y)  OR  (a = x AND b = y AND c > z)
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def _position(self, instance):
+        values = []
+        for field in self.ordering:
+            value = getattr(instance, field.lstrip('-'))
+            values.append(value.isoformat() if isinstance(value, (date, datetime)) else str(value))
+        return values
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self._link(False, self._position(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # página vacía: volver al principio
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self._link(True, self._position(self.page[0]))
+
+    def _link(self, reverse, position):
+        payload = json.dumps({'r': int(reverse), 'p': position}, separators=(',', ':'))
+        encoded = b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            data = json.loads(b64decode(parse.unquote(encoded).encode('ascii')).decode('utf-8'))
+            reverse, position = bool(data['r']), list(data['p'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if len(position) != len(self.ordering):
+            # el cursor se generó con otro ?ordering=
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, position
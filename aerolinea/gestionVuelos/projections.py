@@ -0,0 +1,130 @@
+"""
+Proyecciones declarativas para las respuestas armadas a mano de la API:
+cada proyección se compila una vez a la lista de columnas que necesita
+(``values_list``) y a un plan que arma el dict anidado desde la fila plana,
+sin instanciar modelos.
+"""
+
+from typing import List, Optional
+
+from django.http import Http404
+
+
+class Projection:
+    """
+    ``Projection(id='id', plane=PLANE)``: las claves son las del dict de
+    salida; un valor string es el campo del modelo y una Projection anidada
+    sigue la relación con el mismo nombre que la clave (o la que indique
+    ``on()``; ``on('')`` agrupa campos del mismo modelo bajo otra clave).
+    """
+
+    def __init__(self, **fields):
+        self.fields = fields
+        self.relation = None
+        columns = []
+        self._plan = self._compile('', columns)
+        self.columns = tuple(columns)
+
+    def _compile(self, prefix: str, columns: list) -> list:
+        plan = []
+        for key, source in self.fields.items():
+            if isinstance(source, Projection):
+                relation = key if source.relation is None else source.relation
+                nested_prefix = f"{prefix}{relation}__" if relation else prefix
+                plan.append((key, source._compile(nested_prefix, columns)))
+            else:
+                plan.append((key, len(columns)))
+                columns.append(f"{prefix}{source}")
+        return plan
+
+    def on(self, relation: str) -> 'Projection':
+        projection = Projection(**self.fields)
+        projection.relation = relation
+        return projection
+
+    @staticmethod
+    def _build(plan: list, row: tuple) -> dict:
+        return {
+            key: row[index] if type(index) is int else Projection._build(index, row)
+            for key, index in plan
+        }
+
+    def rows(self, queryset) -> List[dict]:
+        plan, build = self._plan, self._build
+        return [build(plan, row) for row in queryset.values_list(*self.columns)]
+
+    def first(self, queryset) -> Optional[dict]:
+        row = queryset.values_list(*self.columns).first()
+        return None if row is None else self._build(self._plan, row)
+
+    def get_or_404(self, queryset, **lookup) -> dict:
+        """
+        Como get_object_or_404(): 404 si no hay fila o el lookup no es válido.
+        """
+        try:
+            data = self.first(queryset.filter(**lookup))
+        except (TypeError, ValueError):
+            data = None
+        if data is None:
+            raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+        return data
+
+
+# =============================================================================
+# PROYECCIONES DE LA API
+# =============================================================================
+
+PLANE = Projection(id='id', model='model', manufacturer='manufacturer', capacity='capacity')
+
+# sin Seat.status: es obsoleto, el estado del asiento vive en FlightSeat
+SEAT = Projection(id='id', number='number', row='row', column='column', seat_type='seat_type')
+
+SEAT_SUMMARY = SEAT
+
+FLIGHT = Projection(
+    id='id', origin='origin', destination='destination', departure_time='departure_time',
+    arrival_time='arrival_time', duration='duration', status='status', base_price='base_price',
+    plane=PLANE,
+)
+
+FLIGHT_SUMMARY = Projection(
+    id='id', origin='origin', destination='destination', departure_time='departure_time',
+    arrival_time='arrival_time', status='status',
+)
+
+PASSENGER_SUMMARY = Projection(
+    id='id', full_name='full_name', document_number='document_number', email='email',
+)
+
+PASSENGER_CONTACT = Projection(
+    id='id', full_name='full_name', document_type='document_type',
+    document_number='document_number', email='email', phone='phone',
+)
+
+PASSENGER = Projection(**PASSENGER_CONTACT.fields, birth_date='birth_date')
+
+# reservas de un pasajero (PassengerViewSet.reservations / active_reservations)
+PASSENGER_RESERVATION = Projection(
+    id='id', reservation_code='reservation_code', reservation_date='reservation_date',
+    price='price', status='status', flight=FLIGHT, seat=SEAT,
+)
+
+# pasajeros de un vuelo (FlightViewSet.passengers)
+FLIGHT_PASSENGER = Projection(
+    passenger=PASSENGER_CONTACT,
+    reservation=Projection(
+        id='id', reservation_code='reservation_code', reservation_date='reservation_date',
+        price='price', status='status',
+    ).on(''),
+    seat=SEAT_SUMMARY,
+)
+
+# boleto completo (TicketViewSet.by_barcode)
+TICKET = Projection(
+    id='id', barcode='barcode', status='status', issued_at='issued_at',
+    reservation=Projection(
+        id='id', reservation_code='reservation_code', status='status',
+        reservation_date='reservation_date', price='price',
+        passenger=PASSENGER, flight=FLIGHT, seat=SEAT,
+    ),
+)
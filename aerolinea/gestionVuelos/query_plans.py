@@ -0,0 +1,177 @@
+"""
+Optimización automática de querysets a partir del árbol de serializers:
+los serializers anidados por FK se resuelven con select_related, las
+relaciones múltiples con prefetch_related y las anotaciones que declare
+el serializer (``Meta.annotations``) se aplican sobre el queryset.
+Con ?fields=/?expand= además se piden solo las columnas que se van a leer.
+"""
+
+from typing import Dict, NamedTuple, Tuple
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, RelatedField
+
+from .sideloading import SideloadedField
+
+
+class QueryPlan(NamedTuple):
+    select_related: Tuple[str, ...]
+    prefetch_related: Tuple[str, ...]
+    annotations: dict
+    # columnas para .only(); vacío = todas
+    only: Tuple[str, ...] = ()
+
+
+_plans: Dict[type, QueryPlan] = {}
+
+
+def _relation(model, source: str):
+    """
+    (modelo relacionado, es_multiple) del atributo ``source`` o None si no
+    es una relación del modelo.
+    """
+    try:
+        field = model._meta.get_field(source)
+    except FieldDoesNotExist:
+        return None
+    if not field.is_relation:
+        return None
+    return field.related_model, bool(field.many_to_many or field.one_to_many)
+
+
+def _is_column(model, source: str) -> bool:
+    try:
+        return model._meta.get_field(source).concrete
+    except FieldDoesNotExist:
+        return False
+
+
+def _requirements(serializer, prefix: str, prefetching: bool, select: set, columns: set) -> None:
+    """
+    Columnas que leen los campos calculados presentes (``Meta.expensive_fields``);
+    'plane__capacity' además agrega select_related('plane').
+    """
+    expensive = getattr(getattr(serializer, 'Meta', None), 'expensive_fields', {})
+    for name, paths in expensive.items():
+        if name not in serializer.fields:
+            continue
+        for path in paths:
+            relation, _, _ = path.rpartition('__')
+            if relation and not prefetching:
+                select.add(f"{prefix}{relation}")
+            columns.add(f"{prefix}{path}")
+
+
+def _walk(serializer, model, prefix: str, prefetching: bool, select: set, prefetch: set, columns: set) -> None:
+    columns.add(f"{prefix}{model._meta.pk.name}")
+    _requirements(serializer, prefix, prefetching, select, columns)
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        # 'plane.model' -> relación 'plane'
+        source = field.source.split('.')[0]
+        relation = _relation(model, source)
+        if relation is None:
+            if _is_column(model, source):
+                columns.add(f"{prefix}{source}")
+            continue
+        related_model, many = relation
+        path = f"{prefix}{source}"
+
+        if isinstance(field, serializers.ListSerializer):
+            nested, many = field.child, True
+        elif isinstance(field, serializers.BaseSerializer):
+            nested = field
+        elif isinstance(field, SideloadedField):
+            nested, many = field.serializer, many or field.many
+        elif isinstance(field, ManyRelatedField):
+            nested, many = None, True
+        elif isinstance(field, RelatedField):
+            # PrimaryKeyRelatedField solo lee la columna <campo>_id
+            if isinstance(field, serializers.PrimaryKeyRelatedField) and not many:
+                columns.add(path)
+                continue
+            nested = None
+        else:
+            continue
+
+        if many or prefetching:
+            prefetch.add(path)
+        else:
+            select.add(path)
+            columns.add(path)
+        if nested is not None and getattr(nested, 'Meta', None) is not None:
+            _walk(nested, related_model, f"{path}__", prefetching or many, select, prefetch, columns)
+
+
+def _leaves(paths: set) -> Tuple[str, ...]:
+    # select_related('a__b') ya incluye 'a'; prefetch_related igual
+    return tuple(sorted(path for path in paths if not any(other.startswith(f"{path}__") for other in paths)))
+
+
+def serializer_plan(serializer) -> QueryPlan:
+    """
+    Plan de consultas de una instancia de serializer. Sin selección de
+    campos (``sparse_spec``) se calcula una vez por clase; con selección se
+    arma en cada pedido, porque los parámetros los elige el cliente.
+    """
+    spec = serializer.sparse_spec() if hasattr(serializer, 'sparse_spec') else None
+    plan = _plans.get(type(serializer)) if spec is None else None
+    if plan is None:
+        select, prefetch, columns = set(), set(), set()
+        meta = getattr(serializer, 'Meta', None)
+        model = getattr(meta, 'model', None)
+        if model is not None:
+            _walk(serializer, model, '', False, select, prefetch, columns)
+        plan = QueryPlan(
+            _leaves(select),
+            _leaves(prefetch),
+            dict(getattr(meta, 'annotations', {})),
+            # sin selección de campos se leen todas las columnas, como siempre
+            tuple(sorted(columns)) if spec is not None else (),
+        )
+        if spec is None:
+            _plans[type(serializer)] = plan
+    return plan
+
+
+def query_plan(serializer_class) -> QueryPlan:
+    """
+    Plan de consultas de un ModelSerializer con todos sus campos.
+    """
+    return serializer_plan(serializer_class())
+
+
+def optimize_queryset(queryset, serializer, extra_columns=()):
+    plan = serializer_plan(serializer)
+    if plan.select_related:
+        queryset = queryset.select_related(*plan.select_related)
+    if plan.prefetch_related:
+        queryset = queryset.prefetch_related(*plan.prefetch_related)
+    if plan.annotations:
+        queryset = queryset.annotate(**plan.annotations)
+    if plan.only:
+        extra = [column for column in extra_columns if _is_column(queryset.model, column)]
+        queryset = queryset.only(*plan.only, *extra)
+    return queryset
+
+
+class QueryPlanMixin:
+    """
+    Aplica a ``get_queryset()`` el plan derivado del serializer de la
+    acción, así cada página cuesta la misma cantidad de consultas sin
+    importar cuántas filas trae.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return optimize_queryset(queryset, self.get_serializer(), self._ordering_columns())
+
+    def _ordering_columns(self):
+        # el cursor de paginación lee los campos del orden en la primera y la última fila
+        ordering = getattr(self, 'ordering', None) or []
+        if isinstance(ordering, str):
+            ordering = [ordering]
+        requested = self.request.query_params.get('ordering', '').split(',') if self.request else []
+        return [field.lstrip('-') for field in [*ordering, *requested] if field]
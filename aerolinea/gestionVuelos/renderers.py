@@ -0,0 +1,60 @@
+"""
+Renderers de la API. ``FastJSONRenderer`` produce los mismos bytes que el
+JSONRenderer de DRF pero codifica con orjson; si el dato no lo soporta
+delega en el renderer estándar.
+``MsgPackRenderer`` (application/msgpack) entrega los mismos valores que
+el JSON, empaquetados con msgpack, para los clientes móviles y kioscos.
+"""
+
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Decimal, timedelta, datetime con 'Z', QuerySet...: mismas reglas que el JSON de DRF
+_encoder = JSONEncoder()
+
+
+def encode_default(obj):
+    return _encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON compacto y UTF-8, como el de DRF con la configuración por defecto.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if not self.compact or self.ensure_ascii or self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            # las fechas pasan por el encoder de DRF ('Z' en UTC, sin opciones de orjson)
+            ret = orjson.dumps(data, default=encode_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            # enteros de más de 64 bits, claves no string, etc.
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # igual que DRF: U+2028/U+2029 escapados para poder embeber el JSON en JS
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MsgPackRenderer(BaseRenderer):
+    """
+    application/msgpack con los mismos valores que la respuesta JSON
+    (fechas como texto ISO 8601 y Decimal como número).
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True, datetime=False)
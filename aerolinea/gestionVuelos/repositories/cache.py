@@ -0,0 +1,133 @@
+"""
+Caché de lectura para ``get_by_id`` de los repositorios: un LRU chico por
+proceso delante de la caché compartida de Django (Redis en producción).
+
+Cada objeto se guarda con dos números de generación: el del modelo (sube
+con las escrituras por QuerySet que no dicen qué filas tocaron) y el del
+objeto (sube con su save()/delete()). Los números viven en la caché
+compartida y suben después del commit (ver signals.py), así que una copia
+local o compartida solo se usa si sus generaciones siguen vigentes, sin
+importar qué proceso escribió. Dentro de una transacción se lee siempre de
+la base: la caché todavía no ve las escrituras propias sin confirmar.
+
+Solo se activa con ``settings.REPOSITORY_CACHE`` (caché compartida por Redis
+o archivos): con una caché en memoria por proceso las generaciones no
+llegarían a los demás workers.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+REPOSITORY_CACHE_TIMEOUT = 60 * 60
+REPOSITORY_LOCAL_SIZE = 256
+
+
+def _initial_generation() -> int:
+    # si la clave se perdió, la generación nueva no repite una ya usada
+    return time.time_ns() // 1000
+
+
+def enabled() -> bool:
+    return getattr(settings, 'REPOSITORY_CACHE', False)
+
+
+def _prefix(model) -> str:
+    return f"repo:{model._meta.label_lower}"
+
+
+def invalidate(model, pks: Optional[Iterable] = None) -> None:
+    """
+    Sube la generación de los objetos ``pks`` de ``model`` (o la del modelo
+    si es None) cuando se confirma la transacción en curso. No depende de
+    que el proceso que escribe tenga el repositorio cargado.
+    """
+    if not enabled():
+        return
+    prefix = _prefix(model)
+    keys = [f"{prefix}:gen"] if pks is None else [f"{prefix}:{pk}:gen" for pk in pks]
+    transaction.on_commit(lambda: _bump(keys), robust=True)
+
+
+def _bump(keys) -> None:
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_generation(), None)
+
+
+class RepositoryCache:
+    """
+    Caché de un modelo. ``get(pk)`` devuelve una copia del objeto (los
+    llamadores pueden modificarla y guardarla) o None si no existe.
+    """
+    def __init__(self, model, timeout: int = REPOSITORY_CACHE_TIMEOUT, local_size: int = REPOSITORY_LOCAL_SIZE):
+        self.model = model
+        self.timeout = timeout
+        self.local_size = local_size
+        self.prefix = _prefix(model)
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _model_key(self) -> str:
+        return f"{self.prefix}:gen"
+
+    def _object_key(self, pk) -> str:
+        return f"{self.prefix}:{pk}"
+
+    def _generation_key(self, pk) -> str:
+        return f"{self.prefix}:{pk}:gen"
+
+    def _generations(self, pk) -> tuple:
+        keys = [self._model_key(), self._generation_key(pk)]
+        values = cache.get_many(keys)
+        for key in keys:
+            if key not in values:
+                cache.add(key, _initial_generation(), None)
+                values[key] = cache.get(key)
+        return values[keys[0]], values[keys[1]]
+
+    def get(self, pk):
+        try:
+            pk = self.model._meta.pk.to_python(pk)
+        except ValidationError:
+            return None
+        if not enabled() or transaction.get_connection().in_atomic_block:
+            return self.model.objects.filter(pk=pk).first()
+
+        generations = self._generations(pk)
+        with self._lock:
+            entry = self._local.get(pk)
+            if entry is not None and entry[0] == generations:
+                self._local.move_to_end(pk)
+                return copy.copy(entry[1])
+
+        entry = cache.get(self._object_key(pk))
+        if entry is None or entry[0] != generations:
+            instance = self.model.objects.filter(pk=pk).first()
+            if instance is None:
+                return None
+            entry = (generations, instance)
+            cache.set(self._object_key(pk), entry, self.timeout)
+
+        with self._lock:
+            self._local[pk] = entry
+            self._local.move_to_end(pk)
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+        return copy.copy(entry[1])
+
+    def invalidate(self, pks: Optional[Iterable] = None) -> None:
+        invalidate(self.model, pks)
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._local.clear()
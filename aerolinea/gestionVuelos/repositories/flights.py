@@ -1,9 +1,13 @@
-from django.shortcuts import get_object_or_404
+from django.http import Http404
 
 from gestionVuelos.models import Flight
+from gestionVuelos.repositories.cache import RepositoryCache
 from datetime import datetime, timedelta
 from decimal import Decimal
 
+_cache = RepositoryCache(Flight)
+
+
 class FlightRepository:
     @staticmethod
     def get_all() -> list[Flight]:
@@ -11,7 +15,11 @@ class FlightRepository:
 
     @staticmethod
     def get_by_id(flight_id: int) -> Flight:
-        return get_object_or_404(Flight, id=flight_id)
+        # copia cacheada mientras no cambie (ver repositories/cache.py)
+        instance = _cache.get(flight_id)
+        if instance is None:
+            raise Http404("No Flight matches the given query.")
+        return instance
 
     @staticmethod
     def create(
@@ -1,8 +1,12 @@
-from django.shortcuts import get_object_or_404
+from django.http import Http404
 
 from gestionVuelos.models import Passenger
+from gestionVuelos.repositories.cache import RepositoryCache
 from datetime import date
 
+_cache = RepositoryCache(Passenger)
+
+
 class PassengerRepository:
     @staticmethod
     def get_all() -> list[Passenger]:
@@ -10,7 +14,11 @@ class PassengerRepository:
 
     @staticmethod
     def get_by_id(passenger_id: int) -> Passenger:
-        return get_object_or_404(Passenger, id=passenger_id)
+        # copia cacheada mientras no cambie (ver repositories/cache.py)
+        instance = _cache.get(passenger_id)
+        if instance is None:
+            raise Http404("No Passenger matches the given query.")
+        return instance
 
     @staticmethod
     def create(
@@ -1,9 +1,12 @@
 from django.shortcuts import get_object_or_404
 
 from gestionVuelos.models import Plane
+from gestionVuelos.repositories.cache import RepositoryCache
 from typing import List
 from typing import Optional
 
+_cache = RepositoryCache(Plane)
+
 
 class PlaneRepository:
 
@@ -13,10 +16,8 @@ class PlaneRepository:
     
     @staticmethod
     def get_by_id(plane_id: int) -> Optional[Plane]:
-        try:
-            return Plane.objects.get(id=plane_id)
-        except Plane.DoesNotExist:
-            return None
+        # copia cacheada mientras no cambie (ver repositories/cache.py)
+        return _cache.get(plane_id)
     
     @staticmethod
     def search_by_name(name: str) -> List[Plane]:
@@ -25,13 +26,13 @@ class PlaneRepository:
     @staticmethod
     def create(
         model: str, 
+        manufacturer: str,
         capacity: int, 
-        available_seats: int,
     ) -> Plane:
         return Plane.objects.create(
             model=model,
+            manufacturer=manufacturer,
             capacity=capacity,
-            available_seats=available_seats
         )
         
     
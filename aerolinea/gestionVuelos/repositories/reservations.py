@@ -1,10 +1,14 @@
-from django.shortcuts import get_object_or_404
+from django.http import Http404
 from django.db.models.query import QuerySet
 
 from gestionVuelos.models import Reservation
+from gestionVuelos.repositories.cache import RepositoryCache
 from datetime import datetime
 from decimal import Decimal
 
+_cache = RepositoryCache(Reservation)
+
+
 class ReservationRepository:
     @staticmethod
     def get_all() -> QuerySet[Reservation]:
@@ -17,7 +21,11 @@ class ReservationRepository:
 
     @staticmethod
     def get_by_id(reservation_id: int) -> Reservation:
-        return get_object_or_404(Reservation, id=reservation_id)
+        # copia cacheada mientras no cambie (ver repositories/cache.py)
+        instance = _cache.get(reservation_id)
+        if instance is None:
+            raise Http404("No Reservation matches the given query.")
+        return instance
 
     @staticmethod
     def create(
@@ -1,6 +1,10 @@
-from django.shortcuts import get_object_or_404
+from django.http import Http404
 
 from gestionVuelos.models import Seat
+from gestionVuelos.repositories.cache import RepositoryCache
+
+
+_cache = RepositoryCache(Seat)
 
 
 class SeatRepository:
@@ -11,7 +15,11 @@ class SeatRepository:
 
     @staticmethod
     def get_by_id(seat_id: int) -> Seat:
-        return get_object_or_404(Seat, id=seat_id)
+        # copia cacheada mientras no cambie (ver repositories/cache.py)
+        instance = _cache.get(seat_id)
+        if instance is None:
+            raise Http404("No Seat matches the given query.")
+        return instance
 
     @staticmethod
     def create(number: int, plane) -> Seat:
@@ -1,9 +1,13 @@
-from django.shortcuts import get_object_or_404
+from django.http import Http404
 
 from gestionVuelos.models import Ticket
+from gestionVuelos.repositories.cache import RepositoryCache
 from datetime import datetime
 import uuid
 
+_cache = RepositoryCache(Ticket)
+
+
 class TicketRepository:
     @staticmethod
     def get_all() -> list[Ticket]:
@@ -11,7 +15,11 @@ class TicketRepository:
 
     @staticmethod
     def get_by_id(ticket_id: int) -> Ticket:
-        return get_object_or_404(Ticket, id=ticket_id)
+        # copia cacheada mientras no cambie (ver repositories/cache.py)
+        instance = _cache.get(ticket_id)
+        if instance is None:
+            raise Http404("No Ticket matches the given query.")
+        return instance
 
     @staticmethod
     def create(
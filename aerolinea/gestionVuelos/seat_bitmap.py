@@ -0,0 +1,77 @@
+"""
+Mapa de bits de asientos ocupados por vuelo.
+
+Cada asiento del avión tiene un índice fijo derivado de su fila y columna
+(el mismo orden que usa scripts/crear_asientos.py): el bit ``i`` encendido
+significa que el asiento de índice ``i`` está tomado en ese vuelo.
+"""
+
+SEAT_COLUMNS = ["A", "B", "C", "D", "E", "F"]
+
+
+def seat_index(row: int, column: str) -> int:
+    """
+    Índice (desde 0) del asiento dentro del mapa de bits del vuelo.
+    """
+    column = (column or "").upper()
+    if row < 1 or column not in SEAT_COLUMNS:
+        raise ValueError(f"Asiento fuera del layout: fila {row}, columna {column!r}")
+    return (row - 1) * len(SEAT_COLUMNS) + SEAT_COLUMNS.index(column)
+
+
+class SeatBitmap:
+    """
+    Conjunto inmutable de índices de asientos tomados.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: int = 0):
+        self.value = value
+
+    @classmethod
+    def from_bytes(cls, data) -> "SeatBitmap":
+        return cls(int.from_bytes(bytes(data or b""), "little"))
+
+    @classmethod
+    def from_indexes(cls, indexes) -> "SeatBitmap":
+        value = 0
+        for index in indexes:
+            value |= 1 << index
+        return cls(value)
+
+    def to_bytes(self) -> bytes:
+        return self.value.to_bytes((self.value.bit_length() + 7) // 8, "little")
+
+    def is_taken(self, index: int) -> bool:
+        return bool(self.value >> index & 1)
+
+    def taken(self, indexes) -> "SeatBitmap":
+        return SeatBitmap(self.value | SeatBitmap.from_indexes(indexes).value)
+
+    def released(self, indexes) -> "SeatBitmap":
+        return SeatBitmap(self.value & ~SeatBitmap.from_indexes(indexes).value)
+
+    def count(self) -> int:
+        return self.value.bit_count()
+
+    def indexes(self) -> list[int]:
+        """
+        Índices tomados, recorriendo solo los bits encendidos.
+        """
+        result = []
+        value = self.value
+        while value:
+            lowest = value & -value
+            result.append(lowest.bit_length() - 1)
+            value ^= lowest
+        return result
+
+    def __eq__(self, other):
+        return isinstance(other, SeatBitmap) and self.value == other.value
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __repr__(self):
+        return f"SeatBitmap({self.count()} taken)"
@@ -0,0 +1,167 @@
+"""
+Búsqueda de bloques de asientos contiguos para reservas grupales.
+
+Trabaja sobre la lista de asientos libres de un vuelo (una sola consulta)
+y recorre cada fila una vez: primero busca el bloque en una misma fila y,
+si el grupo no entra, encadena tramos libres de filas consecutivas que se
+tocan (misma columna o columnas vecinas, sin cruzar el pasillo) con la menor
+cantidad de filas.
+"""
+
+from typing import List, NamedTuple, Optional
+
+from gestionVuelos.seat_bitmap import SEAT_COLUMNS
+
+GROUP_PREFERENCES = ["together", "window", "aisle", "any"]
+
+
+class FreeSeat(NamedTuple):
+    id: int
+    row: int
+    column: str
+    seat_type: str
+    seat_index: int
+
+
+def _column_position(seat: FreeSeat) -> int:
+    column = (seat.column or "").upper()
+    return SEAT_COLUMNS.index(column) if column in SEAT_COLUMNS else len(SEAT_COLUMNS)
+
+
+def _is_aisle(seat: FreeSeat) -> bool:
+    return (seat.seat_type or "").lower() == "aisle"
+
+
+def _across_aisle(left: FreeSeat, right: FreeSeat) -> bool:
+    # dos asientos de pasillo en columnas seguidas (C y D en un 3-3) están
+    # separados por el pasillo; sale del seat_type, no de una cabina fija
+    return _is_aisle(left) and _is_aisle(right)
+
+
+def _runs(row_seats: List[FreeSeat]) -> List[List[FreeSeat]]:
+    """
+    Tramos de columnas consecutivas libres dentro de una fila ordenada,
+    cortados en el pasillo.
+    """
+    runs = []
+    for seat in row_seats:
+        previous = runs[-1][-1] if runs else None
+        if (
+            previous is not None
+            and _column_position(seat) == _column_position(previous) + 1
+            and not _across_aisle(previous, seat)
+        ):
+            runs[-1].append(seat)
+        else:
+            runs.append([seat])
+    return runs
+
+
+def _matches(block: List[FreeSeat], preference: str) -> bool:
+    """
+    'window'/'aisle' se cumple si el bloque incluye al menos un asiento de
+    ese tipo (p. ej. la ventanilla para la familia), no cada asiento: en un
+    bloque contiguo solo los extremos pueden serlo.
+    """
+    if preference in ("window", "aisle"):
+        return any((seat.seat_type or "").lower() == preference for seat in block)
+    return True
+
+
+def _span(run: List[FreeSeat]):
+    return _column_position(run[0]), _column_position(run[-1])
+
+
+def _touching(upper: List[FreeSeat], lower: List[FreeSeat]) -> bool:
+    """
+    Dos tramos de filas consecutivas forman un bloque si comparten alguna
+    columna o si uno empieza en la columna siguiente a donde termina el
+    otro sin que el pasillo los separe.
+    """
+    (upper_start, upper_end), (lower_start, lower_end) = _span(upper), _span(lower)
+    if max(upper_start, lower_start) <= min(upper_end, lower_end):
+        return True
+    if lower_start == upper_end + 1:
+        return not _across_aisle(upper[-1], lower[0])
+    if upper_start == lower_end + 1:
+        return not _across_aisle(lower[-1], upper[0])
+    return False
+
+
+def _chain_size(chain: List[List[FreeSeat]]) -> int:
+    return sum(len(run) for run in chain)
+
+
+def _chain_block(chain: List[List[FreeSeat]], size: int) -> List[FreeSeat]:
+    """
+    Los tramos completos de la cadena salvo el último, y de ese los asientos
+    más cercanos a las columnas del anterior, para que el bloque siga unido.
+    """
+    block = [seat for run in chain[:-1] for seat in run]
+    start, end = _span(chain[-2])
+
+    def distance(seat):
+        position = _column_position(seat)
+        return max(start - position, position - end, 0), position
+
+    block += sorted(sorted(chain[-1], key=distance)[:size - len(block)], key=_column_position)
+    return block
+
+
+def find_seat_block(free_seats, size: int, preference: str = "together") -> Optional[List[FreeSeat]]:
+    """
+    Devuelve ``size`` asientos contiguos según la preferencia, o None si no
+    hay un bloque posible. Con 'any' se aceptan asientos separados.
+    """
+    if size <= 0:
+        return []
+    seats = sorted((FreeSeat(*seat) for seat in free_seats), key=lambda s: (s.row, _column_position(s)))
+    if len(seats) < size:
+        return None
+
+    rows = {}
+    for seat in seats:
+        rows.setdefault(seat.row, []).append(seat)
+
+    # 1) bloque dentro de una fila; la preferencia desempata antes que la fila
+    fallback = None
+    for row_number in sorted(rows):
+        for run in _runs(rows[row_number]):
+            for start in range(len(run) - size + 1):
+                block = run[start:start + size]
+                if _matches(block, preference):
+                    return block
+                if fallback is None:
+                    fallback = block
+    if fallback is not None:
+        return fallback
+
+    # 2) cadena de tramos en filas consecutivas, un tramo por fila, con la
+    # menor cantidad de filas: por cada largo se guarda, para cada tramo, la
+    # cadena con más asientos que termina en él
+    runs = {row_number: _runs(rows[row_number]) for row_number in rows}
+    chains = {
+        (row_number, position): [run]
+        for row_number, row_runs in runs.items()
+        for position, run in enumerate(row_runs)
+    }
+    while chains:
+        extended = {}
+        for (row_number, _), chain in sorted(chains.items()):
+            for position, lower in enumerate(runs.get(row_number + 1, [])):
+                if not _touching(chain[-1], lower):
+                    continue
+                key = (row_number + 1, position)
+                if key not in extended or _chain_size(chain) + len(lower) > _chain_size(extended[key]):
+                    extended[key] = chain + [lower]
+        chains = extended
+        candidates = [
+            _chain_block(chains[key], size) for key in sorted(chains) if _chain_size(chains[key]) >= size
+        ]
+        if candidates:
+            return next((block for block in candidates if _matches(block, preference)), candidates[0])
+
+    # 3) sin bloque contiguo: solo se aceptan asientos sueltos con 'any'
+    if preference == "any":
+        return seats[:size]
+    return None
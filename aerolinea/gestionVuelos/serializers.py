@@ -5,23 +5,257 @@ Desarrollado por: [Nombre del Estudiante]
 Fecha: 2024
 """
 
-from rest_framework import serializers
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
 from django.core.exceptions import ValidationError
+from django.db.models import Exists, OuterRef
 from django.utils import timezone
 from datetime import datetime, date
-from .models import Flight, Passenger, Reservation, Plane, Seat, Ticket
+from .models import Flight, FlightSeat, Passenger, Reservation, Plane, Seat, Ticket
+from .seat_blocks import GROUP_PREFERENCES
+from .sideloading import SideloadedField
+from .services.fleet import FleetService
+from .services.flights import FlightService
+from .services.passenger import PassengerService
+from .services.reservation import ReservationService
+from .services.seat_inventory import PLANE_CHANGE_BLOCKED, SeatInventoryService
+from .services.ticket import TicketService
+
+# =============================================================================
+# SELECCIÓN DE CAMPOS (?fields= / ?expand=)
+# =============================================================================
+
+def field_tree(value: str) -> dict:
+    """
+    'id,plane.model,plane.capacity' -> {'id': {}, 'plane': {'model': {}, 'capacity': {}}}
+    """
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for part in path.strip().split('.'):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+class SparseFieldsMixin:
+    """
+    Selección de campos y formato con included de los ModelSerializers.
+
+    En las lecturas con ?fields= o ?expand= solo se serializan los campos
+    pedidos. Los objetos anidados salen como ID salvo que se expandan
+    (``expand=flight.plane`` o un campo anidado en ``fields=flight.origin``)
+    y los campos calculados de ``Meta.expensive_fields`` solo se calculan si
+    se nombran en ``fields``. Sin esos parámetros la respuesta no cambia.
+
+    ``Meta.expensive_fields`` mapea cada campo calculado a las columnas que
+    lee, para que el queryset las traiga (ver query_plans).
+
+    Si el contexto trae ``included`` (?sideload=1), los serializers anidados
+    se reemplazan por SideloadedField.
+    """
+
+    def sparse_spec(self):
+        """
+        (campos, expansiones) de este nivel, o None si no hay selección.
+        """
+        if not hasattr(self, '_sparse_spec'):
+            parent = self.parent
+            if isinstance(parent, serializers.ListSerializer):
+                parent = parent.parent
+            request = self.context.get('request')
+            spec = None
+            if parent is None and request is not None and request.method in SAFE_METHODS:
+                params = request.query_params
+                if 'fields' in params or 'expand' in params:
+                    spec = (field_tree(params.get('fields', '')), field_tree(params.get('expand', '')))
+            self._sparse_spec = spec
+        return self._sparse_spec
+
+    def get_fields(self):
+        fields = super().get_fields()
+        spec = self.sparse_spec()
+        if spec is not None:
+            fields = self._sparse_fields(fields, spec)
+        if self.context.get('included') is not None:
+            # ?sideload=1: los anidados van al mapa included (ver sideloading)
+            fields = {
+                name: SideloadedField(field) if isinstance(field, serializers.BaseSerializer) else field
+                for name, field in fields.items()
+            }
+        return fields
+
+    def _sparse_fields(self, fields, spec):
+        wanted, expand = spec
+        expensive = getattr(self.Meta, 'expensive_fields', {})
+        selected = {}
+        for name, field in fields.items():
+            if not field.write_only and (name not in wanted if wanted else name in expensive):
+                continue
+            if isinstance(field, serializers.BaseSerializer):
+                many = isinstance(field, serializers.ListSerializer)
+                if name in expand or wanted.get(name):
+                    nested = field.child if many else field
+                    nested._sparse_spec = (wanted.get(name, {}), expand.get(name, {}))
+                else:
+                    field = serializers.PrimaryKeyRelatedField(read_only=True, source=field.source, many=many)
+            selected[name] = field
+        return selected
+
+# =============================================================================
+# ALTAS MASIVAS (many=True)
+# =============================================================================
+
+BULK_MAX_ITEMS = 500
+
+
+class BatchPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField que, dentro de un lote, toma el objeto de los
+    ya resueltos por BulkListSerializer en lugar de hacer un get() por fila.
+    """
+    resolved = None
+
+    def to_internal_value(self, data):
+        if self.resolved is None:
+            return super().to_internal_value(data)
+        try:
+            pk = self.get_queryset().model._meta.pk.to_python(data)
+        except (TypeError, ValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        instance = self.resolved.get(pk)
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instance
+
+
+class ReferenceField(BatchPrimaryKeyRelatedField):
+    """
+    Fuera de un lote solo valida el formato del ID y lo devuelve tal cual:
+    el ``validate()`` del serializer resuelve todas las relaciones juntas,
+    en una sola consulta, y reemplaza los IDs por los objetos.
+    """
+
+    def to_internal_value(self, data):
+        if self.resolved is not None:
+            return super().to_internal_value(data)
+        try:
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except (TypeError, ValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+    def does_not_exist(self, pk_value) -> serializers.ValidationError:
+        return serializers.ValidationError(
+            {self.field_name: [self.error_messages['does_not_exist'].format(pk_value=pk_value)]}
+        )
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    many=True con validación por conjuntos: las relaciones se resuelven con
+    un IN por campo, la unicidad con un IN por campo único (y contra el
+    resto del lote) y el alta la hace ``child.create_many()`` en una
+    transacción. Los errores se devuelven por fila, en el orden recibido.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            return super().to_internal_value(data)
+        self._prepare_batch(data)
+        self._rows = []
+        try:
+            rows = super().to_internal_value(data)
+            errors = [{} for _ in rows]
+        except serializers.ValidationError as exc:
+            if not isinstance(exc.detail, list) or len(exc.detail) != len(self._rows):
+                raise
+            errors = exc.detail
+        # las filas válidas igual pasan por los controles del lote
+        batch_errors = self.batch_errors(self._rows)
+        for index, row_errors in batch_errors.items():
+            for field_name, messages in row_errors.items():
+                errors[index].setdefault(field_name, []).extend(messages)
+        if any(errors):
+            # se levanta acá y no en validate() para que no quede envuelto en non_field_errors
+            raise serializers.ValidationError(errors)
+        return rows
+
+    def run_child_validation(self, data):
+        # validate_arrival_time y otros validadores leen initial_data de la fila
+        self.child.initial_data = data
+        try:
+            value = super().run_child_validation(data)
+        except serializers.ValidationError:
+            self._rows.append(None)
+            raise
+        self._rows.append(value)
+        return value
+
+    def _prepare_batch(self, data):
+        rows = [item for item in data if isinstance(item, dict)]
+        self.unique_fields = {}
+        for name, field in self.child.fields.items():
+            if field.read_only:
+                continue
+            if isinstance(field, BatchPrimaryKeyRelatedField):
+                queryset = field.get_queryset()
+                ids = set()
+                for row in rows:
+                    try:
+                        ids.add(queryset.model._meta.pk.to_python(row.get(name)))
+                    except (TypeError, ValidationError):
+                        continue
+                ids.discard(None)
+                field.resolved = queryset.in_bulk(ids)
+            unique = [validator for validator in field.validators if isinstance(validator, UniqueValidator)]
+            if unique:
+                # un exists() por fila se reemplaza por un IN sobre todo el lote
+                field.validators = [validator for validator in field.validators if validator not in unique]
+                self.unique_fields[name] = (field.source, unique[0])
+
+    def batch_errors(self, rows) -> dict:
+        """
+        {fila: {campo: [mensajes]}} de los controles que miran todo el lote.
+        ``rows`` trae None en las filas que ya fallaron.
+        """
+        errors = {}
+        for name, (source, validator) in self.unique_fields.items():
+            positions = {}
+            for index, row in enumerate(rows):
+                if row is not None and row.get(source) is not None:
+                    positions.setdefault(row[source], []).append(index)
+            existing = set(
+                validator.queryset.filter(**{f"{source}__in": list(positions)}).values_list(source, flat=True)
+            )
+            for value, indexes in positions.items():
+                if value in existing:
+                    duplicated = indexes
+                    message = validator.message
+                else:
+                    duplicated = indexes[1:]
+                    message = f"Repetido en el lote (fila {indexes[0]})"
+                for index in duplicated:
+                    errors.setdefault(index, {}).setdefault(name, []).append(message)
+        return errors
+
+    def create(self, validated_data):
+        return self.child.create_many(validated_data)
+
 
 # =============================================================================
 # SERIALIZER DE AVIONES
 # =============================================================================
 
-class PlaneSerializer(serializers.ModelSerializer):
+class PlaneSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para el modelo Plane
     """
     class Meta:
         model = Plane
-        fields = '__all__'
+        # layout_version y updated_at son columnas internas (caché y ETags)
+        fields = ['id', 'model', 'manufacturer', 'capacity']
 
     def validate_capacity(self, value):
         """
@@ -31,6 +265,10 @@ class PlaneSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("La capacidad del avión debe ser mayor a 0")
         if value > 1000:
             raise serializers.ValidationError("La capacidad del avión no puede ser mayor a 1000")
+        if self.instance is not None and FleetService.reduction_blocked(self.instance, value):
+            raise serializers.ValidationError(
+                "No se puede reducir la capacidad: hay reservas en los asientos que se quitarían"
+            )
         return value
 
     def validate_model(self, value):
@@ -45,13 +283,17 @@ class PlaneSerializer(serializers.ModelSerializer):
 # SERIALIZER DE ASIENTOS
 # =============================================================================
 
-class SeatSerializer(serializers.ModelSerializer):
+class SeatSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para el modelo Seat
     """
+    plane = ReferenceField(queryset=Plane.objects.all())
+
     class Meta:
         model = Seat
-        fields = '__all__'
+        # sin Seat.status (obsoleto: el estado vive en FlightSeat, por vuelo)
+        # ni seat_index/updated_at, que son internos
+        fields = ['id', 'plane', 'number', 'row', 'column', 'seat_type']
 
     def validate_number(self, value):
         """
@@ -73,34 +315,41 @@ class SeatSerializer(serializers.ModelSerializer):
         """
         Validaciones cruzadas
         """
-        plane = data.get('plane')
-        row = data.get('row')
-        column = data.get('column')
-        
-        if plane and row and column:
-            # Verificar que no exista otro asiento con el mismo número en el mismo avión
-            existing_seat = Seat.objects.filter(
-                plane=plane, 
-                number=data.get('number')
-            ).exclude(id=self.instance.id if self.instance else None)
-            
-            if existing_seat.exists():
-                raise serializers.ValidationError(
-                    f"Ya existe un asiento con el número {data.get('number')} en este avión"
-                )
-        
+        plane_id = data.get('plane')
+        if plane_id is None:
+            return data
+
+        # el avión y el control de número repetido van en la misma consulta
+        planes = Plane.objects.filter(pk=plane_id)
+        check_number = data.get('row') and data.get('column')
+        if check_number:
+            planes = planes.annotate(number_taken=Exists(
+                Seat.objects.filter(plane=OuterRef('pk'), number=data.get('number'))
+                .exclude(id=self.instance.id if self.instance else None)
+            ))
+        plane = planes.first()
+        if plane is None:
+            raise self.fields['plane'].does_not_exist(plane_id)
+
+        # Verificar que no exista otro asiento con el mismo número en el mismo avión
+        if check_number and plane.number_taken:
+            raise serializers.ValidationError(
+                f"Ya existe un asiento con el número {data.get('number')} en este avión"
+            )
+
+        data['plane'] = plane
         return data
 
 # =============================================================================
 # SERIALIZER DE VUELOS
 # =============================================================================
 
-class FlightSerializer(serializers.ModelSerializer):
+class FlightSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para el modelo Flight
     """
     plane = PlaneSerializer(read_only=True)
-    plane_id = serializers.PrimaryKeyRelatedField(
+    plane_id = BatchPrimaryKeyRelatedField(
         queryset=Plane.objects.all(), 
         source='plane', 
         write_only=True,
@@ -116,6 +365,12 @@ class FlightSerializer(serializers.ModelSerializer):
             'arrival_time', 'duration', 'status', 'base_price',
             'plane', 'plane_id', 'available_seats', 'total_seats'
         ]
+        # solo se calculan con ?fields=available_seats,total_seats
+        expensive_fields = {
+            'available_seats': ['available_count'],
+            'total_seats': ['plane__capacity'],
+        }
+        list_serializer_class = BulkListSerializer
 
     def get_available_seats(self, obj):
         """
@@ -129,6 +384,18 @@ class FlightSerializer(serializers.ModelSerializer):
         """
         return obj.plane.capacity
 
+    def validate_plane_id(self, value):
+        """
+        Validar que el vuelo no cambie de avión con reservas activas
+        """
+        if (
+            self.instance is not None
+            and value.pk != self.instance.plane_id
+            and SeatInventoryService.plane_change_blocked(self.instance, value.pk)
+        ):
+            raise serializers.ValidationError(PLANE_CHANGE_BLOCKED)
+        return value
+
     def validate_departure_time(self, value):
         """
         Validar que la fecha de salida no sea en el pasado
@@ -164,11 +431,17 @@ class FlightSerializer(serializers.ModelSerializer):
         
         return data
 
+    def create_many(self, validated_data):
+        """
+        Alta masiva (POST /api/flights/bulk/)
+        """
+        return FlightService.bulk_create([Flight(**attrs) for attrs in validated_data])
+
 # =============================================================================
 # SERIALIZER DE PASAJEROS
 # =============================================================================
 
-class PassengerSerializer(serializers.ModelSerializer):
+class PassengerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para el modelo Passenger
     """
@@ -178,6 +451,7 @@ class PassengerSerializer(serializers.ModelSerializer):
             'id', 'full_name', 'document_type', 'document_number', 
             'email', 'phone', 'birth_date'
         ]
+        list_serializer_class = BulkListSerializer
 
     def validate_document_number(self, value):
         """
@@ -235,30 +509,76 @@ class PassengerSerializer(serializers.ModelSerializer):
         
         return value.strip().title()
 
+    def create_many(self, validated_data):
+        """
+        Alta masiva (POST /api/passengers/bulk/)
+        """
+        return PassengerService.bulk_create([Passenger(**attrs) for attrs in validated_data])
+
 # =============================================================================
 # SERIALIZER DE RESERVAS
 # =============================================================================
 
-class ReservationSerializer(serializers.ModelSerializer):
+class SeatTakenError(APIException):
+    """
+    El asiento fue tomado por otra reserva entre la validación y el claim
+    """
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "El asiento ya está reservado en este vuelo"
+    default_code = 'seat_taken'
+
+
+class ReservationBulkSerializer(BulkListSerializer):
+    """
+    Lote de reservas: además de los controles generales, la disponibilidad
+    de todos los pares vuelo/asiento se consulta de una vez.
+    """
+
+    def batch_errors(self, rows) -> dict:
+        errors = super().batch_errors(rows)
+        pairs = {}
+        for index, row in enumerate(rows):
+            if row is not None:
+                pairs.setdefault((row['flight'].pk, row['seat'].pk), []).append(index)
+        if not pairs:
+            return errors
+
+        taken = set(
+            FlightSeat.objects.filter(
+                flight_id__in={flight_id for flight_id, _ in pairs},
+                seat_id__in={seat_id for _, seat_id in pairs},
+            ).taken().values_list('flight_id', 'seat_id')
+        )
+        for pair, indexes in pairs.items():
+            if pair in taken:
+                duplicated, message = indexes, "El asiento ya está reservado en este vuelo"
+            else:
+                duplicated, message = indexes[1:], f"Asiento repetido en el lote (fila {indexes[0]})"
+            for index in duplicated:
+                errors.setdefault(index, {}).setdefault('seat_id', []).append(message)
+        return errors
+
+
+class ReservationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para el modelo Reservation
     """
     passenger = PassengerSerializer(read_only=True)
-    passenger_id = serializers.PrimaryKeyRelatedField(
+    passenger_id = ReferenceField(
         queryset=Passenger.objects.all(), 
         source='passenger', 
         write_only=True,
         help_text="ID del pasajero"
     )
     flight = FlightSerializer(read_only=True)
-    flight_id = serializers.PrimaryKeyRelatedField(
-        queryset=Flight.objects.all(), 
+    flight_id = ReferenceField(
+        queryset=Flight.objects.select_related('plane'),
         source='flight', 
         write_only=True,
         help_text="ID del vuelo"
     )
     seat = SeatSerializer(read_only=True)
-    seat_id = serializers.PrimaryKeyRelatedField(
+    seat_id = ReferenceField(
         queryset=Seat.objects.all(), 
         source='seat', 
         write_only=True,
@@ -272,6 +592,7 @@ class ReservationSerializer(serializers.ModelSerializer):
             'seat', 'seat_id', 'status', 'reservation_date', 'price', 'reservation_code'
         ]
         read_only_fields = ['reservation_code', 'reservation_date']
+        list_serializer_class = ReservationBulkSerializer
 
     def validate_seat(self, value):
         """
@@ -280,59 +601,168 @@ class ReservationSerializer(serializers.ModelSerializer):
         if not value:
             raise serializers.ValidationError("Debe seleccionar un asiento")
         
-        if value.status != 'available':
-            raise serializers.ValidationError("El asiento seleccionado no está disponible")
-        
         return value
 
+    def get_validators(self):
+        # la restricción de reserva activa por asiento se controla en validate()
+        # con la fila de inventario, sin una consulta aparte
+        return [
+            validator for validator in super().get_validators()
+            if not isinstance(validator, UniqueTogetherValidator)
+        ]
+
     def validate(self, data):
         """
         Validaciones cruzadas
         """
+        if not isinstance(self.parent, BulkListSerializer):
+            return self._resolve_references(data)
+
+        # en un lote las relaciones ya vienen resueltas y la disponibilidad
+        # se controla con una sola consulta (ReservationBulkSerializer)
         flight = data.get('flight')
         seat = data.get('seat')
-        
-        if flight and seat:
-            # Verificar que el asiento pertenezca al avión del vuelo
-            if seat.plane != flight.plane:
-                raise serializers.ValidationError(
-                    "El asiento seleccionado no pertenece al avión de este vuelo"
-                )
-            
-            # Verificar que el asiento no esté ya reservado en este vuelo
-            existing_reservation = Reservation.objects.filter(
-                flight=flight, 
-                seat=seat, 
-                status='reserved'
-            ).exclude(id=self.instance.id if self.instance else None)
-            
-            if existing_reservation.exists():
-                raise serializers.ValidationError(
-                    "El asiento ya está reservado en este vuelo"
-                )
-        
+        if flight and seat and seat.plane_id != flight.plane_id:
+            raise serializers.ValidationError(
+                "El asiento seleccionado no pertenece al avión de este vuelo"
+            )
+        return data
+
+    def _resolve_references(self, data):
+        """
+        Resuelve vuelo, asiento y pasajero en una sola consulta: la fila de
+        inventario del par vuelo/asiento trae ambos objetos (select_related),
+        su estado y un EXISTS del pasajero. El pasajero queda como
+        ``passenger_id`` y se carga recién si la respuesta lo necesita.
+        """
+        passenger_id = data.pop('passenger', None)
+        if 'flight' not in data and 'seat' not in data:
+            if passenger_id is not None:
+                if not Passenger.objects.filter(pk=passenger_id).exists():
+                    raise self.fields['passenger_id'].does_not_exist(passenger_id)
+                data['passenger_id'] = passenger_id
+            return data
+
+        flight_id = data.get('flight', getattr(self.instance, 'flight_id', None))
+        seat_id = data.get('seat', getattr(self.instance, 'seat_id', None))
+        # el avión del vuelo viene en el mismo JOIN: la respuesta lo necesita (total_seats)
+        inventory = FlightSeat.objects.select_related('flight__plane', 'seat').filter(
+            flight_id=flight_id, seat_id=seat_id
+        )
+        if passenger_id is not None:
+            inventory = inventory.annotate(
+                passenger_found=Exists(Passenger.objects.filter(pk=passenger_id))
+            )
+        row = inventory.first()
+        if row is None:
+            # no hay fila de inventario: solo en este caso se averigua el motivo
+            if not Flight.objects.filter(pk=flight_id).exists():
+                raise self.fields['flight_id'].does_not_exist(flight_id)
+            if not Seat.objects.filter(pk=seat_id).exists():
+                raise self.fields['seat_id'].does_not_exist(seat_id)
+            raise serializers.ValidationError(
+                "El asiento seleccionado no pertenece al avión de este vuelo"
+            )
+        if passenger_id is not None:
+            if not row.passenger_found:
+                raise self.fields['passenger_id'].does_not_exist(passenger_id)
+            data['passenger_id'] = passenger_id
+
+        # Verificar en el inventario del vuelo que el asiento siga libre
+        own_seat = self.instance is not None and row.reservation_id == self.instance.pk
+        if row.is_taken() and not own_seat:
+            raise serializers.ValidationError(
+                "El asiento ya está reservado en este vuelo"
+            )
+
+        data['flight'] = row.flight
+        data['seat'] = row.seat
         return data
 
     def create(self, validated_data):
         """
-        Crear reserva y actualizar estado del asiento
+        Crear reserva a través del motor de reservas (claim atómico del asiento)
         """
-        seat = validated_data['seat']
-        
-        # Crear la reserva
-        reservation = super().create(validated_data)
-        
-        # Actualizar estado del asiento
-        seat.status = 'reserved'
-        seat.save()
-        
-        return reservation
+        result = ReservationService.reserve(
+            flight=validated_data['flight'],
+            passenger=validated_data['passenger_id'],
+            seat=validated_data['seat'],
+            price=validated_data.get('price'),
+        )
+        if result.code == 'seat_taken':
+            raise SeatTakenError(result.error)
+        if not result.ok:
+            raise serializers.ValidationError(result.error)
+        return result.reservation
+
+    def create_many(self, validated_data):
+        """
+        Alta masiva (POST /api/reservations/bulk/): un claim por vuelo
+        """
+        result = ReservationService.reserve_many(validated_data)
+        if result.code == 'seat_taken':
+            raise SeatTakenError(result.error)
+        if not result.ok:
+            raise serializers.ValidationError(result.error)
+        return result.reservations
+
+
+class GroupReservationSerializer(serializers.Serializer):
+    """
+    Datos de entrada de una reserva grupal (N asientos contiguos)
+    """
+    MAX_GROUP_SIZE = 30
+
+    flight_id = serializers.PrimaryKeyRelatedField(
+        queryset=Flight.objects.all(),
+        source='flight',
+        help_text="ID del vuelo"
+    )
+    passenger_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=MAX_GROUP_SIZE,
+        help_text="IDs de los pasajeros, en el orden en que se asignan los asientos"
+    )
+    preference = serializers.ChoiceField(
+        choices=GROUP_PREFERENCES,
+        default='together',
+        help_text="together, window, aisle o any"
+    )
+
+    def validate_passenger_ids(self, value):
+        """
+        Validar todos los pasajeros con una sola consulta
+        """
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError("Hay pasajeros repetidos en el grupo")
+        passengers = Passenger.objects.in_bulk(value)
+        missing = [passenger_id for passenger_id in value if passenger_id not in passengers]
+        if missing:
+            raise serializers.ValidationError(f"Pasajeros inexistentes: {missing}")
+        self.passengers = [passengers[passenger_id] for passenger_id in value]
+        return value
+
+    def create(self, validated_data):
+        """
+        Reservar el bloque completo a través del motor de reservas
+        """
+        result = ReservationService.reserve_group(
+            flight=validated_data['flight'],
+            passengers=self.passengers,
+            preference=validated_data['preference'],
+        )
+        if result.code in ('seat_taken', 'no_block'):
+            raise SeatTakenError(result.error)
+        if not result.ok:
+            raise serializers.ValidationError(result.error)
+        return result.reservations
 
 # =============================================================================
 # SERIALIZER DE BOLETOS
 # =============================================================================
 
-class TicketSerializer(serializers.ModelSerializer):
+class TicketSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para el modelo Ticket
     """
@@ -356,7 +786,7 @@ class TicketSerializer(serializers.ModelSerializer):
         """
         Validar que la reserva esté confirmada
         """
-        if value.status != 'reserved':
+        if value.status not in ('reserved', 'confirmed'):
             raise serializers.ValidationError(
                 "Solo se pueden generar boletos para reservas confirmadas"
             )
@@ -379,11 +809,11 @@ class TicketSerializer(serializers.ModelSerializer):
         # Generar código único para el boleto
         barcode = str(uuid.uuid4()).replace('-', '').upper()[:20]
         
-        # Crear el boleto
-        ticket = Ticket.objects.create(
-            reservation=reservation,
-            barcode=barcode
-        )
+        # Crear el boleto (confirma la reserva si todavía es una retención)
+        try:
+            ticket = TicketService.issue(reservation, barcode=barcode)
+        except ValidationError as exc:
+            raise serializers.ValidationError({'reservation': exc.messages})
         
         return ticket
 
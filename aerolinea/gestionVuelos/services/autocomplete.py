@@ -0,0 +1,107 @@
+import threading
+from bisect import bisect_left
+from typing import List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from gestionVuelos.models import Airport, Flight
+from gestionVuelos.normalization import normalize_text
+
+# versión compartida del conjunto de ciudades; se incrementa al cambiar
+CITY_INDEX_VERSION_KEY = 'autocomplete:city_index_version'
+
+
+class CityIndex:
+    """
+    Arreglo ordenado de claves normalizadas (ciudad completa, cada palabra
+    desde la que puede empezar a tipearse y el código IATA) sobre el que
+    se busca por prefijo con bisect.
+    """
+
+    def __init__(self, cities):
+        # cities: [(ciudad para mostrar, código IATA o None)]
+        entries = set()
+        self.cities = sorted(set(cities), key=lambda city: normalize_text(city[0]))
+        self.names = [normalize_text(city) for city, _ in self.cities]
+        for position, (city, iata_code) in enumerate(self.cities):
+            words = self.names[position].split()
+            for start in range(len(words)):
+                entries.add((" ".join(words[start:]), position))
+            if iata_code:
+                entries.add((iata_code.casefold(), position))
+        self.entries = sorted(entries)
+        self.keys = [key for key, _ in self.entries]
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[dict]:
+        prefix = normalize_text(prefix)
+        if not prefix:
+            return []
+        seen, suggestions = set(), []
+        position = bisect_left(self.keys, prefix)
+        while position < len(self.keys) and self.keys[position].startswith(prefix):
+            city_position = self.entries[position][1]
+            if city_position not in seen:
+                seen.add(city_position)
+                suggestions.append(city_position)
+            position += 1
+        # primero las ciudades cuyo nombre completo empieza con el prefijo
+        suggestions.sort(key=lambda index: (not self.names[index].startswith(prefix), index))
+        return [
+            {'city': self.cities[index][0], 'iata_code': self.cities[index][1]}
+            for index in suggestions[:limit]
+        ]
+
+
+class AutocompleteService:
+    """
+    Sugerencias de origen/destino servidas desde un índice en memoria por
+    proceso; solo se consulta la base al reconstruirlo.
+
+    El índice se reconstruye cuando cambia la versión de la caché por
+    defecto, así que solo se conserva con ``settings.SHARED_CACHE``: con una
+    caché en memoria por proceso las ciudades que agrega otro worker no
+    llegarían nunca, y cada consulta arma el índice desde la base.
+    """
+
+    _index: Optional[CityIndex] = None
+    _version = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def build_index() -> CityIndex:
+        airports = {
+            city_normalized: (city, iata_code)
+            for city_normalized, city, iata_code in Airport.objects.values_list('city_normalized', 'city', 'iata_code')
+        }
+        cities = set(Flight.objects.values_list('origin', flat=True).distinct())
+        cities |= set(Flight.objects.values_list('destination', flat=True).distinct())
+        # una ciudad con aeropuerto se muestra con el nombre del aeropuerto
+        entries = {airports.get(normalize_text(city), (city.strip(), None)) for city in cities if city and city.strip()}
+        entries |= set(airports.values())
+        return CityIndex(entries)
+
+    @classmethod
+    def index(cls) -> CityIndex:
+        if not getattr(settings, 'SHARED_CACHE', False):
+            return cls.build_index()
+        version = cache.get(CITY_INDEX_VERSION_KEY, 0)
+        with cls._lock:
+            if cls._index is None or cls._version != version:
+                cls._index = cls.build_index()
+                cls._version = version
+            return cls._index
+
+    @staticmethod
+    def cities_changed() -> None:
+        if not getattr(settings, 'SHARED_CACHE', False):
+            return
+        try:
+            cache.incr(CITY_INDEX_VERSION_KEY)
+        except ValueError:
+            if not cache.add(CITY_INDEX_VERSION_KEY, 1, None):
+                cache.incr(CITY_INDEX_VERSION_KEY)
+
+    @staticmethod
+    def suggest(prefix: str, limit: int = 10) -> List[dict]:
+        return AutocompleteService.index().suggest(prefix, limit)
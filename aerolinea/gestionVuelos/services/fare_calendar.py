@@ -0,0 +1,118 @@
+from datetime import date, datetime
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.text import slugify
+
+from gestionVuelos.models import Airport, Flight
+from gestionVuelos.normalization import normalize_text
+from gestionVuelos.services.flights import FlightService
+
+# las tarifas se invalidan al guardar vuelos; los asientos libres cambian con
+# cada reserva, así que la entrada además vence sola a los pocos minutos
+FARE_CALENDAR_CACHE_TIMEOUT = 60 * 5
+
+
+def _month_bounds(month: date):
+    start = timezone.make_aware(datetime(month.year, month.month, 1))
+    next_month = (month.year + month.month // 12, month.month % 12 + 1)
+    end = timezone.make_aware(datetime(next_month[0], next_month[1], 1))
+    return start, end
+
+
+class FareCalendarService:
+    """
+    Tarifa mínima y asientos libres por día de salida para una ruta,
+    calculados con una única consulta agrupada por fecha.
+
+    Los meses solo se cachean con ``settings.SHARED_CACHE``: con una caché
+    en memoria por proceso la invalidación de un worker no llegaría a los
+    demás, que seguirían sirviendo tarifas de vuelos ya modificados.
+    """
+
+    @staticmethod
+    def cache_key(origin_key: str, destination_key: str, month: date) -> str:
+        return f"farecalendar:{slugify(origin_key)}:{slugify(destination_key)}:{month:%Y-%m}"
+
+    @staticmethod
+    def _route_key(origin: str, destination: str) -> Optional[tuple]:
+        # solo se cachean rutas que resuelven a una ciudad de cada lado
+        origin_keys = Airport.objects.city_keys(origin)
+        destination_keys = Airport.objects.city_keys(destination)
+        if len(origin_keys) == 1 and len(destination_keys) == 1:
+            return origin_keys[0], destination_keys[0]
+        return None
+
+    @staticmethod
+    def build(origin: str, destination: str, month: date) -> List[dict]:
+        start, end = _month_bounds(month)
+        flights = FlightService.search(origin=origin, destination=destination).filter(
+            departure_time__gte=start, departure_time__lt=end
+        ).exclude(status__in=Flight.CLOSED_STATUSES)
+        rows = (
+            flights.annotate(day=TruncDate('departure_time', tzinfo=timezone.get_current_timezone()))
+            .values('day')
+            .annotate(
+                min_price=Min('base_price', filter=Q(available_count__gt=0)),
+                available_seats=Sum('available_count'),
+                flights=Count('id'),
+            )
+            .order_by('day')
+        )
+        return [
+            {
+                'date': row['day'],
+                'min_price': row['min_price'],
+                'available_seats': row['available_seats'],
+                'flights': row['flights'],
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def _cached() -> bool:
+        return getattr(settings, 'SHARED_CACHE', False)
+
+    @staticmethod
+    def get(origin: str, destination: str, month: date) -> List[dict]:
+        if not FareCalendarService._cached():
+            return FareCalendarService.build(origin, destination, month)
+        route = FareCalendarService._route_key(origin, destination)
+        if route is None:
+            return FareCalendarService.build(origin, destination, month)
+        key = FareCalendarService.cache_key(*route, month)
+        days = cache.get(key)
+        if days is None:
+            days = FareCalendarService.build(origin, destination, month)
+            cache.set(key, days, FARE_CALENDAR_CACHE_TIMEOUT)
+        return days
+
+    @staticmethod
+    def invalidate(origin: str, destination: str, departure_time: datetime) -> None:
+        """
+        Descarta el mes cacheado de la ruta de un vuelo que cambió.
+        """
+        if not FareCalendarService._cached():
+            return
+        cache.delete(FareCalendarService._flight_key(origin, destination, departure_time))
+
+    @staticmethod
+    def invalidate_many(flights: Iterable[Flight]) -> None:
+        """
+        Como invalidate() para un lote de vuelos, con un solo delete_many.
+        """
+        if not FareCalendarService._cached():
+            return
+        cache.delete_many({
+            FareCalendarService._flight_key(flight.origin, flight.destination, flight.departure_time)
+            for flight in flights
+        })
+
+    @staticmethod
+    def _flight_key(origin: str, destination: str, departure_time: datetime) -> str:
+        month = timezone.localtime(departure_time).date() if timezone.is_aware(departure_time) else departure_time.date()
+        return FareCalendarService.cache_key(normalize_text(origin), normalize_text(destination), month)
@@ -0,0 +1,127 @@
+from typing import Iterable, List
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.query import QuerySet
+
+from gestionVuelos.models import Flight, FlightSeat, Plane, Seat
+from gestionVuelos.seat_bitmap import SEAT_COLUMNS, seat_index
+from gestionVuelos.services.seat_inventory import SeatInventoryService
+from gestionVuelos.services.seat_map import SeatMapService
+
+# tipo de asiento según la columna (cabina de pasillo único, 3-3)
+SEAT_TYPES = {
+    'A': 'window',
+    'B': 'middle',
+    'C': 'aisle',
+    'D': 'aisle',
+    'E': 'middle',
+    'F': 'window',
+}
+
+FLEET_BATCH_SIZE = 500
+
+
+class FleetService:
+    """
+    Alta masiva de aviones y de sus mapas de asientos con bulk_create:
+    la cantidad de consultas depende de los lotes, no de los asientos.
+    """
+
+    @staticmethod
+    def build_seat_map(plane: Plane, skip_numbers: Iterable[str] = ()) -> List[Seat]:
+        """
+        Arma (sin guardar) los asientos del avión según su capacidad, en el
+        orden fila/columna del mapa de bits. ``seat_index`` se calcula acá
+        porque bulk_create no pasa por Seat.save().
+        """
+        skip_numbers = set(skip_numbers)
+        seats = []
+        for position in range(plane.capacity):
+            row, column = position // len(SEAT_COLUMNS) + 1, SEAT_COLUMNS[position % len(SEAT_COLUMNS)]
+            number = f"{row}{column}"
+            if number in skip_numbers:
+                continue
+            seats.append(Seat(
+                plane=plane,
+                number=number,
+                row=row,
+                column=column,
+                seat_type=SEAT_TYPES[column],
+                status='available',
+                seat_index=seat_index(row, column),
+            ))
+        return seats
+
+    @staticmethod
+    def seats_beyond_capacity(plane: Plane, capacity: int | None = None) -> QuerySet[Seat]:
+        """
+        Asientos del layout que quedan fuera de ``capacity`` (por defecto la
+        del avión). Los asientos fuera de la grilla A-F no se tocan.
+        """
+        capacity = plane.capacity if capacity is None else capacity
+        return Seat.objects.filter(plane=plane, seat_index__gte=capacity)
+
+    @staticmethod
+    def reduction_blocked(plane: Plane, capacity: int) -> bool:
+        """
+        True si bajar la capacidad quitaría asientos con reservas (de
+        cualquier estado: borrar el asiento borraría también la reserva).
+        """
+        return FleetService.seats_beyond_capacity(plane, capacity).filter(reservations__isnull=False).exists()
+
+    @staticmethod
+    def generate_seat_map(plane: Plane, batch_size: int = FLEET_BATCH_SIZE) -> int:
+        """
+        Ajusta los asientos del avión a su capacidad: quita los que sobran
+        (ValidationError si alguno tiene reservas) y crea los que faltan; si
+        ya opera vuelos, sincroniza su inventario. Devuelve la cantidad creada.
+        """
+        with transaction.atomic():
+            if FleetService.reduction_blocked(plane, plane.capacity):
+                raise ValidationError({
+                    'capacity': "No se puede reducir la capacidad: hay reservas en los asientos que se quitarían"
+                })
+            # un DELETE por tabla: las señales de cada asiento recalcularían
+            # inventario y layout de todos los vuelos una vez por asiento
+            removed = list(FleetService.seats_beyond_capacity(plane).values_list('id', flat=True))
+            if removed:
+                FlightSeat.objects.filter(seat_id__in=removed).delete()
+                Seat.objects.filter(id__in=removed).delete_rows()
+            existing = Seat.objects.filter(plane=plane).values_list('number', flat=True)
+            seats = FleetService.build_seat_map(plane, skip_numbers=existing)
+            Seat.objects.bulk_create(seats, batch_size=batch_size)
+            # ni los asientos nuevos ni los borrados pasan por las señales de Seat
+            if seats or removed:
+                SeatMapService.bump_layout(plane.pk)
+                plane.refresh_from_db(fields=['layout_version'])
+                for flight in Flight.objects.filter(plane=plane):
+                    SeatInventoryService.sync_flight(flight)
+        return len(seats)
+
+    @staticmethod
+    def onboard(planes: Iterable[dict], batch_size: int = FLEET_BATCH_SIZE) -> List[Plane]:
+        """
+        Da de alta varios aviones (dicts con model, manufacturer y capacity)
+        y genera todos sus asientos en una sola transacción.
+        """
+        instances = [Plane(**data) for data in planes]
+        for plane in instances:
+            plane.full_clean()
+        with transaction.atomic():
+            Plane.objects.bulk_create(instances, batch_size=batch_size)
+            seats = [seat for plane in instances for seat in FleetService.build_seat_map(plane)]
+            Seat.objects.bulk_create(seats, batch_size=batch_size)
+        return instances
+
+    @staticmethod
+    def onboard_plane(
+        model: str,
+        manufacturer: str,
+        capacity: int,
+        batch_size: int = FLEET_BATCH_SIZE,
+    ) -> Plane:
+        return FleetService.onboard(
+            [{'model': model, 'manufacturer': manufacturer, 'capacity': capacity}],
+            batch_size=batch_size,
+        )[0]
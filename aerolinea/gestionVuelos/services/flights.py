@@ -1,9 +1,21 @@
+from datetime import date, datetime, time, timedelta
 from typing import List, Optional
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.query import QuerySet
+from django.dispatch import Signal
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 
-from gestionVuelos.models import Flight, Plane
+from gestionVuelos.models import Airport, Flight, FlightSeat, Plane, Seat
+from gestionVuelos.normalization import normalize_text
 from gestionVuelos.repositories.flights import FlightRepository
 
+FLIGHT_BATCH_SIZE = 500
+
+# bulk_create no emite post_save: los receptores (signals.py) reciben el lote completo
+flights_bulk_created = Signal()
+
 class FlightService:
 
     @staticmethod
@@ -14,6 +26,57 @@ class FlightService:
     def get_by_id(flight_id: int) -> Optional[Flight]:
         return FlightRepository.get_by_id(flight_id)
 
+    @staticmethod
+    def search(
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        departure_date: Optional[date] = None,
+        queryset: Optional[QuerySet] = None,
+    ) -> QuerySet:
+        """
+        Búsqueda por par de ciudades (código IATA o nombre, sin importar
+        acentos) y día de salida, resuelta sobre el índice
+        (origin_airport, destination_airport, departure_time).
+        """
+        queryset = Flight.objects.all() if queryset is None else queryset
+        if origin:
+            queryset = queryset.filter(FlightService._city_filter('origin', origin))
+        if destination:
+            queryset = queryset.filter(FlightService._city_filter('destination', destination))
+        if departure_date:
+            # rango semiabierto [00:00, 00:00 del día siguiente) en lugar de __date
+            start = timezone.make_aware(datetime.combine(departure_date, time.min))
+            end = timezone.make_aware(datetime.combine(departure_date + timedelta(days=1), time.min))
+            queryset = queryset.filter(departure_time__gte=start, departure_time__lt=end)
+        return queryset
+
+    @staticmethod
+    def _city_filter(field: str, query: str) -> Q:
+        # la tabla de aeropuertos es chica: se resuelve primero a ids
+        airport_ids = list(Airport.objects.matching(query).values_list('id', flat=True))
+        if airport_ids:
+            return Q(**{f'{field}_airport_id__in': airport_ids})
+        # ciudades sin aeropuerto cargado: búsqueda por texto libre
+        return Q(**{f'{field}__icontains': query})
+
+    @staticmethod
+    def link_airport(airport: Airport) -> int:
+        """
+        Asigna el aeropuerto a los vuelos de su ciudad que se cargaron antes
+        que él y quedaron sin aeropuerto: la búsqueda filtra por el aeropuerto
+        apenas existe uno, así que sin esto esos vuelos desaparecerían.
+        """
+        linked = 0
+        for field in ('origin', 'destination'):
+            orphans = Flight.objects.filter(**{f'{field}_airport__isnull': True})
+            cities = [
+                city for city in orphans.values_list(field, flat=True).distinct()
+                if normalize_text(city) == airport.city_normalized
+            ]
+            if cities:
+                linked += orphans.filter(**{f'{field}__in': cities}).update(**{f'{field}_airport': airport})
+        return linked
+
     @staticmethod
     def create(
         plane_id: int,
@@ -36,10 +99,50 @@ class FlightService:
             status=status,
             base_price=base_price
         )
-        flight.full_clean()
         flight.save()
         return flight
 
+    @staticmethod
+    def bulk_create(flights: List[Flight], batch_size: int = FLIGHT_BATCH_SIZE) -> List[Flight]:
+        """
+        Alta masiva de vuelos ya validados: aeropuertos y asientos leídos con
+        una consulta cada uno, un bulk_create de vuelos y otro del inventario.
+        """
+        cities = {normalize_text(city) for flight in flights for city in (flight.origin, flight.destination)}
+        airports = {}
+        # como Airport.objects.for_city(): gana el aeropuerto de menor id
+        for airport_id, city in Airport.objects.filter(city_normalized__in=cities).order_by('-id').values_list(
+            'id', 'city_normalized'
+        ):
+            airports[city] = airport_id
+        seats = {}
+        for plane_id, seat_id in Seat.objects.filter(
+            plane_id__in={flight.plane_id for flight in flights}
+        ).values_list('plane_id', 'id'):
+            seats.setdefault(plane_id, []).append(seat_id)
+
+        for flight in flights:
+            flight.origin_airport_id = airports.get(normalize_text(flight.origin))
+            flight.destination_airport_id = airports.get(normalize_text(flight.destination))
+            flight.available_count = len(seats.get(flight.plane_id, ()))
+
+        with transaction.atomic():
+            Flight.objects.bulk_create(flights, batch_size=batch_size)
+            FlightSeat.objects.bulk_create(
+                [
+                    FlightSeat(flight=flight, seat_id=seat_id)
+                    for flight in flights
+                    for seat_id in seats.get(flight.plane_id, ())
+                ],
+                batch_size=batch_size,
+            )
+            flights_bulk_created.send(sender=Flight, flights=flights)
+
+        for flight in flights:
+            flight._loaded_route = (flight.origin, flight.destination)
+            flight._loaded_departure = (flight.origin, flight.destination, flight.departure_time)
+        return flights
+
     @staticmethod
     def update(
         flight_id: int,
@@ -65,7 +168,6 @@ class FlightService:
             flight.duration = duration
             flight.status = status
             flight.base_price = base_price
-            flight.full_clean()
             flight.save()
             return True
         except Flight.DoesNotExist:
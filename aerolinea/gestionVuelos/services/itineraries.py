@@ -0,0 +1,345 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from gestionVuelos.models import Airport, Flight
+from gestionVuelos.normalization import normalize_text
+
+DEFAULT_MIN_CONNECTION = timedelta(minutes=45)
+DEFAULT_MAX_CONNECTION = timedelta(hours=6)
+MAX_STOPS = 2
+
+# versión compartida del horario y, por versión, los IDs de los vuelos que
+# cambiaron: los demás procesos releen solo esos vuelos en vez del horario
+SCHEDULE_VERSION_KEY = 'itineraries:schedule_version'
+SCHEDULE_DELTA_KEY = 'itineraries:delta:{}'
+SCHEDULE_DELTA_TIMEOUT = 60 * 60
+# con más cambios pendientes conviene reconstruir el grafo
+MAX_SCHEDULE_DELTAS = 500
+
+
+class Leg(NamedTuple):
+    id: int
+    origin: str
+    destination: str
+    origin_key: str
+    destination_key: str
+    departure_time: datetime
+    arrival_time: datetime
+    base_price: Decimal
+
+
+def city_key(city: str) -> str:
+    return normalize_text(city)
+
+
+class ConnectionGraph:
+    """
+    Grafo expandido en el tiempo del horario de vuelos: para cada ciudad,
+    las salidas ordenadas por hora. Esperar en una ciudad es avanzar en esa
+    lista, y tomar un vuelo es saltar a la lista de su destino a partir de
+    la hora de llegada más el tiempo de conexión.
+    """
+
+    def __init__(self, legs: Iterable[Leg] = ()):
+        self.legs: Dict[int, Leg] = {}
+        # ciudad -> [(salida, id)] y (origen, destino) -> [(salida, id)]
+        self.departures: Dict[str, List[Tuple[datetime, int]]] = {}
+        self.route_departures: Dict[Tuple[str, str], List[Tuple[datetime, int]]] = {}
+        for leg in legs:
+            self.add(leg)
+
+    def add(self, leg: Leg) -> None:
+        self.remove(leg.id)
+        self.legs[leg.id] = leg
+        entry = (leg.departure_time, leg.id)
+        insort(self.departures.setdefault(leg.origin_key, []), entry)
+        insort(self.route_departures.setdefault((leg.origin_key, leg.destination_key), []), entry)
+
+    def remove(self, flight_id: int) -> None:
+        leg = self.legs.pop(flight_id, None)
+        if leg is None:
+            return
+        entry = (leg.departure_time, leg.id)
+        for index in (self.departures[leg.origin_key], self.route_departures[(leg.origin_key, leg.destination_key)]):
+            position = bisect_left(index, entry)
+            if position < len(index) and index[position] == entry:
+                del index[position]
+
+    @staticmethod
+    def _between(index: List[Tuple[datetime, int]], start: datetime, end: datetime):
+        position = bisect_left(index, (start, 0))
+        while position < len(index) and index[position][0] < end:
+            yield index[position][1]
+            position += 1
+
+    def departing(self, key: str, start: datetime, end: datetime, to_key: Optional[str] = None) -> List[Leg]:
+        index = self.departures.get(key, []) if to_key is None else self.route_departures.get((key, to_key), [])
+        return [self.legs[flight_id] for flight_id in self._between(index, start, end)]
+
+    def itineraries(
+        self,
+        origin_keys: Iterable[str],
+        destination_keys: Iterable[str],
+        start: datetime,
+        end: datetime,
+        max_stops: int = MAX_STOPS,
+        min_connection: timedelta = DEFAULT_MIN_CONNECTION,
+        max_connection: timedelta = DEFAULT_MAX_CONNECTION,
+    ) -> List[List[Leg]]:
+        """
+        Itinerarios que salen de alguna ciudad de origen en [start, end) y
+        llegan a alguna de destino con hasta ``max_stops`` escalas.
+        """
+        destination_keys = set(destination_keys)
+        results = []
+
+        def extend(path: List[Leg], visited: set):
+            last = path[-1]
+            if last.destination_key in destination_keys:
+                results.append(path)
+                return
+            stops_left = max_stops - (len(path) - 1)
+            if stops_left <= 0:
+                return
+            window = (last.arrival_time + min_connection, last.arrival_time + max_connection)
+            if stops_left == 1:
+                # último tramo: solo vuelos directos al destino (índice por ruta)
+                candidates = [
+                    leg for key in destination_keys
+                    for leg in self.departing(last.destination_key, *window, to_key=key)
+                ]
+            else:
+                candidates = self.departing(last.destination_key, *window)
+            for leg in candidates:
+                if leg.destination_key not in visited:
+                    extend(path + [leg], visited | {leg.destination_key})
+
+        for origin_key in set(origin_keys):
+            for leg in self.departing(origin_key, start, end):
+                if leg.destination_key != origin_key:
+                    extend([leg], {origin_key, leg.destination_key})
+
+        results.sort(key=lambda path: (path[-1].arrival_time, len(path), path[0].departure_time))
+        return results
+
+
+def _leg_from_row(flight_id, origin, destination, departure_time, arrival_time, base_price) -> Leg:
+    return Leg(
+        flight_id, origin, destination, city_key(origin), city_key(destination),
+        departure_time, arrival_time, base_price,
+    )
+
+
+_LEG_FIELDS = ('id', 'origin', 'destination', 'departure_time', 'arrival_time', 'base_price')
+
+
+class ItineraryService:
+    """
+    Búsqueda de conexiones sobre un grafo en memoria por proceso, armado
+    con una sola consulta y actualizado vuelo a vuelo por las señales. El
+    proceso que escribe aplica el cambio en memoria; los demás lo ven en la
+    versión compartida y releen solo los vuelos de las versiones que les
+    faltan. Se reconstruye si falta algún cambio en la caché o son muchos.
+
+    La versión y los cambios viven en la caché por defecto, así que el grafo
+    solo se conserva entre búsquedas con ``settings.SHARED_CACHE``: con una
+    caché en memoria por proceso otro worker no vería la versión nueva y
+    buscaría sobre un horario viejo, así que cada búsqueda arma el suyo.
+    """
+
+    _graph: Optional[ConnectionGraph] = None
+    _version = None
+    _lock = threading.RLock()
+
+    @staticmethod
+    def build_graph(now: Optional[datetime] = None) -> ConnectionGraph:
+        now = now or timezone.now()
+        rows = (
+            Flight.objects.filter(arrival_time__gte=now)
+            .exclude(status__in=Flight.CLOSED_STATUSES)
+            .values_list(*_LEG_FIELDS)
+        )
+        return ConnectionGraph(_leg_from_row(*row) for row in rows.iterator(chunk_size=2000))
+
+    @staticmethod
+    def _current_version() -> int:
+        version = cache.get(SCHEDULE_VERSION_KEY)
+        if version is None:
+            # arranca de un valor que no repite ninguna versión con cambios guardados
+            cache.add(SCHEDULE_VERSION_KEY, time.time_ns() // 1000, None)
+            version = cache.get(SCHEDULE_VERSION_KEY)
+        return version
+
+    @staticmethod
+    def _shared() -> bool:
+        return getattr(settings, 'SHARED_CACHE', False)
+
+    @classmethod
+    def graph(cls) -> ConnectionGraph:
+        if not cls._shared():
+            return cls.build_graph()
+        version = cls._current_version()
+        with cls._lock:
+            if cls._graph is None or (cls._version != version and not cls._catch_up(version)):
+                cls._graph = cls.build_graph()
+                cls._version = version
+            return cls._graph
+
+    @classmethod
+    def _catch_up(cls, version: int) -> bool:
+        """
+        Lleva el grafo de este proceso a ``version`` releyendo en una consulta
+        los vuelos que cambiaron en las versiones intermedias. False si hay
+        que reconstruirlo (cambios vencidos en la caché o demasiados).
+        """
+        if cls._graph is None or cls._version is None:
+            return False
+        if not 0 <= version - cls._version <= MAX_SCHEDULE_DELTAS:
+            return False
+        keys = [SCHEDULE_DELTA_KEY.format(pending) for pending in range(cls._version + 1, version + 1)]
+        deltas = cache.get_many(keys)
+        if len(deltas) != len(keys):
+            return False
+        flight_ids = {flight_id for changed in deltas.values() for flight_id in changed}
+        if flight_ids:
+            rows = {
+                row[0]: row
+                for row in Flight.objects.filter(id__in=flight_ids)
+                .exclude(status__in=Flight.CLOSED_STATUSES)
+                .values_list(*_LEG_FIELDS)
+            }
+            for flight_id in flight_ids:
+                if flight_id in rows:
+                    cls._graph.add(_leg_from_row(*rows[flight_id]))
+                else:
+                    cls._graph.remove(flight_id)
+        cls._version = version
+        return True
+
+    @classmethod
+    def invalidate(cls) -> None:
+        with cls._lock:
+            cls._graph = None
+
+    @classmethod
+    def _bump_version(cls, flight_ids: Iterable[int]) -> int:
+        """
+        Sube la versión del horario y guarda qué vuelos cambiaron en ella.
+        """
+        try:
+            version = cache.incr(SCHEDULE_VERSION_KEY)
+        except ValueError:
+            # la clave se perdió: nadie puede tener un grafo al día
+            version = cls._current_version()
+        cache.set(SCHEDULE_DELTA_KEY.format(version), list(flight_ids), SCHEDULE_DELTA_TIMEOUT)
+        return version
+
+    @classmethod
+    def flight_changed(cls, flight: Flight) -> None:
+        """
+        Aplica el cambio de un vuelo al grafo de este proceso y avisa al
+        resto con la versión compartida.
+        """
+        cls.flights_changed([flight])
+
+    @classmethod
+    def flights_changed(cls, flights: Iterable[Flight]) -> None:
+        """
+        Como flight_changed() para un lote (p. ej. un alta masiva), con un
+        solo cambio de versión.
+        """
+        if not cls._shared():
+            return
+        flights = list(flights)
+        with cls._lock:
+            version = cls._bump_version([flight.pk for flight in flights])
+            if cls._graph is None:
+                return
+            if cls._version != version - 1 and not cls._catch_up(version - 1):
+                # otro proceso cambió el horario y no se pudo ponerse al día
+                cls._graph = None
+                return
+            for flight in flights:
+                if flight.status in Flight.CLOSED_STATUSES:
+                    cls._graph.remove(flight.pk)
+                else:
+                    cls._graph.add(_leg_from_row(
+                        flight.pk, flight.origin, flight.destination,
+                        flight.departure_time, flight.arrival_time, flight.base_price,
+                    ))
+            cls._version = version
+
+    @classmethod
+    def flight_deleted(cls, flight_id: int) -> None:
+        if not cls._shared():
+            return
+        with cls._lock:
+            version = cls._bump_version([flight_id])
+            if cls._graph is None:
+                return
+            if cls._version != version - 1 and not cls._catch_up(version - 1):
+                cls._graph = None
+                return
+            cls._graph.remove(flight_id)
+            cls._version = version
+
+    @staticmethod
+    def search(
+        origin: str,
+        destination: str,
+        start: datetime,
+        end: datetime,
+        max_stops: int = MAX_STOPS,
+        min_connection: timedelta = DEFAULT_MIN_CONNECTION,
+        max_connection: timedelta = DEFAULT_MAX_CONNECTION,
+        limit: int = 20,
+    ) -> List[dict]:
+        graph = ItineraryService.graph()
+        paths = graph.itineraries(
+            Airport.objects.city_keys(origin),
+            Airport.objects.city_keys(destination),
+            start,
+            end,
+            max_stops=max_stops,
+            min_connection=min_connection,
+            max_connection=max_connection,
+        )
+
+        # la disponibilidad cambia con cada reserva: se lee al responder, en una consulta
+        flight_ids = {leg.id for path in paths for leg in path}
+        seats = dict(Flight.objects.filter(id__in=flight_ids).values_list('id', 'available_count'))
+
+        itineraries = []
+        for path in paths:
+            if any(not seats.get(leg.id) for leg in path):
+                continue
+            itineraries.append({
+                'stops': len(path) - 1,
+                'departure_time': path[0].departure_time,
+                'arrival_time': path[-1].arrival_time,
+                'total_duration': path[-1].arrival_time - path[0].departure_time,
+                'total_price': sum((leg.base_price for leg in path), Decimal('0')),
+                'legs': [
+                    {
+                        'flight_id': leg.id,
+                        'origin': leg.origin,
+                        'destination': leg.destination,
+                        'departure_time': leg.departure_time,
+                        'arrival_time': leg.arrival_time,
+                        'base_price': leg.base_price,
+                        'available_seats': seats[leg.id],
+                    }
+                    for leg in path
+                ],
+            })
+            if len(itineraries) >= limit:
+                break
+        return itineraries
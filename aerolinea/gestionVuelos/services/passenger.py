@@ -1,4 +1,5 @@
 from typing import List, Optional
+from django.db import transaction
 from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 
@@ -46,6 +47,15 @@ class PassengerService:
         passenger.save()
         return passenger
 
+    @staticmethod
+    def bulk_create(passengers: List[Passenger], batch_size: int = 500) -> List[Passenger]:
+        """
+        Alta masiva de pasajeros ya validados (la unicidad del documento se
+        controla por lote en el serializer) en una sola transacción.
+        """
+        with transaction.atomic():
+            return Passenger.objects.bulk_create(passengers, batch_size=batch_size)
+
     @staticmethod
     def update(
         passenger_id: int,
@@ -1,6 +1,8 @@
 from typing import List, Optional
+from django.db import transaction
 from gestionVuelos.models import Plane
 from gestionVuelos.repositories.planes import PlaneRepository
+from gestionVuelos.services.fleet import FleetService
 
 class PlaneService:
 
@@ -15,34 +17,35 @@ class PlaneService:
     @staticmethod
     def create(
         model: str,
-        capacity: int,
-        available_seats: int
+        manufacturer: str,
+        capacity: int
     ) -> Plane:
-        plane = Plane(
+        # el avión se crea junto con su mapa de asientos
+        return FleetService.onboard_plane(
             model=model,
-            capacity=capacity,
-            available_seats=available_seats
+            manufacturer=manufacturer,
+            capacity=capacity
         )
-        plane.full_clean()
-        plane.save()
-        return plane
 
     @staticmethod
     def update(
         plane_id: int,
         model: str,
-        capacity: int,
-        available_seats: int
+        manufacturer: str,
+        capacity: int
     ) -> bool:
         try:
             plane = PlaneRepository.get_by_id(plane_id)
             if not plane:
                 return False
             plane.model = model
+            plane.manufacturer = manufacturer
             plane.capacity = capacity
-            plane.available_seats = available_seats
             plane.full_clean()
-            plane.save()
+            # si la reducción de capacidad se rechaza, el avión no cambia
+            with transaction.atomic():
+                plane.save()
+                FleetService.generate_seat_map(plane)
             return True
         except Plane.DoesNotExist:
             return False
@@ -1,10 +1,111 @@
-from typing import List
+import random
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Union
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.db import IntegrityError, OperationalError, transaction
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 
-from gestionVuelos.models import Flight, Passenger, Reservation, Seat
+from gestionVuelos.models import Flight, FlightSeat, Passenger, Reservation, Seat
 from gestionVuelos.repositories.reservations import ReservationRepository
+from gestionVuelos.seat_blocks import find_seat_block
+from gestionVuelos.services.seat_inventory import (
+    SeatInventoryConflict,
+    SeatInventoryService,
+    SeatUnavailable,
+    hold_ttl,
+)
 from decimal import Decimal
 
+# reintentos ante contención de la base (p. ej. "database is locked" en SQLite)
+RESERVATION_MAX_RETRIES = 5
+RESERVATION_RETRY_BACKOFF = 0.05
+
+# por qué no se pudo confirmar o cancelar, según el estado en que está la reserva
+TRANSITION_ERRORS = {
+    'expired': "La retención de la reserva ya venció",
+    'cancelled': "La reserva ya está cancelada",
+    'confirmed': "La reserva ya está confirmada",
+}
+
+
+@dataclass
+class ReservationResult:
+    """
+    Resultado del motor de reservas. ``code`` es 'ok', 'seat_taken',
+    'no_block', 'invalid' o 'busy'.
+    """
+    reservation: Optional[Reservation] = None
+    code: str = 'ok'
+    error: str = ''
+    # reservas creadas por una reserva grupal
+    reservations: List[Reservation] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.code == 'ok'
+
+
+def _is_seat_taken(exc: ValidationError) -> bool:
+    errors = exc.error_dict.get(NON_FIELD_ERRORS, []) if hasattr(exc, 'error_dict') else exc.error_list
+    return any(error.code == 'seat_taken' for error in errors)
+
+
+def _run_with_retries(operation):
+    """
+    Ejecuta ``operation`` en su propia transacción, reintentando con
+    backoff cuando la base está bloqueada o el mapa de bits no converge.
+    """
+    for attempt in range(RESERVATION_MAX_RETRIES):
+        try:
+            with transaction.atomic():
+                return operation()
+        except (OperationalError, SeatInventoryConflict):
+            if transaction.get_connection().in_atomic_block:
+                # dentro de una transacción externa no podemos reintentar
+                raise
+            time.sleep(RESERVATION_RETRY_BACKOFF * (2 ** attempt) * random.random())
+    return ReservationResult(code='busy', error="El sistema está ocupado, intente nuevamente")
+
+
+def _claim_block(flight: Flight, passengers, seats, prices) -> List[Reservation]:
+    """
+    Toma los asientos ``seats`` (con id y seat_index) del vuelo para los
+    pasajeros, en orden: un UPDATE condicional, un CAS de N bits, un
+    bulk_create y un bulk_update. SeatUnavailable si alguno ya estaba tomado.
+    """
+    seat_ids = [seat.id for seat in seats]
+    claimed = FlightSeat.objects.filter(
+        flight=flight, seat_id__in=seat_ids, status='available', reservation__isnull=True
+    ).update(status='reserved', hold_expires_at=timezone.now() + hold_ttl())
+    if claimed != len(seat_ids):
+        raise SeatUnavailable("Alguno de los asientos ya está tomado")
+    bitmap = SeatInventoryService.claim_seats(flight.pk, [seat.seat_index for seat in seats])
+    if bitmap is None:
+        raise SeatUnavailable("Alguno de los asientos ya está tomado")
+
+    reservations = Reservation.objects.bulk_create([
+        Reservation(
+            flight=flight,
+            passenger=passenger,
+            seat_id=seat.id,
+            status='reserved',
+            price=price,
+            reservation_code=Reservation.new_reservation_code(),
+        )
+        for passenger, seat, price in zip(passengers, seats, prices)
+    ])
+    rows = list(FlightSeat.objects.filter(flight=flight, seat_id__in=seat_ids).only('id', 'seat_id'))
+    reservation_by_seat = {reservation.seat_id: reservation for reservation in reservations}
+    for row in rows:
+        row.reservation = reservation_by_seat[row.seat_id]
+    FlightSeat.objects.bulk_update(rows, ['reservation'])
+
+    flight.seat_bitmap = bitmap
+    flight.refresh_from_db(fields=['reserved_count', 'available_count'])
+    return reservations
+
 
 class ReservationService:
     """
@@ -18,6 +119,170 @@ class ReservationService:
     @staticmethod
     def get_all():
         return list(ReservationRepository.get_all())
+
+    @staticmethod
+    def reserve(
+        flight: Flight,
+        passenger: Union[Passenger, int],
+        seat: Seat,
+        price: Optional[Decimal] = None,
+        confirm: bool = False,
+    ) -> ReservationResult:
+        """
+        Reserva un asiento de un vuelo sin lecturas previas: el INSERT (con su
+        restricción única parcial) y el UPDATE condicional del inventario deciden
+        quién se queda con el asiento dentro de la misma transacción.
+        ``passenger`` puede ser el ID ya validado (la API no lo carga).
+        Con ``confirm`` la reserva nace confirmada, sin retención que venza
+        (la web no tiene un paso de confirmación aparte).
+        """
+        if seat.plane_id != flight.plane_id:
+            return ReservationResult(
+                code='invalid',
+                error="El asiento seleccionado no pertenece al avión de este vuelo",
+            )
+
+        def claim():
+            # una retención vencida sobre este asiento no debe bloquear la venta
+            SeatInventoryService.release_expired_holds(flight_id=flight.pk, seat_id=seat.pk)
+            reservation = Reservation(
+                flight=flight,
+                seat=seat,
+                status='confirmed' if confirm else 'reserved',
+                price=flight.base_price if price is None else price,
+            )
+            if isinstance(passenger, Passenger):
+                reservation.passenger = passenger
+            else:
+                reservation.passenger_id = passenger
+            reservation.save()
+            return ReservationResult(reservation=reservation)
+
+        try:
+            return _run_with_retries(claim)
+        except (IntegrityError, SeatUnavailable):
+            return ReservationResult(code='seat_taken', error="El asiento ya está reservado en este vuelo")
+        except ValidationError as exc:
+            if _is_seat_taken(exc):
+                return ReservationResult(code='seat_taken', error="El asiento ya está reservado en este vuelo")
+            return ReservationResult(code='invalid', error="; ".join(exc.messages))
+
+    @staticmethod
+    def reserve_group(
+        flight: Flight,
+        passengers: List[Passenger],
+        preference: str = 'together',
+        price: Optional[Decimal] = None,
+    ) -> ReservationResult:
+        """
+        Reserva un bloque de asientos contiguos para varios pasajeros en una
+        sola transacción: una lectura del inventario libre, un UPDATE
+        condicional sobre el bloque, un CAS de N bits y un bulk_create.
+        Si otra reserva gana algún asiento del bloque se vuelve a buscar.
+        """
+        if not passengers:
+            return ReservationResult(code='invalid', error="Debe indicar al menos un pasajero")
+
+        def claim():
+            SeatInventoryService.release_expired_holds(flight_id=flight.pk)
+            free_seats = FlightSeat.objects.filter(
+                flight=flight, status='available', reservation__isnull=True
+            ).values_list('seat_id', 'seat__row', 'seat__column', 'seat__seat_type', 'seat__seat_index')
+            block = find_seat_block(free_seats, len(passengers), preference)
+            if block is None:
+                return ReservationResult(
+                    code='no_block',
+                    error=f"No hay {len(passengers)} asientos contiguos disponibles en este vuelo",
+                )
+
+            try:
+                reservations = _claim_block(
+                    flight, passengers, block, [flight.base_price if price is None else price] * len(block)
+                )
+            except SeatUnavailable:
+                # si el bloque cambió entre la lectura y el UPDATE se reintenta desde cero
+                raise SeatInventoryConflict("El bloque de asientos cambió durante el claim")
+            return ReservationResult(reservations=reservations)
+
+        try:
+            return _run_with_retries(claim)
+        except IntegrityError:
+            return ReservationResult(code='seat_taken', error="Alguno de los asientos ya está reservado en este vuelo")
+
+    @staticmethod
+    def reserve_many(items: List[dict]) -> ReservationResult:
+        """
+        Reserva un lote de asientos elegidos (dicts con flight, passenger,
+        seat y price opcional) en una sola transacción, con un claim por
+        vuelo. Si algún asiento ya fue tomado no se reserva ninguno.
+        """
+        by_flight = {}
+        for position, item in enumerate(items):
+            by_flight.setdefault(item['flight'].pk, []).append((position, item))
+
+        def claim():
+            created = [None] * len(items)
+            for group in by_flight.values():
+                flight = group[0][1]['flight']
+                SeatInventoryService.release_expired_holds(flight_id=flight.pk)
+                reservations = _claim_block(
+                    flight,
+                    [item['passenger'] for _, item in group],
+                    [item['seat'] for _, item in group],
+                    [flight.base_price if item.get('price') is None else item['price'] for _, item in group],
+                )
+                for (position, item), reservation in zip(group, reservations):
+                    reservation.seat = item['seat']
+                    created[position] = reservation
+            return ReservationResult(reservations=created)
+
+        try:
+            return _run_with_retries(claim)
+        except (IntegrityError, SeatUnavailable):
+            return ReservationResult(code='seat_taken', error="Alguno de los asientos ya está reservado en este vuelo")
+
+    @staticmethod
+    def confirm(reservation: Reservation) -> ReservationResult:
+        """
+        Confirma la reserva solo si sigue en estado 'reserved' y su
+        retención no venció.
+        """
+        return ReservationService._transition(reservation, ['reserved'], 'confirmed')
+
+    @staticmethod
+    def cancel(reservation: Reservation) -> ReservationResult:
+        """
+        Cancela la reserva y libera el asiento en el inventario del vuelo.
+        """
+        return ReservationService._transition(reservation, ['reserved', 'confirmed'], 'cancelled')
+
+    @staticmethod
+    def _transition(reservation: Reservation, from_statuses: List[str], to_status: str) -> ReservationResult:
+        def change():
+            # si la retención venció, la reserva pasa a 'expired' antes de cambiarla
+            SeatInventoryService.release_expired_holds(
+                flight_id=reservation.flight_id, seat_id=reservation.seat_id
+            )
+            # UPDATE condicional: dos cancelaciones simultáneas no liberan dos veces
+            changed = Reservation.objects.filter(
+                pk=reservation.pk, status__in=from_statuses
+            ).update(status=to_status)
+            if not changed:
+                current = Reservation.objects.filter(pk=reservation.pk).values_list('status', flat=True).first()
+                if current is not None:
+                    reservation.status = current
+                return ReservationResult(
+                    reservation=reservation,
+                    code='invalid',
+                    error=TRANSITION_ERRORS.get(
+                        current, f"La reserva no está en estado {' o '.join(from_statuses)}"
+                    ),
+                )
+            reservation.status = to_status
+            SeatInventoryService.apply_reservation(reservation)
+            return ReservationResult(reservation=reservation)
+
+        return _run_with_retries(change)
     
     @staticmethod
     def delete(reservation_id: int) -> bool:
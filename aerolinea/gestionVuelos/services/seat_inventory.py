@@ -0,0 +1,347 @@
+from datetime import timedelta
+from typing import Callable, Iterable, Optional
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.query import QuerySet
+from django.utils import timezone
+
+from gestionVuelos.models import Flight, FlightSeat, Reservation, Seat
+from gestionVuelos.seat_bitmap import SeatBitmap
+
+# reintentos del compare-and-set sobre el mapa de bits antes de rendirse
+BITMAP_CAS_RETRIES = 10
+
+# estado del inventario que corresponde a cada estado de la reserva
+RESERVATION_TO_INVENTORY_STATUS = {
+    'reserved': 'reserved',
+    'confirmed': 'occupied',
+    'cancelled': 'available',
+    'expired': 'available',
+}
+
+# un vuelo con reservas activas no cambia de avión: quedarían en asientos de otro
+PLANE_CHANGE_BLOCKED = "No se puede cambiar el avión: el vuelo tiene reservas activas"
+
+
+def hold_ttl() -> timedelta:
+    """Duración de la retención de un asiento en estado 'reserved'."""
+    return getattr(settings, 'SEAT_HOLD_TTL', timedelta(minutes=15))
+
+
+class SeatInventoryConflict(Exception):
+    """El mapa de bits del vuelo cambió demasiadas veces durante el claim."""
+
+
+class SeatUnavailable(Exception):
+    """El asiento ya está tomado en el vuelo."""
+
+
+class SeatInventoryService:
+    """
+    Mantiene el inventario de asientos por vuelo (FlightSeat).
+    El estado del asiento vive en el vuelo, no en el avión, de modo que
+    un mismo avión puede venderse en todos sus tramos.
+    """
+
+    @staticmethod
+    def get_for_flight(flight_id: int) -> QuerySet[FlightSeat]:
+        return FlightSeat.objects.filter(flight_id=flight_id).select_related('seat')
+
+    @staticmethod
+    def plane_change_blocked(flight: Flight, plane_id: int) -> bool:
+        """
+        True si pasar el vuelo al avión ``plane_id`` dejaría reservas activas
+        en asientos que ya no están en su inventario.
+        """
+        return FlightSeat.objects.filter(
+            flight_id=flight.pk, reservation__isnull=False
+        ).exclude(seat__plane_id=plane_id).exists()
+
+    @staticmethod
+    def sync_flight(flight: Flight, created: bool = False) -> int:
+        """
+        Genera las filas de inventario que faltan para el avión del vuelo y
+        descarta las de asientos que ya no pertenecen a ese avión
+        (ValidationError si alguna la retiene una reserva).
+        """
+        if not created and SeatInventoryService.plane_change_blocked(flight, flight.plane_id):
+            raise ValidationError({'plane': PLANE_CHANGE_BLOCKED})
+        FlightSeat.objects.filter(flight=flight).exclude(seat__plane_id=flight.plane_id).delete()
+        existing = FlightSeat.objects.filter(flight=flight).values('seat_id')
+        missing = Seat.objects.filter(plane_id=flight.plane_id).exclude(id__in=existing)
+        rows = [FlightSeat(flight=flight, seat_id=seat_id) for seat_id in missing.values_list('id', flat=True)]
+        FlightSeat.objects.bulk_create(rows, ignore_conflicts=True)
+        if created:
+            Flight.objects.filter(pk=flight.pk).update(available_count=len(rows))
+            flight.available_count = len(rows)
+        else:
+            SeatInventoryService.rebuild_bitmap(flight)
+        return len(rows)
+
+    @staticmethod
+    def add_seat(seat: Seat) -> int:
+        """
+        Agrega un asiento nuevo al inventario de todos los vuelos de su avión.
+        """
+        flight_ids = Flight.objects.filter(plane_id=seat.plane_id).values_list('id', flat=True)
+        rows = [FlightSeat(flight_id=flight_id, seat=seat) for flight_id in flight_ids]
+        FlightSeat.objects.bulk_create(rows, ignore_conflicts=True)
+        Flight.objects.filter(id__in=flight_ids).update(available_count=F('available_count') + 1)
+        return len(rows)
+
+    @staticmethod
+    def reindex_seat(seat: Seat) -> None:
+        """
+        El asiento cambió de fila/columna o se eliminó: se recalculan los
+        mapas de bits y contadores de los vuelos de su avión.
+        """
+        SeatInventoryService.reconcile(
+            Flight.objects.filter(plane_id=seat.plane_id).values_list('id', flat=True)
+        )
+
+    @staticmethod
+    def apply_reservation(reservation: Reservation, created: bool = False) -> bool:
+        """
+        Refleja el estado de la reserva en la fila de inventario de su asiento.
+        Lanza SeatUnavailable si el asiento ya lo retiene otra reserva; quien
+        guarda la reserva debe hacerlo dentro de una transacción.
+        """
+        status = RESERVATION_TO_INVENTORY_STATUS.get(reservation.status, 'reserved')
+        rows = FlightSeat.objects.filter(
+            flight_id=reservation.flight_id,
+            seat_id=reservation.seat_id,
+        )
+        if status == 'available':
+            # solo se libera si la fila pertenece a esta reserva
+            updated = rows.filter(
+                Q(reservation=reservation) | Q(reservation__isnull=True)
+            ).update(status='available', reservation=None, hold_expires_at=None)
+            if updated:
+                bitmap = SeatInventoryService.release_seats(
+                    reservation.flight_id, [reservation.seat.seat_index]
+                )
+                SeatInventoryService._store_cached_bitmap(reservation, bitmap)
+            return updated > 0
+
+        # una retención vence; un asiento ocupado (confirmado) no
+        hold_expires_at = timezone.now() + hold_ttl() if status == 'reserved' else None
+
+        # confirmación u otro cambio de una reserva que ya retiene el asiento
+        if not created:
+            held = rows.filter(reservation=reservation)
+            if status != 'reserved':
+                if held.update(status=status, hold_expires_at=None):
+                    # el mapa de bits no cambia, pero sí el estado visible del asiento
+                    Flight.objects.filter(pk=reservation.flight_id).update(
+                        inventory_version=F('inventory_version') + 1
+                    )
+                    return True
+            elif held.filter(status='reserved', hold_expires_at__isnull=False).update(status=status):
+                # sigue siendo la misma retención: conserva su vencimiento
+                return True
+            elif held.update(status=status, hold_expires_at=hold_expires_at):
+                # una reserva confirmada que vuelve a 'reserved' es otra vez una retención
+                Flight.objects.filter(pk=reservation.flight_id).update(
+                    inventory_version=F('inventory_version') + 1
+                )
+                return True
+
+        # claim condicional: solo gana quien encuentra la fila libre
+        claimed = rows.filter(status='available', reservation__isnull=True).update(
+            status=status, reservation=reservation, hold_expires_at=hold_expires_at
+        )
+        if not claimed:
+            raise SeatUnavailable("El asiento ya está reservado en este vuelo")
+        bitmap = SeatInventoryService.claim_seats(
+            reservation.flight_id, [reservation.seat.seat_index]
+        )
+        if bitmap is None:
+            raise SeatUnavailable("El asiento ya está reservado en este vuelo")
+        SeatInventoryService._store_cached_bitmap(reservation, bitmap)
+        return True
+
+    @staticmethod
+    def release(flight_id: int, seat_id: int, reservation_id: int | None = None) -> bool:
+        """
+        Libera el asiento de un vuelo si no lo retiene otra reserva.
+        """
+        holder = Q(reservation__isnull=True)
+        if reservation_id is not None:
+            holder |= Q(reservation_id=reservation_id)
+        updated = FlightSeat.objects.filter(
+            holder, flight_id=flight_id, seat_id=seat_id
+        ).update(status='available', reservation=None, hold_expires_at=None)
+        if updated:
+            index = Seat.objects.filter(pk=seat_id).values_list('seat_index', flat=True).first()
+            SeatInventoryService.release_seats(flight_id, [index])
+        return updated > 0
+
+    @staticmethod
+    def release_expired_holds(
+        flight_id: Optional[int] = None,
+        seat_id: Optional[int] = None,
+        batch_size: int = 500,
+        now=None,
+    ) -> int:
+        """
+        Libera por lotes las retenciones vencidas: marca las reservas como
+        'expired' y devuelve los asientos al inventario con UPDATEs por
+        conjunto (uno por lote y uno por vuelo para el mapa de bits).
+        """
+        now = now or timezone.now()
+        expired = FlightSeat.objects.expired_holds(now)
+        if flight_id is not None:
+            expired = expired.filter(flight_id=flight_id)
+        if seat_id is not None:
+            expired = expired.filter(seat_id=seat_id)
+
+        released = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    expired.select_for_update(skip_locked=True, of=('self',))
+                    .values_list('id', 'flight_id', 'reservation_id', 'seat__seat_index')[:batch_size]
+                )
+                if not batch:
+                    break
+                ids = [row[0] for row in batch]
+                Reservation.objects.filter(
+                    id__in=[row[2] for row in batch if row[2] is not None], status='reserved'
+                ).update(status='expired')
+                FlightSeat.objects.filter(id__in=ids).update(
+                    status='available', reservation=None, hold_expires_at=None
+                )
+                indexes_by_flight = {}
+                for _, batch_flight_id, _, index in batch:
+                    indexes_by_flight.setdefault(batch_flight_id, []).append(index)
+                for batch_flight_id, indexes in indexes_by_flight.items():
+                    SeatInventoryService.release_seats(batch_flight_id, indexes)
+            released += len(batch)
+            if len(batch) < batch_size:
+                break
+        return released
+
+    # -------------------------------------------------------------------------
+    # Mapa de bits por vuelo
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _compare_and_set(
+        flight_id: int,
+        change: Callable[[SeatBitmap], Optional[SeatBitmap]],
+    ) -> Optional[bytes]:
+        """
+        Aplica ``change`` al mapa de bits del vuelo con un UPDATE condicionado
+        al valor leído y devuelve el valor guardado. ``change`` devuelve None
+        si la operación no es posible (p. ej. el asiento ya estaba tomado).
+        """
+        for _ in range(BITMAP_CAS_RETRIES):
+            current = Flight.objects.filter(pk=flight_id).values_list('seat_bitmap', flat=True).first()
+            if current is None:
+                return None
+            current = bytes(current)
+            bitmap = SeatBitmap.from_bytes(current)
+            new_bitmap = change(bitmap)
+            if new_bitmap is None:
+                return None
+            if new_bitmap == bitmap:
+                return current
+            new_value = new_bitmap.to_bytes()
+            # los contadores viajan en el mismo UPDATE que el mapa de bits
+            delta = new_bitmap.count() - bitmap.count()
+            swapped = Flight.objects.filter(pk=flight_id, seat_bitmap=current).update(
+                seat_bitmap=new_value,
+                reserved_count=F('reserved_count') + delta,
+                available_count=F('available_count') - delta,
+                inventory_version=F('inventory_version') + 1,
+            )
+            if swapped:
+                return new_value
+        raise SeatInventoryConflict(f"No se pudo actualizar el mapa de bits del vuelo {flight_id}")
+
+    @staticmethod
+    def claim_seats(flight_id: int, indexes: Iterable[int]) -> Optional[bytes]:
+        """
+        Marca los asientos como tomados solo si todos estaban libres.
+        Devuelve None si alguno ya estaba tomado.
+        """
+        indexes = list(indexes)
+
+        def claim(bitmap: SeatBitmap) -> Optional[SeatBitmap]:
+            if any(bitmap.is_taken(index) for index in indexes):
+                return None
+            return bitmap.taken(indexes)
+
+        return SeatInventoryService._compare_and_set(flight_id, claim)
+
+    @staticmethod
+    def release_seats(flight_id: int, indexes: Iterable[int]) -> Optional[bytes]:
+        indexes = [index for index in indexes if index is not None]
+        return SeatInventoryService._compare_and_set(
+            flight_id, lambda bitmap: bitmap.released(indexes)
+        )
+
+    @staticmethod
+    def rebuild_bitmap(flight: Flight) -> SeatBitmap:
+        """
+        Recalcula el mapa de bits y los contadores del vuelo a partir de sus
+        filas de inventario.
+        """
+        SeatInventoryService.reconcile([flight.pk])
+        flight.refresh_from_db(fields=['seat_bitmap', 'reserved_count', 'available_count'])
+        return flight.bitmap
+
+    @staticmethod
+    def reconcile(flight_ids: Optional[Iterable[int]] = None, batch_size: int = 500) -> int:
+        """
+        Recalcula en bloque mapa de bits y contadores desde FlightSeat.
+        Devuelve la cantidad de vuelos que estaban desincronizados.
+        """
+        flights = Flight.objects.all()
+        if flight_ids is not None:
+            flights = flights.filter(id__in=list(flight_ids))
+
+        totals = {
+            row['flight_id']: row
+            for row in FlightSeat.objects.filter(flight__in=flights).values('flight_id').annotate(
+                total=Count('id'),
+                taken=Count('id', filter=~Q(status='available')),
+            )
+        }
+        taken_indexes = {}
+        taken_rows = FlightSeat.objects.filter(flight__in=flights).exclude(status='available')
+        for flight_id, index in taken_rows.values_list('flight_id', 'seat__seat_index'):
+            if index is not None:
+                taken_indexes.setdefault(flight_id, []).append(index)
+
+        stale = []
+        for flight in flights.only(
+            'id', 'seat_bitmap', 'reserved_count', 'available_count', 'inventory_version'
+        ).iterator():
+            row = totals.get(flight.id, {'total': 0, 'taken': 0})
+            bitmap = SeatBitmap.from_indexes(taken_indexes.get(flight.id, [])).to_bytes()
+            expected = (bitmap, row['taken'], row['total'] - row['taken'])
+            if (bytes(flight.seat_bitmap), flight.reserved_count, flight.available_count) != expected:
+                flight.seat_bitmap, flight.reserved_count, flight.available_count = expected
+                flight.inventory_version += 1
+                stale.append(flight)
+
+        Flight.objects.bulk_update(
+            stale,
+            ['seat_bitmap', 'reserved_count', 'available_count', 'inventory_version'],
+            batch_size=batch_size,
+        )
+        return len(stale)
+
+    @staticmethod
+    def _store_cached_bitmap(reservation: Reservation, bitmap: Optional[bytes]) -> None:
+        # mantiene al día el vuelo que ya está cargado en memoria con la reserva
+        flight = Reservation._meta.get_field('flight').get_cached_value(reservation, None)
+        if flight is not None and bitmap is not None:
+            total = flight.reserved_count + flight.available_count
+            flight.seat_bitmap = bitmap
+            flight.reserved_count = SeatBitmap.from_bytes(bitmap).count()
+            flight.available_count = total - flight.reserved_count
@@ -0,0 +1,165 @@
+import hashlib
+from typing import Optional, Tuple
+
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from gestionVuelos.models import Flight, FlightSeat, Plane, Seat
+
+# el layout solo cambia cuando cambia layout_version, así que puede vivir mucho
+SEAT_MAP_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class SeatMapService:
+    """
+    Mapa de asientos de un avión cacheado por versión de layout. La
+    disponibilidad de un vuelo se superpone sobre el layout cacheado a
+    partir del mapa de bits, sin volver a serializar los asientos.
+    """
+
+    @staticmethod
+    def cache_key(plane: Plane) -> str:
+        # 'layout2': el layout ya no incluye Seat.status; no reusar entradas viejas
+        return f"seatmap:layout2:plane:{plane.pk}:v{plane.layout_version}"
+
+    @staticmethod
+    def bump_layout(plane_id: int) -> None:
+        """
+        Invalida el layout cacheado del avión (las claves viejas expiran solas).
+        """
+        Plane.objects.filter(pk=plane_id).update(layout_version=F('layout_version') + 1)
+
+    @staticmethod
+    def get_layout(plane: Plane) -> dict:
+        """
+        Devuelve {'plane', 'seats', 'indexes'}: los datos del avión, los
+        asientos ya serializados y el índice de cada uno en el mapa de bits.
+        """
+        key = SeatMapService.cache_key(plane)
+        layout = cache.get(key)
+        if layout is None:
+            rows = Seat.objects.filter(plane=plane).order_by('row', 'column').values_list(
+                'id', 'number', 'row', 'column', 'seat_type', 'seat_index'
+            )
+            seats, indexes = [], []
+            # sin Seat.status: el estado depende del vuelo (FlightSeat)
+            for seat_id, number, row, column, seat_type, index in rows:
+                seats.append({
+                    'id': seat_id,
+                    'number': number,
+                    'row': row,
+                    'column': column,
+                    'seat_type': seat_type,
+                })
+                indexes.append(index)
+            layout = {
+                'plane': {
+                    'id': plane.id,
+                    'model': plane.model,
+                    'manufacturer': plane.manufacturer,
+                    'capacity': plane.capacity,
+                },
+                'seats': seats,
+                'indexes': indexes,
+            }
+            cache.set(key, layout, SEAT_MAP_CACHE_TIMEOUT)
+        return layout
+
+    @staticmethod
+    def layout_etag(plane: Plane) -> str:
+        return f'"plane-{plane.pk}-v{plane.layout_version}"'
+
+    @staticmethod
+    def availability(plane: Plane, flight: Optional[Flight]) -> Tuple[list, str]:
+        """
+        Asientos libres del avión en el vuelo y su ETag. Sin vuelo, todos
+        los asientos del layout se consideran libres.
+        """
+        layout = SeatMapService.get_layout(plane)
+        if flight is None:
+            taken, expired = 0, []
+        else:
+            taken = flight.bitmap.value
+            # retenciones vencidas que todavía no barrió release_expired_holds
+            expired = sorted(
+                FlightSeat.objects.filter(flight=flight).expired_holds().values_list('seat__seat_index', flat=True)
+            )
+            for index in expired:
+                taken &= ~(1 << index)
+
+        seats = [
+            dict(seat, status='available')
+            for seat, index in zip(layout['seats'], layout['indexes'])
+            if index is None or not taken >> index & 1
+        ]
+        digest = hashlib.sha1(taken.to_bytes((taken.bit_length() + 7) // 8, 'little')).hexdigest()[:16]
+        flight_tag = flight.pk if flight is not None else 0
+        etag = f'"plane-{plane.pk}-v{plane.layout_version}-f{flight_tag}-{digest}"'
+        return seats, etag
+
+    # -------------------------------------------------------------------------
+    # Grilla de asientos por vuelo (páginas de detalle y de reserva)
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def flight_cache_key(flight: Flight) -> str:
+        return (
+            f"seatmap:flight:{flight.pk}:v{flight.inventory_version}"
+            f":l{flight.plane.layout_version}"
+        )
+
+    @staticmethod
+    def _flight_grid(flight: Flight) -> list:
+        """
+        Filas [(fila, [celdas])] del vuelo, leídas del inventario con una sola
+        consulta y cacheadas por versión de inventario y de layout.
+        """
+        key = SeatMapService.flight_cache_key(flight)
+        grid = cache.get(key)
+        if grid is None:
+            rows = FlightSeat.objects.filter(flight=flight).order_by('seat__row', 'seat__column').values_list(
+                'seat_id', 'seat__number', 'seat__row', 'seat__column', 'seat__seat_type',
+                'status', 'hold_expires_at',
+            )
+            grid = []
+            for seat_id, number, row, column, seat_type, seat_status, hold_expires_at in rows:
+                if not grid or grid[-1][0] != row:
+                    grid.append((row, []))
+                grid[-1][1].append({
+                    'id': seat_id,
+                    'number': number,
+                    'row': row,
+                    'column': column,
+                    'seat_type': seat_type,
+                    'status': seat_status,
+                    'hold_expires_at': hold_expires_at,
+                })
+            cache.set(key, grid, SEAT_MAP_CACHE_TIMEOUT)
+        return grid
+
+    @staticmethod
+    def build_for_flight(flight: Flight, now=None) -> dict:
+        """
+        Grilla completa de fila/columna del vuelo con el estado de cada
+        asiento: 'available', 'held' (retención vigente) o 'taken'.
+        Las retenciones vencidas se resuelven al leer, no al cachear.
+        """
+        now = now or timezone.now()
+        rows = []
+        totals = {'available': 0, 'held': 0, 'taken': 0}
+        for row, cells in SeatMapService._flight_grid(flight):
+            seats = []
+            for cell in cells:
+                if cell['status'] == 'occupied':
+                    state = 'taken'
+                elif cell['status'] == 'reserved' and (
+                    cell['hold_expires_at'] is None or cell['hold_expires_at'] > now
+                ):
+                    state = 'held'
+                else:
+                    state = 'available'
+                totals[state] += 1
+                seats.append(dict(cell, state=state))
+            rows.append((row, seats))
+        return {'rows': rows, **totals}
@@ -1,8 +1,11 @@
 from typing import List, Optional
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 
 from gestionVuelos.models import Ticket, Reservation
 from gestionVuelos.repositories.ticket import TicketRepository
+from gestionVuelos.services.reservation import ReservationService
 import uuid
 
 class TicketService:
@@ -22,16 +25,33 @@ class TicketService:
         status: str = "issued"
     ) -> Ticket:
         reservation = get_object_or_404(Reservation, id=reservation_id)
-        ticket = Ticket(
-            reservation=reservation,
-            status=status
-        )
-        if barcode:
-            ticket.barcode = barcode
-        else:
-            ticket.barcode = str(uuid.uuid4()).replace("-", "").upper()
-        ticket.full_clean()
-        ticket.save()
+        if not barcode:
+            barcode = str(uuid.uuid4()).replace("-", "").upper()
+        return TicketService.issue(reservation, barcode=barcode, status=status)
+
+    @staticmethod
+    def issue(
+        reservation: Reservation,
+        barcode: str | None = None,
+        status: str = "issued"
+    ) -> Ticket:
+        """
+        Emite el boleto y, si la reserva todavía es una retención, la
+        confirma en la misma transacción: un asiento con boleto no puede
+        vencer ni volver a venderse. Lanza ValidationError si la reserva no
+        está activa (p. ej. su retención ya venció).
+        """
+        with transaction.atomic():
+            if reservation.status == 'reserved':
+                result = ReservationService.confirm(reservation)
+                if not result.ok:
+                    raise ValidationError("La retención de la reserva ya venció")
+            elif reservation.status != 'confirmed':
+                raise ValidationError("Solo se pueden generar boletos de reservas activas")
+            ticket = Ticket(reservation=reservation, status=status)
+            if barcode:
+                ticket.barcode = barcode
+            ticket.save()
         return ticket
 
     @staticmethod
@@ -49,7 +69,6 @@ class TicketService:
             ticket.reservation = reservation
             ticket.barcode = barcode
             ticket.status = status
-            ticket.full_clean()
             ticket.save()
             return True
         except Ticket.DoesNotExist:
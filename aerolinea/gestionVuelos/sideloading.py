@@ -0,0 +1,69 @@
+"""
+Documentos compuestos para los listados (?sideload=1): las filas
+referencian a los objetos relacionados por ID y cada objeto se serializa
+una sola vez en el mapa ``included`` de la respuesta, por tipo e ID.
+"""
+
+from rest_framework import serializers
+from rest_framework.response import Response
+
+SIDELOAD_TRUE_VALUES = ('1', 'true', 'yes')
+
+
+class SideloadedField(serializers.Field):
+    """
+    Reemplaza a un serializer anidado: devuelve el ID (o la lista de IDs)
+    y deja el objeto serializado en ``context['included'][tipo][id]``.
+    """
+
+    def __init__(self, serializer, **kwargs):
+        kwargs['read_only'] = True
+        kwargs['source'] = serializer.source
+        super().__init__(**kwargs)
+        self.many = isinstance(serializer, serializers.ListSerializer)
+        self.serializer = serializer.child if self.many else serializer
+        self.type_name = self.serializer.Meta.model._meta.model_name
+
+    def bind(self, field_name, parent):
+        super().bind(field_name, parent)
+        # el serializer anidado toma el contexto (y el mapa included) de la raíz
+        self.serializer.bind(field_name, self)
+
+    def _include(self, instance):
+        objects = self.context['included'].setdefault(self.type_name, {})
+        key = str(instance.pk)
+        if key not in objects:
+            # se marca antes de serializar por si hay referencias circulares
+            objects[key] = None
+            objects[key] = self.serializer.to_representation(instance)
+        return instance.pk
+
+    def to_representation(self, value):
+        if self.many:
+            items = value.all() if hasattr(value, 'all') else value
+            return [self._include(instance) for instance in items]
+        return self._include(value)
+
+
+class SideloadListMixin:
+    """
+    Agrega a ``list_response()`` el formato con ``included``. El streaming
+    (?stream=1) tiene prioridad y sigue devolviendo filas anidadas.
+    """
+
+    def wants_sideload(self) -> bool:
+        return self.request.query_params.get('sideload', '').lower() in SIDELOAD_TRUE_VALUES
+
+    def list_response(self, queryset):
+        if not self.wants_sideload() or self.wants_stream():
+            return super().list_response(queryset)
+
+        included = {}
+        context = dict(self.get_serializer_context(), included=included)
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            data = self.get_serializer(queryset, many=True, context=context).data
+            return Response({'results': data, 'included': included})
+        response = self.get_paginated_response(self.get_serializer(page, many=True, context=context).data)
+        response.data['included'] = included
+        return response
@@ -1,7 +1,17 @@
-from django.db.models.signals import post_save
+from django.core.exceptions import ValidationError
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.db import transaction
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from gestionVuelos.models import Passenger
+from gestionVuelos import versions
+from gestionVuelos.models import Airport, Passenger, Flight, Plane, Seat, Reservation, Ticket, rows_changed
+from gestionVuelos.repositories import cache as repository_cache
+from gestionVuelos.services.autocomplete import AutocompleteService
+from gestionVuelos.services.fare_calendar import FareCalendarService
+from gestionVuelos.services.flights import FlightService, flights_bulk_created
+from gestionVuelos.services.itineraries import ItineraryService
+from gestionVuelos.services.seat_inventory import PLANE_CHANGE_BLOCKED, SeatInventoryService
+from gestionVuelos.services.seat_map import SeatMapService
 import uuid
 
 @receiver(post_save, sender=User)
@@ -24,3 +34,196 @@ def create_passenger_for_new_user(sender, instance, created, **kwargs):
             birth_date='1900-01-01',
             document_type=Passenger.DNI
         )
+
+
+# -----------------------------------------------------------------------------
+# Inventario de asientos por vuelo
+# -----------------------------------------------------------------------------
+
+@receiver(pre_save, sender=Flight)
+def block_plane_change_with_reservations(sender, instance, **kwargs):
+    # antes de escribir: en post_save el vuelo ya tendría el avión nuevo
+    loaded = getattr(instance, '_loaded_plane_id', None)
+    if (
+        loaded is not None
+        and loaded != instance.plane_id
+        and SeatInventoryService.plane_change_blocked(instance, instance.plane_id)
+    ):
+        raise ValidationError({'plane': PLANE_CHANGE_BLOCKED})
+
+
+@receiver(post_save, sender=Flight)
+def sync_flight_seat_inventory(sender, instance, created, **kwargs):
+    # solo regeneramos el inventario si el vuelo es nuevo o cambió de avión
+    if created or getattr(instance, '_loaded_plane_id', None) != instance.plane_id:
+        SeatInventoryService.sync_flight(instance, created=created)
+    instance._loaded_plane_id = instance.plane_id
+
+
+@receiver(post_save, sender=Seat)
+def add_seat_to_flight_inventory(sender, instance, created, **kwargs):
+    if created:
+        SeatInventoryService.add_seat(instance)
+    elif getattr(instance, '_loaded_seat_index', instance.seat_index) != instance.seat_index:
+        SeatInventoryService.reindex_seat(instance)
+    instance._loaded_seat_index = instance.seat_index
+
+
+@receiver(post_delete, sender=Seat)
+def remove_seat_from_flight_inventory(sender, instance, **kwargs):
+    SeatInventoryService.reindex_seat(instance)
+
+
+@receiver(post_save, sender=Reservation)
+def apply_reservation_to_inventory(sender, instance, created, **kwargs):
+    loaded = getattr(instance, '_loaded_flight_seat', None)
+    current = (instance.flight_id, instance.seat_id)
+    if not created and loaded and loaded != current:
+        # la reserva cambió de vuelo o asiento: liberamos el anterior
+        SeatInventoryService.release(*loaded, reservation_id=instance.pk)
+    SeatInventoryService.apply_reservation(instance, created=created)
+    instance._loaded_flight_seat = current
+
+
+@receiver(post_delete, sender=Reservation)
+def release_reservation_inventory(sender, instance, **kwargs):
+    SeatInventoryService.release(instance.flight_id, instance.seat_id)
+
+
+# -----------------------------------------------------------------------------
+# Versión del layout de asientos (caché del mapa de asientos)
+# -----------------------------------------------------------------------------
+
+@receiver(post_save, sender=Plane)
+def bump_plane_layout_on_change(sender, instance, created, **kwargs):
+    if not created:
+        SeatMapService.bump_layout(instance.pk)
+        instance.refresh_from_db(fields=['layout_version'])
+
+
+@receiver(post_save, sender=Seat)
+@receiver(post_delete, sender=Seat)
+def bump_plane_layout_on_seat_change(sender, instance, **kwargs):
+    SeatMapService.bump_layout(instance.plane_id)
+
+
+# -----------------------------------------------------------------------------
+# Grafo de conexiones en memoria
+# -----------------------------------------------------------------------------
+
+@receiver(post_save, sender=Flight)
+def update_connection_graph(sender, instance, **kwargs):
+    # solo después del commit: un rollback no debe dejar el vuelo en el grafo
+    transaction.on_commit(lambda: ItineraryService.flight_changed(instance))
+
+
+@receiver(post_delete, sender=Flight)
+def remove_from_connection_graph(sender, instance, **kwargs):
+    flight_id = instance.pk
+    transaction.on_commit(lambda: ItineraryService.flight_deleted(flight_id))
+
+
+# -----------------------------------------------------------------------------
+# Índice de autocompletado de ciudades
+# -----------------------------------------------------------------------------
+
+@receiver(post_save, sender=Flight)
+def refresh_city_index_on_flight_save(sender, instance, created, **kwargs):
+    # solo importa si aparece o cambia una ciudad, no cualquier guardado del vuelo
+    if created or getattr(instance, '_loaded_route', None) != (instance.origin, instance.destination):
+        transaction.on_commit(AutocompleteService.cities_changed)
+
+
+@receiver(post_delete, sender=Flight)
+@receiver(post_save, sender=Airport)
+@receiver(post_delete, sender=Airport)
+def refresh_city_index(sender, **kwargs):
+    transaction.on_commit(AutocompleteService.cities_changed)
+
+
+@receiver(post_save, sender=Airport)
+def link_flights_to_airport(sender, instance, **kwargs):
+    # Flight.save ya no busca aeropuerto si la ciudad no cambió: el alta del
+    # aeropuerto completa los vuelos de su ciudad que quedaron sin él
+    FlightService.link_airport(instance)
+
+
+# -----------------------------------------------------------------------------
+# Calendario de tarifas por ruta y mes
+# -----------------------------------------------------------------------------
+
+@receiver(post_save, sender=Flight)
+@receiver(post_delete, sender=Flight)
+def invalidate_fare_calendar(sender, instance, **kwargs):
+    FareCalendarService.invalidate(instance.origin, instance.destination, instance.departure_time)
+    loaded = getattr(instance, '_loaded_departure', None)
+    if loaded is not None:
+        # el vuelo pudo cambiar de ruta o de mes: también se descarta el anterior
+        FareCalendarService.invalidate(*loaded)
+
+
+# -----------------------------------------------------------------------------
+# Altas masivas de vuelos (bulk_create no emite post_save)
+# -----------------------------------------------------------------------------
+
+@receiver(flights_bulk_created)
+def apply_bulk_created_flights(sender, flights, **kwargs):
+    # el inventario ya lo crea FlightService.bulk_create; acá van los avisos, una vez por lote
+    transaction.on_commit(lambda: ItineraryService.flights_changed(flights))
+    transaction.on_commit(AutocompleteService.cities_changed)
+    FareCalendarService.invalidate_many(flights)
+
+
+# -----------------------------------------------------------------------------
+# Versiones por colección (GET condicionales de la API)
+# -----------------------------------------------------------------------------
+
+@receiver(post_save, sender=Plane)
+@receiver(post_save, sender=Seat)
+@receiver(post_save, sender=Passenger)
+@receiver(post_save, sender=Airport)
+@receiver(post_save, sender=Flight)
+@receiver(post_save, sender=Reservation)
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Plane)
+@receiver(post_delete, sender=Seat)
+@receiver(post_delete, sender=Passenger)
+@receiver(post_delete, sender=Airport)
+@receiver(post_delete, sender=Flight)
+@receiver(post_delete, sender=Reservation)
+@receiver(post_delete, sender=Ticket)
+def bump_collection_version(sender, **kwargs):
+    # las escrituras por QuerySet las avisa VersionedQuerySet
+    versions.changed(sender._meta.model_name)
+
+
+# -----------------------------------------------------------------------------
+# Caché de lectura de los repositorios
+# -----------------------------------------------------------------------------
+
+# con sender explícito: un receptor de post_delete para todos los modelos
+# impediría el borrado rápido (sin cargar las filas) de FlightSeat y el resto
+@receiver(post_save, sender=Plane)
+@receiver(post_save, sender=Seat)
+@receiver(post_save, sender=Passenger)
+@receiver(post_save, sender=Flight)
+@receiver(post_save, sender=Reservation)
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Plane)
+@receiver(post_delete, sender=Seat)
+@receiver(post_delete, sender=Passenger)
+@receiver(post_delete, sender=Flight)
+@receiver(post_delete, sender=Reservation)
+@receiver(post_delete, sender=Ticket)
+def invalidate_repository_cache(sender, instance, **kwargs):
+    repository_cache.invalidate(sender, [instance.pk])
+
+
+@receiver(rows_changed, sender=Plane)
+@receiver(rows_changed, sender=Seat)
+@receiver(rows_changed, sender=Passenger)
+@receiver(rows_changed, sender=Flight)
+@receiver(rows_changed, sender=Reservation)
+@receiver(rows_changed, sender=Ticket)
+def invalidate_repository_cache_rows(sender, pks, **kwargs):
+    repository_cache.invalidate(sender, pks)
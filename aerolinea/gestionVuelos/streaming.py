@@ -0,0 +1,62 @@
+"""
+Respuestas JSON en streaming para listados grandes (?stream=1): el
+queryset se recorre con .iterator() y cada lote se serializa y se escribe
+apenas está listo, así que la memoria no crece con la cantidad de filas.
+"""
+
+from django.http import StreamingHttpResponse
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+STREAM_CHUNK_SIZE = 500
+STREAM_TRUE_VALUES = ('1', 'true', 'yes')
+
+
+class StreamingListMixin:
+    """
+    Agrega a un viewset el modo streaming opcional. ``list()`` y las
+    acciones de listado que usan ``list_response()`` responden con un
+    arreglo JSON escrito de a lotes cuando se pide ``?stream=1``; si no,
+    con la página habitual.
+    """
+    stream_chunk_size = STREAM_CHUNK_SIZE
+
+    def list(self, request, *args, **kwargs):
+        return self.list_response(self.filter_queryset(self.get_queryset()))
+
+    def wants_stream(self) -> bool:
+        return self.request.query_params.get('stream', '').lower() in STREAM_TRUE_VALUES
+
+    def list_response(self, queryset):
+        if self.wants_stream():
+            return self.stream_response(queryset)
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            serializer = self.get_serializer(queryset, many=True)
+            return Response(serializer.data)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def stream_response(self, queryset):
+        response = StreamingHttpResponse(self._stream_json(queryset), content_type='application/json')
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def _stream_json(self, queryset):
+        encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+        chunk = []
+        first = True
+        yield '['
+        for instance in queryset.iterator(chunk_size=self.stream_chunk_size):
+            chunk.append(instance)
+            if len(chunk) >= self.stream_chunk_size:
+                yield self._encode_chunk(encoder, chunk, first)
+                first, chunk = False, []
+        if chunk:
+            yield self._encode_chunk(encoder, chunk, first)
+        yield ']'
+
+    def _encode_chunk(self, encoder, chunk, first) -> str:
+        data = self.get_serializer(chunk, many=True).data
+        body = ','.join(encoder.encode(item) for item in data)
+        return body if first else ',' + body
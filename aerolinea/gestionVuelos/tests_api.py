@@ -5,15 +5,98 @@ Desarrollado por: [Nombre del Estudiante]
 Fecha: 2024
 """
 
-from django.test import TestCase
+import json
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+import msgpack
+from django.core.cache import cache
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models.deletion import Collector
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.http import Http404
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
 from django.contrib.auth.models import User
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.utils import timezone
-from .models import Flight, Passenger, Reservation, Plane, Seat, Ticket
-from datetime import datetime, timedelta
+from .models import Airport, Flight, FlightSeat, Passenger, Reservation, Plane, Seat, Ticket
+from .pagination import KeysetCursorPagination
+from .parsers import FastJSONParser
+from .projections import FLIGHT_PASSENGER, TICKET
+from .query_plans import query_plan
+from .renderers import FastJSONRenderer
+from .repositories.flights import FlightRepository, _cache as flight_cache
+from .repositories.planes import PlaneRepository, _cache as plane_cache
+from .seat_bitmap import SeatBitmap, seat_index
+from .seat_blocks import find_seat_block
+from .serializers import ReservationSerializer, SeatSerializer, TicketSerializer
+from .services.autocomplete import AutocompleteService
+from .services.fare_calendar import FareCalendarService
+from .services.fleet import FleetService
+from .services.flights import FlightService
+from .services.itineraries import SCHEDULE_DELTA_KEY, SCHEDULE_VERSION_KEY, ItineraryService
+from .services.plane import PlaneService
+from .services.reservation import ReservationService
+from .services.seat_inventory import SeatInventoryService
+from .services.seat_map import SeatMapService
+from .services.ticket import TicketService
+from .views_api import FlightViewSet
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+
+def create_flight(plane, origin='Buenos Aires', destination='Córdoba', departure=None,
+                  duration=timedelta(hours=1), **fields):
+    """
+    Crear un vuelo programado del avión; por defecto sale mañana y dura una hora
+    """
+    departure = departure or timezone.now() + timedelta(days=1)
+    fields.setdefault('status', 'scheduled')
+    fields.setdefault('base_price', 100.00)
+    return Flight.objects.create(
+        plane=plane,
+        origin=origin,
+        destination=destination,
+        departure_time=departure,
+        arrival_time=departure + duration,
+        duration=duration,
+        **fields
+    )
+
+
+def create_passengers(count, start=0):
+    """
+    Crear pasajeros con documento y email únicos, numerados desde start
+    """
+    return [
+        Passenger.objects.create(
+            full_name=f'Pasajero Numero{i}',
+            document_type='DNI',
+            document_number=f'{40000000 + i}',
+            email=f'pasajero{i}@email.com',
+            phone='1234567890',
+            birth_date='1990-01-01'
+        )
+        for i in range(start, start + count)
+    ]
+
+
+def plane_seats(plane):
+    """
+    Asientos del avión ordenados por fila y columna
+    """
+    return list(Seat.objects.filter(plane=plane).order_by('row', 'column'))
 
 
 class FlightAPITestCase(APITestCase):
@@ -92,7 +175,7 @@ class FlightAPITestCase(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         # Verificar que hay al menos 1 vuelo
-        self.assertGreaterEqual(len(response.data), 1)
+        self.assertGreaterEqual(len(response.data['results']), 1)
 
     def test_create_flight_admin_only(self):
         """
@@ -141,7 +224,7 @@ class FlightAPITestCase(APITestCase):
         })
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_flight_passengers_admin_only(self):
         """
@@ -475,3 +558,2244 @@ class TicketAPITestCase(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['barcode'], ticket.barcode)
+
+
+class FlightSeatInventoryTestCase(APITestCase):
+    """
+    Tests para el inventario de asientos por vuelo
+    """
+
+    def setUp(self):
+        """
+        Configurar un avión que opera dos tramos
+        """
+        self.user = User.objects.create_user(
+            username='user',
+            password='user123'
+        )
+
+        self.plane = FleetService.onboard_plane('Boeing 737', 'Boeing', 3)
+        self.seats = plane_seats(self.plane)
+        self.first_leg = create_flight(self.plane)
+        self.second_leg = create_flight(
+            self.plane, 'Córdoba', 'Mendoza', timezone.now() + timedelta(days=1, hours=3)
+        )
+        self.passenger, = create_passengers(1)
+
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_inventory_created_for_every_leg(self):
+        """
+        Test: Cada vuelo tiene su propia fila de inventario por asiento
+        """
+        self.assertEqual(self.first_leg.seat_inventory.count(), 3)
+        self.assertEqual(self.second_leg.seat_inventory.count(), 3)
+
+    def test_same_seat_bookable_on_every_leg(self):
+        """
+        Test: Un asiento reservado en un tramo sigue libre en el otro
+        """
+        url = reverse('reservation-list')
+        for flight in (self.first_leg, self.second_leg):
+            response = self.client.post(url, {
+                'passenger_id': self.passenger.id,
+                'flight_id': flight.id,
+                'seat_id': self.seats[0].id,
+                'price': 100.00
+            })
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.first_leg.refresh_from_db()
+        self.second_leg.refresh_from_db()
+        self.assertEqual(self.first_leg.get_available_seats().count(), 2)
+        self.assertEqual(self.second_leg.get_available_seats().count(), 2)
+        self.assertEqual(self.first_leg.seats_occupied(), 1)
+
+    def test_seat_taken_on_same_flight(self):
+        """
+        Test: No se puede reservar dos veces el mismo asiento en un vuelo
+        """
+        Reservation.objects.create(
+            flight=self.first_leg,
+            passenger=self.passenger,
+            seat=self.seats[0],
+            price=100.00
+        )
+
+        response = self.client.post(reverse('reservation-list'), {
+            'passenger_id': self.passenger.id,
+            'flight_id': self.first_leg.id,
+            'seat_id': self.seats[0].id,
+            'price': 100.00
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cancel_releases_seat(self):
+        """
+        Test: Cancelar una reserva libera el asiento solo en ese vuelo
+        """
+        reservation = Reservation.objects.create(
+            flight=self.first_leg,
+            passenger=self.passenger,
+            seat=self.seats[0],
+            price=100.00
+        )
+        self.assertNotIn(self.seats[0], self.first_leg.get_available_seats())
+
+        url = reverse('reservation-cancel', kwargs={'pk': reservation.id})
+        response = self.client.post(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.first_leg.refresh_from_db()
+        self.assertIn(self.seats[0], self.first_leg.get_available_seats())
+
+    def test_plane_change_blocked_with_active_reservations(self):
+        """
+        Test: Un vuelo con reservas activas no cambia de avión; sin ellas sí y se regenera el inventario
+        """
+        other_plane = FleetService.onboard_plane('A320', 'Airbus', 6)
+        reservation = ReservationService.reserve(self.first_leg, self.passenger, self.seats[0]).reservation
+        admin = User.objects.create_user(username='admin', password='admin123', is_staff=True)
+        self.client.force_authenticate(admin)
+        url = reverse('flight-detail', kwargs={'pk': self.first_leg.id})
+
+        response = self.client.patch(url, {'plane_id': other_plane.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('plane_id', response.data)
+
+        flight = Flight.objects.get(pk=self.first_leg.pk)
+        flight.plane = other_plane
+        with self.assertRaises(ValidationError):
+            flight.save()
+        self.assertEqual(Flight.objects.get(pk=flight.pk).plane_id, self.plane.id)
+        self.assertTrue(FlightSeat.objects.filter(reservation=reservation).exists())
+
+        self.assertTrue(ReservationService.cancel(reservation).ok)
+        response = self.client.patch(url, {'plane_id': other_plane.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.first_leg.refresh_from_db()
+        self.assertEqual(self.first_leg.seat_inventory.count(), 6)
+        self.assertEqual(self.first_leg.available_count, 6)
+
+
+class SeatBitmapTestCase(TestCase):
+    """
+    Tests para el mapa de bits de asientos
+    """
+
+    def test_seat_index_follows_layout(self):
+        """
+        Test: El índice sigue el orden fila/columna de crear_asientos
+        """
+        self.assertEqual(seat_index(1, 'A'), 0)
+        self.assertEqual(seat_index(1, 'F'), 5)
+        self.assertEqual(seat_index(2, 'a'), 6)
+        with self.assertRaises(ValueError):
+            seat_index(1, 'Z')
+
+    def test_popcount_and_bit_scan(self):
+        """
+        Test: Conteo y recorrido de asientos tomados
+        """
+        bitmap = SeatBitmap().taken([0, 7, 299])
+        self.assertEqual(bitmap.count(), 3)
+        self.assertEqual(bitmap.indexes(), [0, 7, 299])
+        self.assertEqual(SeatBitmap.from_bytes(bitmap.to_bytes()), bitmap)
+        self.assertEqual(bitmap.released([7]).indexes(), [0, 299])
+
+    def test_claim_is_compare_and_set(self):
+        """
+        Test: Un asiento ya tomado no se puede volver a tomar
+        """
+        flight = create_flight(FleetService.onboard_plane('A320', 'Airbus', 6))
+
+        self.assertIsNotNone(SeatInventoryService.claim_seats(flight.id, [3]))
+        self.assertIsNone(SeatInventoryService.claim_seats(flight.id, [3, 4]))
+        flight.refresh_from_db()
+        self.assertEqual(flight.bitmap.indexes(), [3])
+
+
+class FlightCountersTestCase(APITestCase):
+    """
+    Tests para los contadores de ocupación de los vuelos
+    """
+
+    def setUp(self):
+        """
+        Configurar avión con asientos y vuelos
+        """
+        self.plane = FleetService.onboard_plane('A320', 'Airbus', 4)
+        self.seats = plane_seats(self.plane)
+        self.flight = create_flight(self.plane)
+        self.passenger, = create_passengers(1)
+
+    def test_counters_follow_reservation_lifecycle(self):
+        """
+        Test: Crear, confirmar y cancelar mantienen los contadores
+        """
+        self.assertEqual((self.flight.reserved_count, self.flight.available_count), (0, 4))
+
+        reservation = Reservation.objects.create(
+            flight=self.flight, passenger=self.passenger, seat=self.seats[0], price=100.00
+        )
+        self.flight.refresh_from_db()
+        self.assertEqual((self.flight.reserved_count, self.flight.available_count), (1, 3))
+
+        reservation.status = 'confirmed'
+        reservation.save()
+        self.flight.refresh_from_db()
+        self.assertEqual((self.flight.reserved_count, self.flight.available_count), (1, 3))
+
+        reservation.status = 'cancelled'
+        reservation.save()
+        self.flight.refresh_from_db()
+        self.assertEqual((self.flight.reserved_count, self.flight.available_count), (0, 4))
+
+    def test_reconcile_command_fixes_drift(self):
+        """
+        Test: El comando de reconciliación recalcula los contadores
+        """
+        Reservation.objects.create(
+            flight=self.flight, passenger=self.passenger, seat=self.seats[0], price=100.00
+        )
+        Flight.objects.filter(pk=self.flight.pk).update(reserved_count=0, available_count=0)
+
+        call_command('reconcile_flight_counters', stdout=StringIO())
+
+        self.flight.refresh_from_db()
+        self.assertEqual((self.flight.reserved_count, self.flight.available_count), (1, 3))
+
+    def test_list_queries_do_not_grow_with_flights(self):
+        """
+        Test: El listado de vuelos no hace consultas extra por vuelo
+        """
+        url = reverse('flight-list')
+        with CaptureQueriesContext(connection) as single:
+            self.client.get(url)
+
+        for _ in range(5):
+            create_flight(self.plane)
+
+        with self.assertNumQueries(len(single.captured_queries)):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class ReservationEngineTestCase(TransactionTestCase):
+    """
+    Tests para el motor de reservas bajo contención
+    """
+
+    def setUp(self):
+        """
+        Configurar un vuelo con pocos asientos y muchos pasajeros
+        """
+        self.plane = FleetService.onboard_plane('A320', 'Airbus', 2)
+        self.seats = plane_seats(self.plane)
+        self.flight = create_flight(self.plane)
+        self.passengers = create_passengers(10)
+
+    def test_second_claim_gets_seat_taken(self):
+        """
+        Test: El segundo claim sobre el mismo asiento devuelve 'seat_taken'
+        """
+        first = ReservationService.reserve(self.flight, self.passengers[0], self.seats[0])
+        second = ReservationService.reserve(self.flight, self.passengers[1], self.seats[0])
+
+        self.assertTrue(first.ok)
+        self.assertEqual(second.code, 'seat_taken')
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.reserved_count, 1)
+
+    def test_concurrent_claims_single_winner(self):
+        """
+        Test: Claims concurrentes sobre un asiento producen un único ganador
+        """
+        def claim(args):
+            flight, passenger = args
+            try:
+                return ReservationService.reserve(flight, passenger, self.seats[0]).code
+            finally:
+                connection.close()
+
+        attempts = [(Flight.objects.get(pk=self.flight.pk), passenger) for passenger in self.passengers]
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            codes = list(executor.map(claim, attempts))
+
+        self.assertEqual(codes.count('ok'), 1)
+        self.assertEqual(
+            Reservation.objects.filter(flight=self.flight, seat=self.seats[0]).exclude(status='cancelled').count(),
+            1
+        )
+        self.flight.refresh_from_db()
+        self.assertEqual((self.flight.reserved_count, self.flight.available_count), (1, 1))
+
+    def test_double_cancel_releases_once(self):
+        """
+        Test: Cancelar dos veces no libera el asiento dos veces
+        """
+        reservation = ReservationService.reserve(self.flight, self.passengers[0], self.seats[0]).reservation
+        self.assertTrue(ReservationService.cancel(reservation).ok)
+        self.assertFalse(ReservationService.cancel(Reservation.objects.get(pk=reservation.pk)).ok)
+        self.flight.refresh_from_db()
+        self.assertEqual((self.flight.reserved_count, self.flight.available_count), (0, 2))
+
+
+class SeatHoldExpiryTestCase(APITestCase):
+    """
+    Tests para las retenciones de asientos con vencimiento
+    """
+
+    def setUp(self):
+        """
+        Configurar un vuelo con una reserva sin confirmar
+        """
+        self.user = User.objects.create_user(username='user', password='user123')
+        self.plane = FleetService.onboard_plane('A320', 'Airbus', 2)
+        self.seats = plane_seats(self.plane)
+        self.flight = create_flight(self.plane)
+        self.passengers = create_passengers(2)
+        self.hold = ReservationService.reserve(self.flight, self.passengers[0], self.seats[0]).reservation
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def _expire_hold(self):
+        FlightSeat.objects.filter(reservation=self.hold).update(
+            hold_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+    def test_hold_has_expiry_and_confirm_clears_it(self):
+        """
+        Test: La reserva retiene el asiento con vencimiento; confirmarla lo quita
+        """
+        flight_seat = FlightSeat.objects.get(reservation=self.hold)
+        self.assertIsNotNone(flight_seat.hold_expires_at)
+
+        self.assertTrue(ReservationService.confirm(self.hold).ok)
+        flight_seat.refresh_from_db()
+        self.assertEqual(flight_seat.status, 'occupied')
+        self.assertIsNone(flight_seat.hold_expires_at)
+
+    def test_confirmed_back_to_reserved_expires_again(self):
+        """
+        Test: Una reserva confirmada que vuelve a 'reserved' recupera el vencimiento y el barrido la libera
+        """
+        self.assertTrue(ReservationService.confirm(self.hold).ok)
+        self.client.force_authenticate(User.objects.create_user(username='admin', password='admin123', is_staff=True))
+
+        response = self.client.patch(
+            reverse('reservation-detail', kwargs={'pk': self.hold.id}), {'status': 'reserved'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        flight_seat = FlightSeat.objects.get(reservation=self.hold)
+        self.assertEqual(flight_seat.status, 'reserved')
+        self.assertIsNotNone(flight_seat.hold_expires_at)
+
+        self._expire_hold()
+        self.assertEqual(SeatInventoryService.release_expired_holds(), 1)
+        self.hold.refresh_from_db()
+        self.assertEqual(self.hold.status, 'expired')
+
+    def test_cancel_reports_why_it_failed(self):
+        """
+        Test: Cancelar una retención vencida o ya cancelada devuelve el motivo real
+        """
+        url = reverse('reservation-cancel', kwargs={'pk': self.hold.id})
+        self._expire_hold()
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'error': 'La retención de la reserva ya venció', 'code': 'invalid'})
+
+        other = ReservationService.reserve(self.flight, self.passengers[1], self.seats[1]).reservation
+        self.assertTrue(ReservationService.cancel(other).ok)
+        response = self.client.post(reverse('reservation-cancel', kwargs={'pk': other.id}))
+        self.assertEqual(response.data['error'], 'La reserva ya está cancelada')
+
+    def test_expired_hold_is_free_before_sweep(self):
+        """
+        Test: Una retención vencida figura libre antes de correr el barrido
+        """
+        self.flight.refresh_from_db()
+        self.assertNotIn(self.seats[0], self.flight.get_available_seats())
+
+        self._expire_hold()
+        self.assertIn(self.seats[0], self.flight.get_available_seats())
+        response = self.client.get(reverse('reservation-check-seat'), {
+            'flight_id': self.flight.id,
+            'seat_id': self.seats[0].id
+        })
+        self.assertTrue(response.data['available'])
+
+        result = ReservationService.reserve(self.flight, self.passengers[1], self.seats[0])
+        self.assertTrue(result.ok)
+        self.hold.refresh_from_db()
+        self.assertEqual(self.hold.status, 'expired')
+
+    def test_sweeper_releases_expired_holds(self):
+        """
+        Test: El comando de barrido libera las retenciones vencidas en lote
+        """
+        ReservationService.reserve(self.flight, self.passengers[1], self.seats[1])
+        self._expire_hold()
+
+        call_command('release_expired_holds', stdout=StringIO())
+
+        self.hold.refresh_from_db()
+        self.flight.refresh_from_db()
+        self.assertEqual(self.hold.status, 'expired')
+        self.assertEqual((self.flight.reserved_count, self.flight.available_count), (1, 1))
+        self.assertFalse(ReservationService.confirm(self.hold).ok)
+
+    def test_ticket_confirms_hold(self):
+        """
+        Test: Emitir el boleto confirma la retención y el barrido ya no la libera
+        """
+        ticket = TicketService.issue(self.hold)
+        self.hold.refresh_from_db()
+        flight_seat = FlightSeat.objects.get(reservation=self.hold)
+        self.assertEqual(ticket.reservation_id, self.hold.id)
+        self.assertEqual(self.hold.status, 'confirmed')
+        self.assertEqual((flight_seat.status, flight_seat.hold_expires_at), ('occupied', None))
+
+        self.assertEqual(SeatInventoryService.release_expired_holds(now=timezone.now() + timedelta(days=1)), 0)
+        self.assertFalse(ReservationService.reserve(self.flight, self.passengers[1], self.seats[0]).ok)
+
+    def test_ticketed_hold_never_expires(self):
+        """
+        Test: Una retención con boleto no vence aunque siga en estado 'reserved'
+        """
+        Ticket.objects.create(reservation=self.hold)
+        self._expire_hold()
+
+        self.assertEqual(SeatInventoryService.release_expired_holds(), 0)
+        self.hold.refresh_from_db()
+        self.assertEqual(self.hold.status, 'reserved')
+
+    def test_expired_hold_cannot_be_ticketed(self):
+        """
+        Test: No se emite boleto para una retención vencida
+        """
+        self._expire_hold()
+        with self.assertRaises(ValidationError):
+            TicketService.issue(self.hold)
+        self.assertFalse(Ticket.objects.filter(reservation=self.hold).exists())
+
+    def test_web_booking_is_confirmed(self):
+        """
+        Test: La reserva hecha desde la web queda confirmada, sin vencimiento, y figura en Mis reservas
+        """
+        passenger = Passenger.objects.get(user=self.user)
+        self.client.force_login(self.user)
+
+        response = self.client.post(
+            reverse('gestionVuelos:reservation_create', kwargs={'flight_id': self.flight.id}),
+            {'seat': self.seats[1].id}
+        )
+        self.assertEqual(response.status_code, 302)
+        reservation = Reservation.objects.get(passenger=passenger)
+        flight_seat = FlightSeat.objects.get(reservation=reservation)
+        self.assertEqual(reservation.status, 'confirmed')
+        self.assertEqual((flight_seat.status, flight_seat.hold_expires_at), ('occupied', None))
+
+        response = self.client.get(reverse('gestionVuelos:my_reservations'))
+        self.assertIn(reservation, response.context['reservations'])
+
+
+class GroupReservationTestCase(APITestCase):
+    """
+    Tests para la reserva grupal de asientos contiguos
+    """
+
+    def setUp(self):
+        """
+        Configurar un avión de dos filas con el asiento 1B ya reservado
+        """
+        self.user = User.objects.create_user(username='user', password='user123')
+        self.plane = FleetService.onboard_plane('A320', 'Airbus', 12)
+        self.seats = {seat.number: seat for seat in plane_seats(self.plane)}
+        self.flight = create_flight(self.plane)
+        self.passengers = create_passengers(10)
+        ReservationService.reserve(self.flight, self.passengers[-1], self.seats['1B'])
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def _book(self, size, preference='together'):
+        return self.client.post(reverse('reservation-group'), {
+            'flight_id': self.flight.id,
+            'passenger_ids': [passenger.id for passenger in self.passengers[:size]],
+            'preference': preference,
+        }, format='json')
+
+    def test_group_gets_adjacent_block_in_one_row(self):
+        """
+        Test: El grupo recibe asientos contiguos de una misma fila y el inventario queda vinculado
+        """
+        response = self._book(3)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        numbers = [item['seat']['number'] for item in response.data['reservations']]
+        # 1C queda solo: entre 1C y 1D está el pasillo
+        self.assertEqual(numbers, ['1D', '1E', '1F'])
+        self.assertEqual(
+            FlightSeat.objects.filter(flight=self.flight, reservation__isnull=False, status='reserved').count(), 4
+        )
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.reserved_count, 4)
+        self.assertEqual(self.flight.available_count, 8)
+        self.assertTrue(self.flight.bitmap.is_taken(self.seats['1E'].seat_index))
+
+    def test_block_does_not_cross_aisle(self):
+        """
+        Test: Los asientos de pasillo enfrentados (C y D) no cuentan como contiguos
+        """
+        response = self._book(2)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        numbers = [item['seat']['number'] for item in response.data['reservations']]
+        self.assertEqual(numbers, ['1D', '1E'])
+
+        # cabina 2-2: el pasillo está entre B y C, según el seat_type de cada asiento
+        free = [(i, 1, column, seat_type, i) for i, (column, seat_type) in enumerate(
+            [('A', 'window'), ('B', 'aisle'), ('C', 'aisle'), ('D', 'window')]
+        )]
+        self.assertEqual([seat.column for seat in find_seat_block(free[1:], 2)], ['C', 'D'])
+
+    def test_window_preference(self):
+        """
+        Test: Con preferencia 'window' el bloque incluye una ventanilla
+        """
+        response = self._book(3, preference='window')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        numbers = [item['seat']['number'] for item in response.data['reservations']]
+        self.assertEqual(numbers, ['1D', '1E', '1F'])
+
+    def test_group_spills_over_consecutive_rows(self):
+        """
+        Test: Si el grupo no entra en una fila se usan tramos pegados de filas consecutivas
+        """
+        response = self._book(5)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        numbers = [item['seat']['number'] for item in response.data['reservations']]
+        self.assertEqual(numbers, ['1D', '1E', '1F', '2D', '2E'])
+        self.assertEqual(Reservation.objects.filter(flight=self.flight, status='reserved').count(), 6)
+
+    def test_no_block_across_aisle_or_scattered_seats(self):
+        """
+        Test: Sin un bloque real solo 'any' acepta asientos separados
+        """
+        # 7 asientos juntos no entran sin cruzar el pasillo
+        self.assertEqual(self._book(7).status_code, status.HTTP_409_CONFLICT)
+
+        free = [(1, 1, 'A', 'window', 0), (2, 1, 'F', 'window', 5), (3, 2, 'C', 'aisle', 8)]
+        for preference in ('together', 'window', 'aisle'):
+            self.assertIsNone(find_seat_block(free, 3, preference))
+        self.assertEqual(len(find_seat_block(free, 3, 'any')), 3)
+
+    def test_multi_row_block_prefers_window(self):
+        """
+        Test: Entre bloques de igual cantidad de filas la preferencia elige el que tiene ventanilla
+        """
+        free = [
+            (1, 1, 'B', 'middle', 1), (2, 1, 'C', 'aisle', 2), (3, 1, 'D', 'aisle', 3), (4, 1, 'E', 'middle', 4),
+            (5, 2, 'B', 'middle', 7), (6, 2, 'C', 'aisle', 8), (7, 2, 'E', 'middle', 10), (8, 2, 'F', 'window', 11),
+        ]
+        together = find_seat_block(free, 4, 'together')
+        window = find_seat_block(free, 4, 'window')
+        self.assertEqual([f'{seat.row}{seat.column}' for seat in together], ['1B', '1C', '2B', '2C'])
+        self.assertEqual([f'{seat.row}{seat.column}' for seat in window], ['1D', '1E', '2E', '2F'])
+
+    def test_group_without_room_is_rejected_atomically(self):
+        """
+        Test: Si no hay lugar para todo el grupo no se reserva ningún asiento
+        """
+        response = self._book(10, preference='any')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self._book(2)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Reservation.objects.filter(flight=self.flight).count(), 11)
+
+    def test_duplicate_passengers_rejected(self):
+        """
+        Test: Un pasajero no puede aparecer dos veces en el grupo
+        """
+        response = self.client.post(reverse('reservation-group'), {
+            'flight_id': self.flight.id,
+            'passenger_ids': [self.passengers[0].id, self.passengers[0].id],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class FleetOnboardingTestCase(APITestCase):
+    """
+    Tests para el alta masiva de aviones y mapas de asientos
+    """
+
+    def test_widebody_seat_map_in_a_handful_of_queries(self):
+        """
+        Test: Un avión de 400 asientos se crea con pocas consultas
+        """
+        with CaptureQueriesContext(connection) as queries:
+            plane = FleetService.onboard_plane('777-300ER', 'Boeing', 400)
+
+        self.assertLess(len(queries), 10)
+        seats = Seat.objects.filter(plane=plane)
+        self.assertEqual(seats.count(), 400)
+        last = seats.get(number='67D')
+        self.assertEqual(last.seat_index, seat_index(67, 'D'))
+        self.assertEqual(last.seat_type, 'aisle')
+
+    def test_onboard_command_creates_fleet(self):
+        """
+        Test: El comando da de alta varios aviones con sus asientos
+        """
+        out = StringIO()
+        call_command(
+            'onboard_fleet', model='A320', manufacturer='Airbus', capacity=180, count=3, stdout=out
+        )
+        self.assertEqual(Plane.objects.filter(model='A320').count(), 3)
+        self.assertEqual(Seat.objects.filter(plane__model='A320').count(), 540)
+
+    def test_api_create_plane_generates_seat_map(self):
+        """
+        Test: Crear un avión por la API genera su mapa de asientos
+        """
+        admin = User.objects.create_user(username='admin', password='admin123', is_staff=True)
+        refresh = RefreshToken.for_user(admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+        response = self.client.post(reverse('plane-list'), {
+            'model': 'E190',
+            'manufacturer': 'Embraer',
+            'capacity': 100,
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Seat.objects.filter(plane_id=response.data['id']).count(), 100)
+        # las columnas internas (layout_version, updated_at) no son parte de la API
+        self.assertEqual(set(response.data), {'id', 'model', 'manufacturer', 'capacity'})
+
+    def test_seat_map_extends_flights_inventory(self):
+        """
+        Test: Agregar asientos a un avión con vuelos actualiza su inventario
+        """
+        plane = FleetService.onboard_plane('A320', 'Airbus', 6)
+        flight = create_flight(plane)
+        plane.capacity = 12
+        plane.save()
+
+        self.assertEqual(FleetService.generate_seat_map(plane), 6)
+        flight.refresh_from_db()
+        self.assertEqual(flight.seat_inventory.count(), 12)
+        self.assertEqual(flight.available_count, 12)
+
+    def test_capacity_reduction_removes_free_seats(self):
+        """
+        Test: Bajar la capacidad quita los asientos sobrantes sin reservas y su inventario
+        """
+        plane = FleetService.onboard_plane('A320', 'Airbus', 12)
+        flight = create_flight(plane)
+        self.assertTrue(PlaneService.update(plane.id, 'A320', 'Airbus', 6))
+
+        self.assertEqual(
+            sorted(Seat.objects.filter(plane=plane).values_list('seat_index', flat=True)), list(range(6))
+        )
+        flight.refresh_from_db()
+        self.assertEqual(flight.seat_inventory.count(), 6)
+        self.assertEqual((flight.reserved_count, flight.available_count), (0, 6))
+
+    def test_widebody_capacity_reduction_in_a_handful_of_queries(self):
+        """
+        Test: Quitar 200 asientos de un avión con vuelos no cuesta consultas por asiento
+        """
+        plane = FleetService.onboard_plane('A320', 'Airbus', 400)
+        flight = create_flight(plane)
+        other = create_flight(plane, 'Córdoba', 'Buenos Aires', timezone.now() + timedelta(days=2))
+        version = plane.layout_version
+        plane.capacity = 200
+        Plane.objects.filter(pk=plane.pk).update(capacity=200)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(FleetService.generate_seat_map(plane), 0)
+
+        self.assertLess(len(queries), 30)
+        self.assertEqual(Seat.objects.filter(plane=plane).count(), 200)
+        self.assertGreater(plane.layout_version, version)
+        for item in (flight, other):
+            item.refresh_from_db()
+            self.assertEqual(item.seat_inventory.count(), 200)
+            self.assertEqual((item.reserved_count, item.available_count), (0, 200))
+
+    def test_capacity_reduction_rejected_with_reservations(self):
+        """
+        Test: No se puede bajar la capacidad si un asiento que se quitaría tiene reservas
+        """
+        plane = FleetService.onboard_plane('A320', 'Airbus', 12)
+        flight = create_flight(plane)
+        passenger, = create_passengers(1)
+        ReservationService.reserve(flight, passenger, Seat.objects.get(plane=plane, number='2F'))
+        admin = User.objects.create_user(username='admin', password='admin123', is_staff=True)
+        self.client.force_authenticate(admin)
+
+        response = self.client.patch(reverse('plane-detail', kwargs={'pk': plane.id}), {'capacity': 6})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('capacity', response.data)
+        plane.refresh_from_db()
+        self.assertEqual(plane.capacity, 12)
+        self.assertEqual(Seat.objects.filter(plane=plane).count(), 12)
+        with self.assertRaises(ValidationError):
+            PlaneService.update(plane.id, 'A320', 'Airbus', 6)
+        plane.refresh_from_db()
+        self.assertEqual(plane.capacity, 12)
+
+
+class SeatMapCacheTestCase(APITestCase):
+    """
+    Tests para el mapa de asientos cacheado y versionado
+    """
+
+    def setUp(self):
+        """
+        Configurar un avión de seis asientos con un vuelo programado
+        """
+        cache.clear()
+        self.plane = FleetService.onboard_plane('A320', 'Airbus', 6)
+        self.flight = create_flight(self.plane)
+        self.passenger, = create_passengers(1)
+
+    def test_seats_returns_etag_and_304(self):
+        """
+        Test: El layout lleva ETag y responde 304 si no cambió
+        """
+        url = reverse('plane-seats', kwargs={'pk': self.plane.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_seats'], 6)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_layout_omits_obsolete_seat_status(self):
+        """
+        Test: Ni el layout ni el serializer de asientos exponen Seat.status ni columnas internas
+        """
+        response = self.client.get(reverse('plane-seats', kwargs={'pk': self.plane.id}))
+        self.assertEqual(set(response.data['seats'][0]), {'id', 'number', 'row', 'column', 'seat_type'})
+
+        seat = Seat.objects.filter(plane=self.plane).first()
+        self.assertEqual(
+            set(SeatSerializer(seat).data), {'id', 'plane', 'number', 'row', 'column', 'seat_type'}
+        )
+
+    def test_seat_change_bumps_layout_version(self):
+        """
+        Test: Modificar un asiento invalida el layout cacheado
+        """
+        url = reverse('plane-seats', kwargs={'pk': self.plane.id})
+        etag = self.client.get(url)['ETag']
+
+        seat = Seat.objects.get(plane=self.plane, number='1A')
+        seat.seat_type = 'premium'
+        seat.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        seat_types = {item['number']: item['seat_type'] for item in response.data['seats']}
+        self.assertEqual(seat_types['1A'], 'premium')
+
+    def test_available_seats_overlays_bitmap(self):
+        """
+        Test: La disponibilidad sale del mapa de bits sobre el layout cacheado
+        """
+        url = reverse('plane-available-seats', kwargs={'pk': self.plane.id})
+        first = self.client.get(url)
+        self.assertEqual(first.data['available_seats'], 6)
+
+        seat = Seat.objects.get(plane=self.plane, number='1C')
+        ReservationService.reserve(self.flight, self.passenger, seat)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['available_seats'], 5)
+        self.assertNotIn('1C', [item['number'] for item in response.data['seats']])
+        # el layout sale de la caché: no se vuelve a consultar la tabla de asientos
+        self.assertFalse(any('"gestionVuelos_seat"."seat_type"' in query['sql'] for query in queries))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class FlightSeatMapTestCase(APITestCase):
+    """
+    Tests para la grilla de asientos por vuelo de las páginas web
+    """
+
+    def setUp(self):
+        """
+        Configurar un vuelo de doce asientos con una reserva retenida y una confirmada
+        """
+        cache.clear()
+        self.user = User.objects.create_user(username='user', password='user123')
+        self.plane = FleetService.onboard_plane('A320', 'Airbus', 12)
+        self.flight = create_flight(self.plane)
+        self.passengers = create_passengers(2)
+        seats = {seat.number: seat for seat in plane_seats(self.plane)}
+        self.held = ReservationService.reserve(self.flight, self.passengers[0], seats['1A']).reservation
+        confirmed = ReservationService.reserve(self.flight, self.passengers[1], seats['2F']).reservation
+        ReservationService.confirm(confirmed)
+        self.flight = Flight.objects.select_related('plane').get(pk=self.flight.pk)
+
+    def _states(self, seat_map):
+        return {seat['number']: seat['state'] for _, seats in seat_map['rows'] for seat in seats}
+
+    def test_grid_built_from_one_query_and_cached(self):
+        """
+        Test: La grilla completa sale de una consulta y luego de la caché
+        """
+        with CaptureQueriesContext(connection) as queries:
+            seat_map = SeatMapService.build_for_flight(self.flight)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual([row for row, _ in seat_map['rows']], [1, 2])
+        self.assertEqual((seat_map['available'], seat_map['held'], seat_map['taken']), (10, 1, 1))
+        states = self._states(seat_map)
+        self.assertEqual(states['1A'], 'held')
+        self.assertEqual(states['2F'], 'taken')
+
+        with CaptureQueriesContext(connection) as queries:
+            SeatMapService.build_for_flight(self.flight)
+        self.assertEqual(len(queries), 0)
+
+    def test_inventory_change_invalidates_grid(self):
+        """
+        Test: Cancelar una reserva cambia la versión y la grilla se recalcula
+        """
+        SeatMapService.build_for_flight(self.flight)
+        ReservationService.cancel(self.held)
+        self.flight.refresh_from_db()
+
+        states = self._states(SeatMapService.build_for_flight(self.flight))
+        self.assertEqual(states['1A'], 'available')
+
+    def test_expired_hold_shown_as_available(self):
+        """
+        Test: Una retención vencida se muestra libre aunque la grilla esté en caché
+        """
+        SeatMapService.build_for_flight(self.flight)
+        later = timezone.now() + timedelta(days=1)
+
+        states = self._states(SeatMapService.build_for_flight(self.flight, now=later))
+        self.assertEqual(states['1A'], 'available')
+
+    def test_booking_page_uses_seat_map(self):
+        """
+        Test: La página de reserva muestra la grilla completa del vuelo
+        """
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('gestionVuelos:reservation_create', kwargs={'flight_id': self.flight.id}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.context['seat_rows'][1]), 6)
+        self.assertContains(response, 'seat-held')
+
+        response = self.client.get(reverse('gestionVuelos:flight_detail', kwargs={'pk': self.flight.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.context['available_seats']), 10)
+
+
+class AirportRouteSearchTestCase(APITestCase):
+    """
+    Tests para la búsqueda de vuelos sobre el índice de aeropuertos
+    """
+
+    def setUp(self):
+        """
+        Configurar vuelos Córdoba → Buenos Aires en el borde de un día
+        """
+        self.plane = FleetService.onboard_plane('A320', 'Airbus', 6)
+        day = timezone.make_aware(datetime(2030, 5, 10))
+        self.late = create_flight(self.plane, 'Córdoba', 'Buenos Aires', day + timedelta(hours=23, minutes=30))
+        self.next_day = create_flight(self.plane, 'Córdoba', 'Buenos Aires', day + timedelta(days=1))
+        self.other = create_flight(self.plane, 'Mendoza', 'Buenos Aires', day + timedelta(hours=10))
+
+    def test_flights_resolved_to_airports(self):
+        """
+        Test: Las ciudades de texto libre se resuelven a aeropuertos al guardar
+        """
+        self.assertEqual(self.late.origin_airport.iata_code, 'COR')
+        self.assertEqual(self.late.destination_airport.iata_code, 'AEP')
+
+        self.other.origin = 'Rio Cuarto'
+        self.other.save()
+        self.assertEqual(self.other.origin_airport.iata_code, 'RCU')
+
+    def test_search_by_code_or_unaccented_city(self):
+        """
+        Test: Se puede buscar por código IATA o por ciudad sin acentos
+        """
+        url = reverse('flight-search')
+        by_code = self.client.get(url, {'origin': 'cor', 'destination': 'AEP'})
+        by_city = self.client.get(url, {'origin': 'cordoba', 'destination': 'buenos'})
+
+        self.assertEqual({item['id'] for item in by_code.data['results']}, {self.late.id, self.next_day.id})
+        self.assertEqual({item['id'] for item in by_city.data['results']}, {self.late.id, self.next_day.id})
+
+    def test_date_filter_is_half_open_range(self):
+        """
+        Test: El día de salida es un rango semiabierto de medianoche a medianoche
+        """
+        response = self.client.get(reverse('flight-search'), {
+            'origin': 'COR',
+            'departure_date': '2030-05-10',
+        })
+        self.assertEqual([item['id'] for item in response.data['results']], [self.late.id])
+
+    def test_route_search_uses_index(self):
+        """
+        Test: La búsqueda por ruta y fecha usa el índice compuesto
+        """
+        queryset = FlightService.search('COR', 'AEP', datetime(2030, 5, 10).date())
+        plan = queryset.explain()
+        self.assertIn('flight_route_departure_idx', plan)
+
+    def test_new_airport_links_existing_flights(self):
+        """
+        Test: Al cargar un aeropuerto se asigna a los vuelos de su ciudad guardados antes
+        """
+        flight = create_flight(self.plane, 'Santa Rosa', 'Buenos Aires', self.late.departure_time)
+        self.assertIsNone(flight.origin_airport_id)
+
+        airport = Airport.objects.create(iata_code='RSA', name='Santa Rosa', city='Santa Rosa')
+        flight.refresh_from_db()
+        self.assertEqual(flight.origin_airport_id, airport.id)
+        response = self.client.get(reverse('flight-search'), {'origin': 'santa rosa'})
+        self.assertEqual([item['id'] for item in response.data['results']], [flight.id])
+
+    def test_save_without_city_change_skips_airport_lookup(self):
+        """
+        Test: Guardar un vuelo sin cambiar las ciudades no consulta aeropuertos
+        """
+        flight = Flight.objects.get(pk=create_flight(self.plane, 'Santa Rosa', 'Ushuaia', self.late.departure_time).pk)
+        flight.status = 'delayed'
+        with CaptureQueriesContext(connection) as queries:
+            flight.save()
+        self.assertFalse(any('gestionVuelos_airport' in query['sql'] for query in queries.captured_queries))
+
+
+@override_settings(SHARED_CACHE=True)
+class ConnectionSearchTestCase(APITestCase):
+    """
+    Tests para la búsqueda de itinerarios con escalas
+    """
+
+    def setUp(self):
+        """
+        Configurar un horario con vuelo directo, una escala y dos escalas
+        """
+        cache.clear()
+        ItineraryService.invalidate()
+        self.plane = FleetService.onboard_plane('A320', 'Airbus', 6)
+        self.day = timezone.make_aware(datetime(2030, 6, 1))
+        self.direct = self._flight('Salta', 'Buenos Aires', 8, 10)
+        self.first_leg = self._flight('Salta', 'Córdoba', 7, 8)
+        self.connection = self._flight('Córdoba', 'Buenos Aires', 9, 10)
+        self.too_soon = self._flight('Córdoba', 'Buenos Aires', 8, 9, minute=20)
+        self.to_mendoza = self._flight('Córdoba', 'Mendoza', 9, 10, minute=30)
+        self.mendoza_leg = self._flight('Mendoza', 'Buenos Aires', 12, 14)
+
+    def _flight(self, origin, destination, departure_hour, arrival_hour, minute=0):
+        departure = self.day + timedelta(hours=departure_hour, minutes=minute)
+        return create_flight(
+            self.plane, origin, destination, departure, timedelta(hours=arrival_hour - departure_hour)
+        )
+
+    def _search(self, **params):
+        return self.client.get(reverse('flight-connections'), {
+            'origin': 'SLA',
+            'destination': 'Buenos Aires',
+            'departure_date': '2030-06-01',
+            **params,
+        })
+
+    def test_itineraries_respect_connection_times(self):
+        """
+        Test: Se devuelven directos y conexiones válidas, sin conexiones demasiado cortas
+        """
+        response = self._search()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        routes = [[leg['flight_id'] for leg in item['legs']] for item in response.data['itineraries']]
+        self.assertEqual(routes, [
+            [self.direct.id],
+            [self.first_leg.id, self.connection.id],
+            [self.first_leg.id, self.to_mendoza.id, self.mendoza_leg.id],
+        ])
+        self.assertNotIn([self.first_leg.id, self.too_soon.id], routes)
+        self.assertEqual(response.data['itineraries'][2]['stops'], 2)
+
+    def test_max_stops_and_max_connection(self):
+        """
+        Test: max_stops y max_connection acotan los itinerarios
+        """
+        response = self._search(max_stops=1, min_connection=30, max_connection=50)
+        routes = [[leg['flight_id'] for leg in item['legs']] for item in response.data['itineraries']]
+        self.assertEqual(routes, [[self.direct.id]])
+
+    def test_graph_updated_incrementally(self):
+        """
+        Test: Un vuelo nuevo o cancelado se aplica al grafo sin reconstruirlo
+        """
+        graph = ItineraryService.graph()
+        with self.captureOnCommitCallbacks(execute=True):
+            late = self._flight('Salta', 'Buenos Aires', 20, 22)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.direct.status = 'cancelled'
+            self.direct.save()
+
+        with self.assertNumQueries(0):
+            self.assertIs(ItineraryService.graph(), graph)
+        routes = [[leg['flight_id'] for leg in item['legs']] for item in self._search().data['itineraries']]
+        self.assertIn([late.id], routes)
+        self.assertNotIn([self.direct.id], routes)
+
+    def _write_from_other_worker(self, change):
+        """
+        Ejecuta ``change`` como otro proceso (sin grafo propio) y devuelve
+        el estado del grafo de este proceso tal como estaba
+        """
+        graph = ItineraryService.graph()
+        this_worker = (ItineraryService._graph, ItineraryService._version)
+        ItineraryService.invalidate()
+        with self.captureOnCommitCallbacks(execute=True):
+            result = change()
+        ItineraryService._graph, ItineraryService._version = this_worker
+        return graph, result
+
+    def test_other_worker_applies_changes_by_version(self):
+        """
+        Test: Otro proceso aplica los vuelos cambiados por versión, con una consulta y sin reconstruir
+        """
+        def change():
+            self.direct.status = 'cancelled'
+            self.direct.save()
+            return self._flight('Salta', 'Buenos Aires', 20, 22)
+
+        graph, late = self._write_from_other_worker(change)
+
+        with self.assertNumQueries(1):
+            self.assertIs(ItineraryService.graph(), graph)
+        self.assertIn(late.id, graph.legs)
+        self.assertNotIn(self.direct.id, graph.legs)
+
+    def test_other_worker_rebuilds_without_deltas(self):
+        """
+        Test: Si los cambios ya no están en la caché, el grafo se reconstruye
+        """
+        graph, late = self._write_from_other_worker(lambda: self._flight('Salta', 'Buenos Aires', 20, 22))
+        cache.delete(SCHEDULE_DELTA_KEY.format(cache.get(SCHEDULE_VERSION_KEY)))
+
+        rebuilt = ItineraryService.graph()
+        self.assertIsNot(rebuilt, graph)
+        self.assertIn(late.id, rebuilt.legs)
+
+    def test_graph_from_db_without_shared_cache(self):
+        """
+        Test: Sin caché compartida cada búsqueda arma el grafo con el horario de la base
+        """
+        with override_settings(SHARED_CACHE=False):
+            graph = ItineraryService.graph()
+            late = self._flight('Salta', 'Buenos Aires', 20, 22)
+            current = ItineraryService.graph()
+
+        self.assertIsNot(current, graph)
+        self.assertNotIn(late.id, graph.legs)
+        self.assertIn(late.id, current.legs)
+        self.assertIsNone(ItineraryService._graph)
+
+    def test_missing_params(self):
+        """
+        Test: origin, destination y departure_date son obligatorios
+        """
+        response = self.client.get(reverse('flight-connections'), {'origin': 'SLA'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(SHARED_CACHE=True)
+class CityAutocompleteTestCase(APITestCase):
+    """
+    Tests para el autocompletado de ciudades
+    """
+
+    def setUp(self):
+        """
+        Configurar vuelos con ciudades con y sin aeropuerto cargado
+        """
+        cache.clear()
+        AutocompleteService._index = None
+        self.plane = FleetService.onboard_plane('A320', 'Airbus', 6)
+        create_flight(self.plane, 'Río Cuarto', 'Córdoba')
+        create_flight(self.plane, 'San Martín de los Andes', 'Buenos Aires')
+
+    def _cities(self, query):
+        response = self.client.get(reverse('flight-autocomplete'), {'q': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['city'] for item in response.data['suggestions']]
+
+    def test_prefix_ignores_accents_and_case(self):
+        """
+        Test: El prefijo se compara sin acentos ni mayúsculas
+        """
+        self.assertEqual(self._cities('RIO'), ['Río Cuarto'])
+        self.assertEqual(self._cities('cór')[0], 'Córdoba')
+        self.assertIn('San Martín de los Andes', self._cities('martin'))
+        self.assertEqual(self._cities('aep'), ['Buenos Aires'])
+
+    def test_served_from_memory(self):
+        """
+        Test: Con el índice armado las sugerencias no consultan la base
+        """
+        self._cities('sa')
+        with self.assertNumQueries(0):
+            AutocompleteService.suggest('sa')
+
+    def test_index_rebuilt_when_cities_change(self):
+        """
+        Test: Una ciudad nueva aparece en las sugerencias
+        """
+        self.assertEqual(self._cities('ushu'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            create_flight(self.plane, 'Ushuaia', 'Buenos Aires')
+        self.assertEqual(self._cities('ushu'), ['Ushuaia'])
+
+    def test_index_from_db_without_shared_cache(self):
+        """
+        Test: Sin caché compartida una ciudad nueva aparece sin pasar por la versión
+        """
+        with override_settings(SHARED_CACHE=False):
+            self.assertEqual(self._cities('ushu'), [])
+            # sin ejecutar los on_commit: nadie sube la versión, como si el
+            # vuelo se hubiera guardado en otro proceso
+            create_flight(self.plane, 'Ushuaia', 'Buenos Aires')
+            self.assertEqual(self._cities('ushu'), ['Ushuaia'])
+        self.assertIsNone(AutocompleteService._index)
+
+
+@override_settings(SHARED_CACHE=True)
+class FareCalendarTestCase(APITestCase):
+    """
+    Tests para el calendario de tarifas por ruta
+    """
+
+    def setUp(self):
+        """
+        Configurar dos vuelos el mismo día y uno al día siguiente
+        """
+        cache.clear()
+        self.plane = FleetService.onboard_plane('A320', 'Airbus', 6)
+        self.day = timezone.make_aware(datetime(2030, 7, 10))
+        self.cheap = self._flight(self.day + timedelta(hours=8), 80)
+        self._flight(self.day + timedelta(hours=18), 120)
+        self._flight(self.day + timedelta(days=1, hours=9), 150)
+
+    def _flight(self, departure, price):
+        return create_flight(self.plane, 'Córdoba', 'Buenos Aires', departure, base_price=price)
+
+    def _calendar(self):
+        response = self.client.get(reverse('flight-calendar'), {
+            'origin': 'COR',
+            'destination': 'Buenos Aires',
+            'month': '2030-07',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['days']
+
+    def test_min_price_and_seats_per_day(self):
+        """
+        Test: Una fila por día con la tarifa mínima y los asientos libres
+        """
+        days = self._calendar()
+
+        self.assertEqual([day['date'].isoformat() for day in days], ['2030-07-10', '2030-07-11'])
+        self.assertEqual(days[0]['min_price'], Decimal('80.00'))
+        self.assertEqual(days[0]['available_seats'], 12)
+        self.assertEqual(days[0]['flights'], 2)
+
+    def test_cached_and_invalidated_on_flight_save(self):
+        """
+        Test: El mes queda en caché y se invalida al guardar un vuelo de la ruta
+        """
+        self._calendar()
+        with self.assertNumQueries(2):
+            # solo la resolución de aeropuertos; el calendario sale de la caché
+            self._calendar()
+
+        self.cheap.base_price = 60
+        self.cheap.save()
+        self.assertEqual(self._calendar()[0]['min_price'], Decimal('60.00'))
+
+    def test_not_cached_without_shared_cache(self):
+        """
+        Test: Sin caché compartida el calendario se calcula en cada consulta
+        """
+        with override_settings(SHARED_CACHE=False):
+            self._calendar()
+            # como si otro proceso hubiera editado el vuelo: no invalida nada acá
+            Flight.objects.filter(pk=self.cheap.pk).update(base_price=60)
+            days = self._calendar()
+        self.assertEqual(days[0]['min_price'], Decimal('60.00'))
+        key = FareCalendarService._flight_key(self.cheap.origin, self.cheap.destination, self.cheap.departure_time)
+        self.assertIsNone(cache.get(key))
+
+    def test_invalid_month(self):
+        """
+        Test: El mes debe tener formato YYYY-MM
+        """
+        response = self.client.get(reverse('flight-calendar'), {
+            'origin': 'COR', 'destination': 'AEP', 'month': 'julio'
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CursorPaginationTestCase(APITestCase):
+    """
+    Tests para la paginación por cursor de los listados
+    """
+
+    def setUp(self):
+        """
+        Configurar 25 vuelos, varios con la misma hora de salida
+        """
+        self.plane = FleetService.onboard_plane('A320', 'Airbus', 6)
+        departure = timezone.now() + timedelta(days=1)
+        for i in range(25):
+            create_flight(self.plane, 'Córdoba', 'Buenos Aires', departure + timedelta(hours=i // 3))
+
+    def test_walks_every_page_without_offset_or_count(self):
+        """
+        Test: Las páginas recorren todos los vuelos en orden, sin OFFSET ni COUNT
+        """
+        url = reverse('flight-list') + '?page_size=10'
+        seen = []
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                seen.extend(item['id'] for item in response.data['results'])
+                url = response.data['next']
+
+        expected = list(Flight.objects.order_by('departure_time', 'id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+        sql = ' '.join(query['sql'].upper() for query in queries)
+        self.assertNotIn('OFFSET', sql)
+        self.assertNotIn('COUNT(', sql)
+
+    def test_previous_link_returns_same_page(self):
+        """
+        Test: El enlace anterior vuelve exactamente a la página previa
+        """
+        url = reverse('flight-list') + '?page_size=7'
+        first = self.client.get(url)
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+
+        self.assertEqual(
+            [item['id'] for item in back.data['results']],
+            [item['id'] for item in first.data['results']]
+        )
+        self.assertIsNone(back.data['previous'])
+
+    def test_page_size_is_capped(self):
+        """
+        Test: page_size no puede superar el tope configurado
+        """
+        with mock.patch.object(KeysetCursorPagination, 'max_page_size', 5):
+            response = self.client.get(reverse('flight-available'), {'page_size': 10000})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNotNone(response.data['next'])
+
+
+class StreamingListTestCase(APITestCase):
+    """
+    Tests para el modo streaming de los listados (?stream=1)
+    """
+
+    def setUp(self):
+        """
+        Configurar 12 vuelos con un avión
+        """
+        self.plane = FleetService.onboard_plane('A320', 'Airbus', 6)
+        departure = timezone.now() + timedelta(days=1)
+        for i in range(12):
+            origin = 'Córdoba' if i % 2 else 'Mendoza'
+            create_flight(self.plane, origin, 'Buenos Aires', departure + timedelta(hours=i))
+
+    def _stream(self, url, params=None):
+        response = self.client.get(url, dict(params or {}, stream='1'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_stream_matches_regular_serialization(self):
+        """
+        Test: El arreglo en streaming trae todos los elementos, igual que la API paginada
+        """
+        streamed = self._stream(reverse('flight-list'))
+        paged = self.client.get(reverse('flight-list'), {'page_size': 100}).data['results']
+
+        self.assertEqual(len(streamed), 12)
+        self.assertEqual(streamed, json.loads(json.dumps(paged, cls=JSONEncoder)))
+
+    def test_stream_writes_in_chunks(self):
+        """
+        Test: El queryset se recorre por lotes y cada lote se escribe por separado
+        """
+        with mock.patch.object(FlightViewSet, 'stream_chunk_size', 5):
+            response = self.client.get(reverse('flight-list'), {'stream': '1'})
+            chunks = list(response.streaming_content)
+
+        # '[' + 3 lotes (5, 5, 2) + ']'
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(len(json.loads(b''.join(chunks))), 12)
+
+    def test_stream_applies_action_filters(self):
+        """
+        Test: Las acciones de listado también aceptan stream y respetan sus filtros
+        """
+        streamed = self._stream(reverse('flight-search'), {'origin': 'Córdoba'})
+        self.assertEqual(len(streamed), 6)
+        self.assertTrue(all(item['origin'] == 'Córdoba' for item in streamed))
+
+    def test_empty_stream_is_valid_json(self):
+        """
+        Test: Sin resultados el streaming devuelve un arreglo vacío
+        """
+        Flight.objects.all().delete()
+        self.assertEqual(self._stream(reverse('flight-list')), [])
+
+
+class QueryPlanTestCase(APITestCase):
+    """
+    Tests para la optimización de querysets derivada de los serializers
+    """
+
+    def setUp(self):
+        """
+        Configurar 16 reservas con boleto repartidas en dos vuelos
+        """
+        self.admin_user = User.objects.create_user(
+            username='admin', password='admin123', is_staff=True
+        )
+        self.client.force_authenticate(self.admin_user)
+        plane = FleetService.onboard_plane('A320', 'Airbus', 12)
+        seats = plane_seats(plane)
+        departure = timezone.now() + timedelta(days=1)
+        flights = [
+            create_flight(plane, 'Córdoba', 'Buenos Aires', departure + timedelta(hours=i))
+            for i in range(2)
+        ]
+        for i, passenger in enumerate(create_passengers(16)):
+            reservation = Reservation.objects.create(
+                flight=flights[i % 2],
+                passenger=passenger,
+                seat=seats[i // 2],
+                status='confirmed',
+                price=100.00
+            )
+            Ticket.objects.create(reservation=reservation)
+
+    def _queries(self, name, page_size):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name), {'page_size': page_size})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), page_size)
+        return len(queries)
+
+    def test_constant_queries_per_page(self):
+        """
+        Test: Cada listado hace las mismas consultas para 2 o 15 filas por página
+        """
+        for name in ('reservation-list', 'ticket-list', 'passenger-list'):
+            with self.subTest(name):
+                self.assertEqual(self._queries(name, 2), self._queries(name, 15))
+        self.assertEqual(self._queries('flight-list', 1), self._queries('flight-list', 2))
+
+    def test_ticket_list_is_a_single_query(self):
+        """
+        Test: El listado de boletos trae reserva, pasajero, vuelo, avión y asiento en un JOIN
+        """
+        self.assertEqual(self._queries('ticket-list', 15), 1)
+
+    def test_plan_follows_nested_serializers(self):
+        """
+        Test: El plan sigue los serializers anidados e ignora los campos de solo escritura
+        """
+        plan = query_plan(TicketSerializer)
+        self.assertEqual(plan.select_related, (
+            'reservation__flight__plane', 'reservation__passenger', 'reservation__seat'
+        ))
+        self.assertEqual(plan.prefetch_related, ())
+        self.assertEqual(query_plan(SeatSerializer).select_related, ())
+
+
+class FullFlightMixin:
+    """
+    Datos compartidos por los tests de la API: un avión de 6 asientos con
+    un vuelo completo (6 reservas), un boleto y un administrador autenticado
+    """
+
+    def setUp(self):
+        """
+        Configurar un vuelo con 6 reservas y un boleto
+        """
+        super().setUp()
+        self.admin_user = User.objects.create_user(
+            username='admin', password='admin123', is_staff=True
+        )
+        self.client.force_authenticate(self.admin_user)
+        self.plane = FleetService.onboard_plane('A320', 'Airbus', 6)
+        self.flight = create_flight(self.plane, 'Córdoba', 'Buenos Aires')
+        seats = plane_seats(self.plane)
+        self.reservations = [
+            Reservation.objects.create(
+                flight=self.flight,
+                passenger=passenger,
+                seat=seat,
+                status='reserved',
+                price=100.00
+            )
+            for passenger, seat in zip(create_passengers(len(seats)), seats)
+        ]
+        self.ticket = Ticket.objects.create(reservation=self.reservations[0])
+
+
+class EmptyFlightMixin(FullFlightMixin):
+    """
+    FullFlightMixin más un segundo vuelo del mismo avión, sin reservas
+    """
+
+    def setUp(self):
+        """
+        Agregar un vuelo vacío al vuelo completo
+        """
+        super().setUp()
+        self.seats = plane_seats(self.plane)
+        departure = timezone.now() + timedelta(days=2)
+        self.empty_flight = FlightService.bulk_create([Flight(
+            plane=self.plane,
+            origin='Córdoba',
+            destination='Mendoza',
+            departure_time=departure,
+            arrival_time=departure + timedelta(hours=2),
+            duration=timedelta(hours=2),
+            status='scheduled',
+            base_price=150.00
+        )])[0]
+
+
+class ProjectionTestCase(FullFlightMixin, APITestCase):
+    """
+    Tests para las proyecciones con values_list de los endpoints anidados
+    """
+
+    def test_projection_builds_nested_shape(self):
+        """
+        Test: La proyección arma el dict anidado con los mismos valores que los modelos
+        """
+        data = TICKET.first(Ticket.objects.filter(pk=self.ticket.pk))
+        reservation = self.reservations[0]
+
+        self.assertEqual(data['barcode'], self.ticket.barcode)
+        self.assertEqual(data['reservation']['reservation_code'], reservation.reservation_code)
+        self.assertEqual(data['reservation']['passenger']['birth_date'], date(1990, 1, 1))
+        self.assertEqual(data['reservation']['flight']['plane'], {
+            'id': self.plane.id, 'model': 'A320', 'manufacturer': 'Airbus', 'capacity': 6,
+        })
+        self.assertEqual(data['reservation']['seat']['number'], reservation.seat.number)
+
+    def test_same_model_group_does_not_join(self):
+        """
+        Test: on('') agrupa columnas del propio modelo sin seguir una relación
+        """
+        self.assertIn('reservation_code', FLIGHT_PASSENGER.columns)
+        self.assertIn('passenger__email', FLIGHT_PASSENGER.columns)
+        row = FLIGHT_PASSENGER.first(Reservation.objects.filter(pk=self.reservations[1].pk))
+        self.assertEqual(row['reservation']['id'], self.reservations[1].id)
+
+    def test_endpoints_use_one_query_per_shape(self):
+        """
+        Test: Boleto por código en una consulta y pasajeros del vuelo en dos
+        """
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('ticket-by-barcode'), {'barcode': self.ticket.barcode})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['reservation']['flight']['origin'], 'Córdoba')
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('flight-passengers', kwargs={'pk': self.flight.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_passengers'], 6)
+        self.assertEqual(response.data['flight']['id'], self.flight.id)
+
+    def test_missing_object_returns_404(self):
+        """
+        Test: Un vuelo o pasajero inexistente sigue respondiendo 404
+        """
+        response = self.client.get(reverse('flight-passengers', kwargs={'pk': 999999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse('passenger-active-reservations', kwargs={'pk': 999999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class FastRendererTestCase(FullFlightMixin, APITestCase):
+    """
+    Tests para el renderer JSON rápido y la negociación de msgpack
+    """
+
+    def _reference(self, response):
+        # salida del JSONRenderer estándar de DRF para los mismos datos
+        return JSONRenderer().render(response.data, 'application/json', {})
+
+    def test_json_bytes_match_drf_renderer(self):
+        """
+        Test: Listados con serializers anidados y respuestas armadas a mano dan los mismos bytes
+        """
+        responses = [
+            self.client.get(reverse('reservation-list')),
+            self.client.get(reverse('ticket-list')),
+            self.client.get(reverse('ticket-by-barcode'), {'barcode': self.ticket.barcode}),
+            self.client.get(reverse('passenger-reservations', kwargs={'pk': self.reservations[0].passenger_id})),
+        ]
+        for response in responses:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.content, self._reference(response))
+
+    def test_special_values_and_fallback(self):
+        """
+        Test: Decimal, timedelta, fechas con zona y datos no soportados por orjson
+        """
+        data = {
+            'price': Decimal('1234.50'),
+            'duration': timedelta(hours=2, minutes=30),
+            'departure_time': datetime.fromisoformat('2030-01-02T03:04:05.678+00:00'),
+            'birth_date': date(1990, 1, 1),
+            'text': 'Córdoba   línea',
+            'big': 2 ** 70,
+        }
+        expected = JSONRenderer().render(data)
+        self.assertEqual(FastJSONRenderer().render(data), expected)
+
+    def test_parser_reads_json_like_drf(self):
+        """
+        Test: El parser rápido devuelve lo mismo que el JSONParser de DRF
+        """
+        body = '{"full_name":"José Pérez","items":[1,2.5,null,true]}'.encode('utf-8')
+        self.assertEqual(
+            FastJSONParser().parse(BytesIO(body)),
+            JSONParser().parse(BytesIO(body)),
+        )
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"price": NaN}'))
+
+    def test_msgpack_negotiation_matches_json_values(self):
+        """
+        Test: Con Accept: application/msgpack se devuelven los mismos valores que en JSON
+        """
+        url = reverse('ticket-by-barcode')
+        response = self.client.get(url, {'barcode': self.ticket.barcode}, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), json.loads(self._reference(response)))
+
+    def test_msgpack_request_body(self):
+        """
+        Test: Se puede crear un pasajero enviando el cuerpo en msgpack
+        """
+        body = msgpack.packb({
+            'full_name': 'Ana Gomez',
+            'document_type': 'DNI',
+            'document_number': '55555555',
+            'email': 'ana@email.com',
+            'phone': '1234567890',
+            'birth_date': '1995-05-05',
+        })
+        response = self.client.post(reverse('passenger-list'), body, content_type='application/msgpack')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Passenger.objects.filter(document_number='55555555').exists())
+
+
+class SparseFieldsTestCase(FullFlightMixin, APITestCase):
+    """
+    Tests para ?fields= y ?expand= en los serializers
+    """
+
+    def test_departures_board_reads_only_requested_columns(self):
+        """
+        Test: Con fields= solo se devuelven y se consultan esos campos
+        """
+        fields = ['id', 'origin', 'destination', 'departure_time', 'status']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('flight-list'), {'fields': ','.join(fields)})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data['results'][0].keys()), fields)
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql']
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('base_price', sql)
+        self.assertNotIn('available_count', sql)
+
+    def test_nested_objects_are_ids_unless_expanded(self):
+        """
+        Test: El avión sale como ID salvo que se pida expand=plane
+        """
+        collapsed = self.client.get(reverse('flight-list'), {'fields': 'id,plane'}).data['results'][0]
+        self.assertEqual(collapsed, {'id': self.flight.id, 'plane': self.plane.id})
+
+        expanded = self.client.get(reverse('flight-list'), {'expand': 'plane'}).data['results'][0]
+        self.assertEqual(expanded['plane']['model'], 'A320')
+        # los campos calculados no se calculan si no se nombran
+        self.assertNotIn('available_seats', expanded)
+        self.assertNotIn('total_seats', expanded)
+
+    def test_expensive_fields_run_only_when_requested(self):
+        """
+        Test: available_seats y total_seats se calculan al pedirlos, con el JOIN justo
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('flight-list'), {'fields': 'id,available_seats,total_seats'})
+
+        self.assertEqual(response.data['results'][0], {
+            'id': self.flight.id,
+            'available_seats': self.flight.seats_available(),
+            'total_seats': 6,
+        })
+        self.assertEqual(len(queries), 1)
+
+    def test_dotted_fields_select_nested_attributes(self):
+        """
+        Test: fields=flight.origin expande el vuelo con solo ese campo
+        """
+        response = self.client.get(reverse('reservation-list'), {'fields': 'id,flight.origin,seat'})
+
+        row = response.data['results'][0]
+        self.assertEqual(set(row.keys()), {'id', 'flight', 'seat'})
+        self.assertEqual(row['flight'], {'origin': 'Córdoba'})
+        self.assertIsInstance(row['seat'], int)
+
+    def test_full_representation_without_parameters(self):
+        """
+        Test: Sin fields ni expand la respuesta es la de siempre
+        """
+        row = self.client.get(reverse('flight-list')).data['results'][0]
+        self.assertEqual(row['plane']['capacity'], 6)
+        self.assertIn('available_seats', row)
+        self.assertIn('total_seats', row)
+
+
+class SideloadTestCase(FullFlightMixin, APITestCase):
+    """
+    Tests para el formato con included de los listados (?sideload=1)
+    """
+
+    def test_related_objects_are_serialized_once(self):
+        """
+        Test: El vuelo y el avión aparecen una sola vez en included
+        """
+        response = self.client.get(reverse('reservation-list'), {'sideload': '1'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        included = response.data['included']
+        self.assertEqual(list(included['flight'].keys()), [str(self.flight.id)])
+        self.assertEqual(list(included['plane'].keys()), [str(self.plane.id)])
+        self.assertEqual(len(included['passenger']), 6)
+        self.assertEqual(len(included['seat']), 6)
+        for row in response.data['results']:
+            self.assertEqual(row['flight'], self.flight.id)
+        flight = included['flight'][str(self.flight.id)]
+        self.assertEqual(flight['plane'], self.plane.id)
+        self.assertEqual(flight['origin'], 'Córdoba')
+
+    def test_same_queries_and_smaller_payload(self):
+        """
+        Test: El formato con included no agrega consultas y pesa menos que el anidado
+        """
+        with CaptureQueriesContext(connection) as nested_queries:
+            nested = self.client.get(reverse('reservation-list'))
+        with CaptureQueriesContext(connection) as sideload_queries:
+            sideloaded = self.client.get(reverse('reservation-list'), {'sideload': '1'})
+
+        self.assertEqual(len(sideload_queries), len(nested_queries))
+        self.assertLess(len(sideloaded.content), len(nested.content))
+
+    def test_nested_levels_are_sideloaded(self):
+        """
+        Test: En boletos, la reserva y todo lo que cuelga de ella va a included
+        """
+        response = self.client.get(reverse('ticket-list'), {'sideload': '1'})
+
+        row = response.data['results'][0]
+        self.assertEqual(row['reservation'], self.reservations[0].id)
+        reservation = response.data['included']['reservation'][str(self.reservations[0].id)]
+        self.assertEqual(reservation['flight'], self.flight.id)
+        self.assertIn(str(self.flight.id), response.data['included']['flight'])
+
+    def test_default_format_is_unchanged(self):
+        """
+        Test: Sin sideload las filas siguen anidadas y no hay included
+        """
+        response = self.client.get(reverse('reservation-list'))
+        self.assertNotIn('included', response.data)
+        self.assertEqual(response.data['results'][0]['flight']['id'], self.flight.id)
+
+
+class BulkCreateTestCase(EmptyFlightMixin, APITestCase):
+    """
+    Tests para las altas masivas (POST .../bulk/)
+    """
+
+    def _passenger_rows(self, count, start=50000000):
+        return [{
+            'full_name': f'Pasajero Lote{i}',
+            'document_type': 'DNI',
+            'document_number': f'{start + i}',
+            'email': f'lote{i}@email.com',
+            'phone': '1234567890',
+            'birth_date': '1990-01-01',
+        } for i in range(count)]
+
+    def test_bulk_passengers_constant_queries(self):
+        """
+        Test: El alta de pasajeros en lote no hace consultas por fila
+        """
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.post(reverse('passenger-bulk'), self._passenger_rows(2), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post(
+                reverse('passenger-bulk'), self._passenger_rows(20, start=60000000), format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 20)
+        self.assertEqual(len(large), len(small))
+        self.assertTrue(Passenger.objects.filter(document_number='60000019').exists())
+
+    def test_bulk_passengers_reports_errors_per_row(self):
+        """
+        Test: Los documentos repetidos o existentes se informan en su fila y no se crea nada
+        """
+        rows = self._passenger_rows(3)
+        rows[1]['document_number'] = rows[0]['document_number']
+        rows[2]['document_number'] = '40000000'
+
+        response = self.client.post(reverse('passenger-bulk'), rows, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('document_number', response.data[1])
+        self.assertIn('document_number', response.data[2])
+        self.assertFalse(Passenger.objects.filter(document_number=rows[0]['document_number']).exists())
+
+    def test_bulk_flights_create_inventory(self):
+        """
+        Test: Los vuelos creados en lote tienen su inventario de asientos
+        """
+        departure = timezone.now() + timedelta(days=3)
+        rows = [{
+            'plane_id': self.plane.id,
+            'origin': 'Córdoba',
+            'destination': destination,
+            'departure_time': departure.isoformat(),
+            'arrival_time': (departure + timedelta(hours=2)).isoformat(),
+            'duration': '02:00:00',
+            'status': 'scheduled',
+            'base_price': '120.00',
+        } for destination in ('Salta', 'Rosario')]
+
+        response = self.client.post(reverse('flight-bulk'), rows, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        for item in response.data:
+            flight = Flight.objects.get(pk=item['id'])
+            self.assertEqual(flight.available_count, len(self.seats))
+            self.assertEqual(FlightSeat.objects.filter(flight=flight).count(), len(self.seats))
+
+    def test_bulk_reservations_claim_seats(self):
+        """
+        Test: Las reservas en lote toman los asientos del vuelo en una sola operación
+        """
+        passengers = [reservation.passenger for reservation in self.reservations[:2]]
+        rows = [
+            {'passenger_id': passenger.id, 'flight_id': self.empty_flight.id, 'seat_id': seat.id, 'price': '150.00'}
+            for passenger, seat in zip(passengers, self.seats)
+        ]
+
+        response = self.client.post(reverse('reservation-bulk'), rows, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.empty_flight.refresh_from_db()
+        self.assertEqual(self.empty_flight.available_count, len(self.seats) - 2)
+        self.assertEqual(
+            [item['seat']['id'] for item in response.data], [seat.id for seat in self.seats[:2]]
+        )
+
+    def test_bulk_reservations_taken_seat_error(self):
+        """
+        Test: Un asiento tomado o repetido en el lote se informa en su fila
+        """
+        passenger = self.reservations[0].passenger
+        rows = [
+            {'passenger_id': passenger.id, 'flight_id': self.empty_flight.id, 'seat_id': self.seats[0].id, 'price': '150.00'},
+            {'passenger_id': passenger.id, 'flight_id': self.empty_flight.id, 'seat_id': self.seats[0].id, 'price': '150.00'},
+            {'passenger_id': passenger.id, 'flight_id': self.flight.id, 'seat_id': self.seats[1].id, 'price': '150.00'},
+        ]
+
+        response = self.client.post(reverse('reservation-bulk'), rows, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('seat_id', response.data[1])
+        self.assertIn('seat_id', response.data[2])
+        self.assertFalse(Reservation.objects.filter(flight=self.empty_flight).exists())
+
+    def test_bulk_requires_admin(self):
+        """
+        Test: Solo los administradores pueden usar las altas masivas
+        """
+        user = User.objects.create_user(username='cliente', password='cliente123')
+        self.client.force_authenticate(user)
+
+        response = self.client.post(reverse('passenger-bulk'), self._passenger_rows(1), format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ValidationQueryBudgetTestCase(EmptyFlightMixin, APITestCase):
+    """
+    Tests para la validación de serializers con relaciones resueltas en una consulta
+    """
+
+    def setUp(self):
+        """
+        Tomar el pasajero de la primera reserva del vuelo completo
+        """
+        super().setUp()
+        self.passenger = self.reservations[0].passenger
+
+    def _reservation_serializer(self, **overrides):
+        data = {
+            'passenger_id': self.passenger.id,
+            'flight_id': self.empty_flight.id,
+            'seat_id': self.seats[0].id,
+            'price': '150.00',
+        }
+        data.update(overrides)
+        return ReservationSerializer(data=data)
+
+    def test_reservation_validation_single_query(self):
+        """
+        Test: Validar una reserva hace una sola consulta y deja vuelo y asiento resueltos
+        """
+        serializer = self._reservation_serializer()
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        self.assertEqual(serializer.validated_data['flight'].plane_id, self.plane.id)
+        self.assertEqual(serializer.validated_data['seat'], self.seats[0])
+        self.assertEqual(serializer.validated_data['passenger_id'], self.passenger.id)
+
+    def test_reservation_validation_taken_seat(self):
+        """
+        Test: Un asiento tomado se rechaza con la misma consulta
+        """
+        serializer = self._reservation_serializer(flight_id=self.flight.id)
+        with self.assertNumQueries(1):
+            self.assertFalse(serializer.is_valid())
+        self.assertIn('ya está reservado', str(serializer.errors['non_field_errors'][0]))
+
+    def test_reservation_validation_missing_references(self):
+        """
+        Test: Pasajero, vuelo o asiento inexistentes se informan en su campo
+        """
+        serializer = self._reservation_serializer(passenger_id=999999)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('passenger_id', serializer.errors)
+
+        serializer = self._reservation_serializer(flight_id=999999)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('flight_id', serializer.errors)
+
+        other_plane = FleetService.onboard_plane('E190', 'Embraer', 4)
+        other_seat = Seat.objects.filter(plane=other_plane).first()
+        serializer = self._reservation_serializer(seat_id=other_seat.id)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('no pertenece', str(serializer.errors['non_field_errors'][0]))
+
+    def test_reservation_create_query_budget(self):
+        """
+        Test: Crear una reserva por la API no consulta los aviones por separado
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('reservation-list'), {
+                'passenger_id': self.passenger.id,
+                'flight_id': self.empty_flight.id,
+                'seat_id': self.seats[0].id,
+                'price': '150.00',
+            }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['passenger']['id'], self.passenger.id)
+        plane_reads = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "gestionVuelos_plane"' in query['sql']
+        ]
+        self.assertEqual(plane_reads, [])
+
+    def test_seat_validation_single_query(self):
+        """
+        Test: Validar un asiento resuelve el avión y el número repetido en una consulta
+        """
+        data = {'plane': self.plane.id, 'number': '9Z', 'row': 9, 'column': 'Z', 'seat_type': 'economy'}
+        serializer = SeatSerializer(data=data)
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data['plane'], self.plane)
+
+        serializer = SeatSerializer(data=dict(data, number=self.seats[0].number))
+        with self.assertNumQueries(1):
+            self.assertFalse(serializer.is_valid())
+
+
+class LeanSaveTestCase(FullFlightMixin, APITestCase):
+    """
+    Tests para los save() que validan en memoria y dejan la unicidad a la base
+    """
+
+    def _statements(self, queries, verb):
+        return [query['sql'] for query in queries.captured_queries if query['sql'].startswith(verb)]
+
+    def test_reservation_update_single_statement(self):
+        """
+        Test: Guardar una reserva cargada no hace consultas de validación
+        """
+        reservation = Reservation.objects.select_related('flight', 'seat').get(pk=self.reservations[1].pk)
+        reservation.price = 120
+
+        with CaptureQueriesContext(connection) as queries:
+            reservation.save()
+
+        self.assertEqual(self._statements(queries, 'SELECT'), [])
+        updates = self._statements(queries, 'UPDATE "gestionVuelos_reservation"')
+        self.assertEqual(len(updates), 1)
+
+    def test_flight_update_single_statement(self):
+        """
+        Test: Guardar un vuelo es un solo UPDATE y clean() sigue validando las fechas
+        """
+        flight = Flight.objects.get(pk=self.flight.pk)
+        flight.base_price = 99
+        with self.assertNumQueries(1):
+            flight.save()
+
+        flight.arrival_time = flight.departure_time - timedelta(hours=1)
+        with self.assertNumQueries(0):
+            with self.assertRaises(ValidationError):
+                flight.save()
+
+    def test_duplicate_ticket_raises_validation_error(self):
+        """
+        Test: La unicidad la rechaza la base y se informa como en full_clean()
+        """
+        with self.assertRaises(ValidationError) as context:
+            Ticket(reservation=self.reservations[0]).save()
+
+        self.assertIn('reservation', context.exception.message_dict)
+        # el savepoint deja la transacción usable
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_duplicate_active_reservation_is_seat_taken(self):
+        """
+        Test: Un segundo asiento activo devuelve el error 'seat_taken' de la restricción
+        """
+        taken = self.reservations[0]
+        with self.assertRaises(ValidationError) as context:
+            Reservation(
+                flight=self.flight, seat=taken.seat, passenger=taken.passenger,
+                status='reserved', price=100
+            ).save()
+        self.assertEqual(context.exception.error_dict[NON_FIELD_ERRORS][0].code, 'seat_taken')
+
+        result = ReservationService.reserve(self.flight, taken.passenger, taken.seat)
+        self.assertEqual(result.code, 'seat_taken')
+
+    def test_unique_violation_by_constraint_name(self):
+        """
+        Test: Con el nombre de la restricción (psycopg) el error no depende del mensaje
+        """
+        def integrity_error(constraint_name):
+            # como el error de psycopg que Django encadena en __cause__
+            cause = Exception('mensaje en otro idioma')
+            cause.diag = SimpleNamespace(constraint_name=constraint_name)
+            exc = IntegrityError(*cause.args)
+            exc.__cause__ = cause
+            return exc
+
+        taken = self.reservations[0]
+        reservation = Reservation(flight=self.flight, seat=taken.seat, passenger=taken.passenger, price=100)
+        error = reservation.unique_violation(integrity_error('unique_active_reservation_per_flight_seat'))
+        self.assertEqual(error.error_dict[NON_FIELD_ERRORS][0].code, 'seat_taken')
+
+        # restricción de un campo unique=True, por el nombre que le dio la base
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Ticket._meta.db_table)
+        name = next(name for name, info in constraints.items() if info['unique'] and info['columns'] == ['reservation_id'])
+        error = Ticket(reservation=taken).unique_violation(integrity_error(name))
+        self.assertIn('reservation', error.message_dict)
+
+        fk_name = next(name for name, info in constraints.items() if info['foreign_key'])
+        self.assertIsNone(Ticket(reservation=taken).unique_violation(integrity_error(fk_name)))
+
+    def test_unique_violation_with_unknown_message(self):
+        """
+        Test: Un mensaje que no se reconoce (otro motor) se resuelve consultando la unicidad
+        """
+        exc = IntegrityError("Duplicate entry '1' for key 'gestionVuelos_ticket.reservation_id'")
+        with self.assertNumQueries(2):
+            error = Ticket(reservation=self.reservations[0]).unique_violation(exc)
+        self.assertIn('reservation', error.message_dict)
+
+        # sin ningún valor repetido no es un error de unicidad
+        self.assertIsNone(Ticket(reservation=self.reservations[1]).unique_violation(exc))
+
+    def test_seat_from_other_plane_still_rejected(self):
+        """
+        Test: Sin los objetos cargados, el avión del asiento se controla con una consulta
+        """
+        other_plane = FleetService.onboard_plane('E190', 'Embraer', 4)
+        other_seat = Seat.objects.filter(plane=other_plane).first()
+        reservation = Reservation(
+            flight_id=self.flight.id, seat_id=other_seat.id,
+            passenger_id=self.reservations[0].passenger_id, status='reserved', price=100
+        )
+
+        with self.assertNumQueries(1):
+            with self.assertRaises(ValidationError):
+                reservation.save()
+
+
+@override_settings(CONDITIONAL_GET=True)
+class ConditionalGetTestCase(FullFlightMixin, APITestCase):
+    """
+    Tests para los GET condicionales con versiones por colección
+    """
+
+    def setUp(self):
+        """
+        Tomar el pasajero de la primera reserva del vuelo completo
+        """
+        super().setUp()
+        self.passenger = self.reservations[0].passenger
+
+    def test_not_modified_without_queries(self):
+        """
+        Test: Con el mismo ETag se responde 304 sin consultar la base
+        """
+        url = reverse('flight-available')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertIn('Last-Modified', first)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], first['ETag'])
+
+    def test_write_changes_etag_after_commit(self):
+        """
+        Test: Guardar un vuelo cambia el ETag de los listados de vuelos
+        """
+        url = reverse('flight-available')
+        etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flight.base_price = 180
+            self.flight.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_queryset_update_changes_etag_and_stamps(self):
+        """
+        Test: Las escrituras con update() también cambian la versión y updated_at
+        """
+        url = reverse('passenger-reservations', kwargs={'pk': self.passenger.id})
+        first = self.client.get(url)
+        reservation = self.reservations[0]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = ReservationService.cancel(reservation)
+        self.assertTrue(result.ok)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['reservations'][0]['status'], 'cancelled')
+        self.assertGreater(Reservation.objects.get(pk=reservation.pk).updated_at, reservation.updated_at)
+
+    def test_if_modified_since(self):
+        """
+        Test: If-Modified-Since con la fecha de la respuesta anterior devuelve 304
+        """
+        url = reverse('passenger-reservations', kwargs={'pk': self.passenger.id})
+        first = self.client.get(url)
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_varies_with_request(self):
+        """
+        Test: El ETag cambia con los parámetros y con el formato negociado
+        """
+        url = reverse('flight-list')
+        etag = self.client.get(url)['ETag']
+
+        self.assertNotEqual(self.client.get(url, {'ordering': 'base_price'})['ETag'], etag)
+        self.assertNotEqual(self.client.get(url, HTTP_ACCEPT='application/msgpack')['ETag'], etag)
+
+    def test_plane_seats_last_modified(self):
+        """
+        Test: El layout de asientos también responde a If-Modified-Since
+        """
+        url = reverse('plane-seats', kwargs={'pk': self.plane.id})
+        first = self.client.get(url)
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_disabled_without_shared_cache(self):
+        """
+        Test: Con CONDITIONAL_GET apagado no se mandan validadores ni se responde 304
+        """
+        url = reverse('flight-available')
+        etag = self.client.get(url)['ETag']
+
+        with override_settings(CONDITIONAL_GET=False):
+            first = self.client.get(url)
+            self.assertNotIn('ETag', first)
+            self.assertNotIn('Last-Modified', first)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.flight.base_price = 180
+                self.flight.save()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(REPOSITORY_CACHE=True)
+class RepositoryCacheTestCase(TransactionTestCase):
+    """
+    Tests para la caché de lectura de get_by_id en los repositorios
+    """
+
+    def setUp(self):
+        """
+        Crear un avión con sus asientos y un vuelo, con la caché vacía
+        """
+        cache.clear()
+        plane_cache.clear_local()
+        flight_cache.clear_local()
+        self.plane = FleetService.onboard_plane('A320', 'Airbus', 6)
+        self.flight = create_flight(self.plane, 'Córdoba', 'Buenos Aires')
+
+    def tearDown(self):
+        cache.clear()
+        plane_cache.clear_local()
+        flight_cache.clear_local()
+
+    def test_second_read_without_queries(self):
+        """
+        Test: la segunda lectura del mismo avión no consulta la base
+        """
+        PlaneRepository.get_by_id(self.plane.id)
+        with self.assertNumQueries(0):
+            plane = PlaneRepository.get_by_id(self.plane.id)
+        self.assertEqual(plane.model, 'A320')
+
+    def test_shared_cache_serves_other_process(self):
+        """
+        Test: sin la copia local (otro proceso) se lee de la caché compartida
+        """
+        FlightRepository.get_by_id(self.flight.id)
+        flight_cache.clear_local()
+        with self.assertNumQueries(0):
+            flight = FlightRepository.get_by_id(self.flight.id)
+        self.assertEqual(flight.origin, 'Córdoba')
+
+    def test_save_invalidates(self):
+        """
+        Test: save() invalida la copia cacheada de ese objeto
+        """
+        PlaneRepository.get_by_id(self.plane.id)
+        plane = Plane.objects.get(id=self.plane.id)
+        plane.model = 'A321'
+        plane.save()
+        self.assertEqual(PlaneRepository.get_by_id(self.plane.id).model, 'A321')
+
+    def test_queryset_update_and_delete_invalidate(self):
+        """
+        Test: update() y delete() de QuerySet invalidan las copias cacheadas
+        """
+        FlightRepository.get_by_id(self.flight.id)
+        Flight.objects.filter(id=self.flight.id).update(status='delayed')
+        self.assertEqual(FlightRepository.get_by_id(self.flight.id).status, 'delayed')
+
+        Flight.objects.filter(origin='Córdoba').update(status='cancelled')
+        self.assertEqual(FlightRepository.get_by_id(self.flight.id).status, 'cancelled')
+
+        Flight.objects.filter(origin='Córdoba').delete()
+        with self.assertRaises(Http404):
+            FlightRepository.get_by_id(self.flight.id)
+
+    def test_bypassed_inside_transaction(self):
+        """
+        Test: dentro de una transacción se lee la escritura propia sin confirmar
+        """
+        PlaneRepository.get_by_id(self.plane.id)
+        with transaction.atomic():
+            Plane.objects.filter(id=self.plane.id).update(model='A319')
+            self.assertEqual(PlaneRepository.get_by_id(self.plane.id).model, 'A319')
+        self.assertEqual(PlaneRepository.get_by_id(self.plane.id).model, 'A319')
+
+    def test_returns_copies(self):
+        """
+        Test: modificar el objeto devuelto no altera la copia cacheada
+        """
+        plane = PlaneRepository.get_by_id(self.plane.id)
+        plane.model = 'Modificado'
+        self.assertEqual(PlaneRepository.get_by_id(self.plane.id).model, 'A320')
+        self.assertIsNone(PlaneRepository.get_by_id('no-es-un-id'))
+
+    def test_disabled_without_shared_cache(self):
+        """
+        Test: sin caché compartida (REPOSITORY_CACHE=False) cada lectura va a la base
+        """
+        with override_settings(REPOSITORY_CACHE=False):
+            PlaneRepository.get_by_id(self.plane.id)
+            with self.assertNumQueries(1):
+                PlaneRepository.get_by_id(self.plane.id)
+
+    def test_flight_seats_still_fast_deleted(self):
+        """
+        Test: las señales de invalidación no impiden borrar FlightSeat sin cargar las filas
+        """
+        collector = Collector('default')
+        self.assertTrue(collector.can_fast_delete(FlightSeat.objects.filter(flight=self.flight)))
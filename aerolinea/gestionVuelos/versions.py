@@ -0,0 +1,74 @@
+"""
+Versiones por colección para los GET condicionales de la API. Cada
+modelo tiene un contador en la caché que sube, después del commit, con
+cualquier escritura: save()/delete() avisan por señales (signals.py) y
+update()/bulk_create()/bulk_update()/delete() de QuerySet por
+``VersionedQuerySet``. Con los contadores de las colecciones que muestra
+una respuesta se arma su ETag sin consultar la base.
+
+Con ``settings.CONDITIONAL_GET`` apagado (caché en memoria por proceso) no
+hay quien lea los contadores y ``changed`` no hace nada.
+"""
+
+import time
+from typing import Dict, Iterable, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'versions:{}'
+MODIFIED_KEY = 'versions:{}:modified'
+
+
+def _initial_version() -> int:
+    # si la clave se perdió (desalojo, reinicio de la caché) el contador
+    # arranca de un valor que no repite ninguno ya entregado en un ETag
+    return time.time_ns() // 1000
+
+
+def bump(*names: str) -> None:
+    for name in names:
+        key = VERSION_KEY.format(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_version(), None)
+    now = time.time()
+    cache.set_many({MODIFIED_KEY.format(name): now for name in names}, None)
+
+
+def changed(*names: str) -> None:
+    """
+    Sube las versiones cuando se confirma la transacción en curso (fuera de
+    una transacción, en el momento). Antes del commit otro proceso podría
+    leer la versión nueva con los datos viejos y quedarse con ese ETag.
+    """
+    if not getattr(settings, 'CONDITIONAL_GET', False):
+        return
+    transaction.on_commit(lambda: bump(*names), robust=True)
+
+
+def current(names: Iterable[str]) -> Tuple[Dict[str, int], float]:
+    """
+    ({colección: versión}, timestamp de la última escritura) con una sola
+    lectura de la caché. Lo que falta se inicializa: una colección sin
+    registro se da por modificada ahora.
+    """
+    names = sorted(set(names))
+    keys = [VERSION_KEY.format(name) for name in names] + [MODIFIED_KEY.format(name) for name in names]
+    values = cache.get_many(keys)
+    now = time.time()
+    result, modified = {}, 0.0
+    for name in names:
+        key = VERSION_KEY.format(name)
+        if key not in values:
+            cache.add(key, _initial_version(), None)
+            values[key] = cache.get(key)
+        modified_key = MODIFIED_KEY.format(name)
+        if modified_key not in values:
+            cache.add(modified_key, now, None)
+            values[modified_key] = cache.get(modified_key, now)
+        result[name] = values[key]
+        modified = max(modified, values[modified_key])
+    return result, modified
@@ -7,6 +7,8 @@ from django.db.models import Q
 
 from gestionVuelos.models import Passenger, Flight, Plane, Reservation, Seat
 from gestionVuelos.forms import FlightForm, PassengerForm, PlaneForm
+from gestionVuelos.services.reservation import ReservationService
+from gestionVuelos.services.seat_map import SeatMapService
 
 class StaffRequiredMixin(UserPassesTestMixin):
     """Mixin para restringir acceso a staff o superusuarios"""
@@ -56,6 +58,7 @@ class PassengerDeleteView(StaffRequiredMixin, LoginRequiredMixin, DeleteView):
 # --- Vuelos ---
 class FlightListView(LoginRequiredMixin, ListView):
     model = Flight
+    queryset = Flight.objects.select_related('plane').order_by('departure_time')
     template_name = "flights/list.html"
     context_object_name = "flights"
     login_url = '/login/'
@@ -67,15 +70,23 @@ class FlightDetailView(LoginRequiredMixin, DetailView):
     context_object_name = "flight"
     login_url = '/login/'
 
+    def get_queryset(self):
+        return Flight.objects.select_related('plane')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        available_seats = self.get_object().get_available_seats()
+        # una sola lectura (o ninguna, si está en caché) del inventario del vuelo
+        seat_map = SeatMapService.build_for_flight(self.object)
+        available_seats = [
+            seat for _, seats in seat_map['rows'] for seat in seats if seat['state'] == 'available'
+        ]
         context["available_seats"] = available_seats
+        context["seat_map"] = seat_map
         
-        if not available_seats.exists():
+        if not available_seats:
             context['mensaje'] = "No hay asientos disponibles para este vuelo."
         else:
-            context['mensaje'] = f"Hay {available_seats.count()} asientos disponibles."
+            context['mensaje'] = f"Hay {len(available_seats)} asientos disponibles."
         
         return context
 
@@ -147,19 +158,14 @@ class ReservationCreateView(LoginRequiredMixin, CreateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        flight = get_object_or_404(Flight, pk=self.kwargs['flight_id'])
+        flight = get_object_or_404(Flight.objects.select_related('plane'), pk=self.kwargs['flight_id'])
         
-        available_seats = Seat.objects.filter(
-            plane=flight.plane,
-            status="available"
-        ).order_by('row', 'column')
-
-        seat_rows = {}
-        for seat in available_seats:
-            seat_rows.setdefault(seat.row, []).append(seat)
+        # grilla completa (libres, retenidos y tomados) armada con una sola consulta
+        seat_map = SeatMapService.build_for_flight(flight)
         
         context['flight'] = flight
-        context['seat_rows'] = seat_rows
+        context['seat_map'] = seat_map
+        context['seat_rows'] = dict(seat_map['rows']) if seat_map['available'] else {}
         context['seat_types'] = dict(Seat.SEAT_STATUS_CHOICES) if hasattr(Seat, 'SEAT_STATUS_CHOICES') else {}
 
         return context
@@ -174,29 +180,17 @@ class ReservationCreateView(LoginRequiredMixin, CreateView):
             return redirect(self.request.path)
 
         try:
-            seat = Seat.objects.get(
-                pk=seat_id,
-                plane=flight.plane,
-                status="available"
-            )
-        except Seat.DoesNotExist:
+            seat = Seat.objects.get(pk=seat_id, plane_id=flight.plane_id)
+        except (Seat.DoesNotExist, ValueError):
             messages.error(request, "El asiento seleccionado no está disponible")
             return redirect(self.request.path)
 
-        try:
-            self.reservation = Reservation.objects.create(
-                flight=flight,
-                passenger=passenger,
-                seat=seat,
-                status='reserved',
-                price=flight.base_price,
-            )
-        except Exception as e:
-            messages.error(request, f"No se pudo crear la reserva: {e}")
+        # la reserva web queda confirmada: no hay un paso posterior que la confirme
+        result = ReservationService.reserve(flight, passenger, seat, confirm=True)
+        if not result.ok:
+            messages.error(request, f"No se pudo crear la reserva: {result.error}")
             return redirect(self.request.path)
-
-        seat.status = "reserved"
-        seat.save()
+        self.reservation = result.reservation
 
         messages.success(request, "Reserva realizada con éxito!")
         return redirect(self.get_success_url())
@@ -217,4 +211,6 @@ class MyReservationsListView(LoginRequiredMixin, ListView):
 
     def get_queryset(self):
         
-        return Reservation.objects.filter(passenger__user=self.request.user, status='reserved')
+        return Reservation.objects.filter(passenger__user=self.request.user).exclude(
+            status__in=Reservation.INACTIVE_STATUSES
+        )
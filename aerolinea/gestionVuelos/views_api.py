@@ -10,9 +10,11 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.core.exceptions import ValidationError
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 
 # Importar modelos y serializers
 from .models import Flight, Passenger, Reservation, Plane, Seat, Ticket
@@ -20,16 +22,49 @@ from .serializers import (
     FlightSerializer,
     PassengerSerializer,
     ReservationSerializer,
+    GroupReservationSerializer,
     PlaneSerializer,
     SeatSerializer,
     TicketSerializer
 )
+from .services.autocomplete import AutocompleteService
+from .services.fare_calendar import FareCalendarService
+from .services.fleet import FleetService
+from .services.flights import FlightService
+from .services.itineraries import (
+    DEFAULT_MAX_CONNECTION,
+    DEFAULT_MIN_CONNECTION,
+    MAX_STOPS,
+    ItineraryService,
+)
+from .services.reservation import ReservationService
+from .services.seat_inventory import SeatInventoryService
+from .services.seat_map import SeatMapService
+from .services.ticket import TicketService
+from .projections import (
+    FLIGHT_PASSENGER,
+    FLIGHT_SUMMARY,
+    PASSENGER_RESERVATION,
+    PASSENGER_SUMMARY,
+    TICKET,
+)
+from .bulk import BulkCreateMixin
+from .conditional import ConditionalGetMixin, conditional_response, set_validators
+from .query_plans import QueryPlanMixin
+from .sideloading import SideloadListMixin
+from .streaming import StreamingListMixin
+
+
+# colecciones (modelos) que muestra cada tipo de respuesta
+FLIGHT_COLLECTIONS = ('flight', 'plane')
+RESERVATION_COLLECTIONS = ('reservation', 'passenger', 'flight', 'plane', 'seat')
+TICKET_COLLECTIONS = ('ticket', *RESERVATION_COLLECTIONS)
 
 # =============================================================================
 # GESTIÓN DE VUELOS (API)
 # =============================================================================
 
-class FlightViewSet(viewsets.ModelViewSet):
+class FlightViewSet(ConditionalGetMixin, BulkCreateMixin, QueryPlanMixin, SideloadListMixin, StreamingListMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar vuelos
     Permite listar, crear, editar y eliminar vuelos
@@ -41,12 +76,20 @@ class FlightViewSet(viewsets.ModelViewSet):
     search_fields = ['origin', 'destination']
     ordering_fields = ['departure_time', 'arrival_time', 'base_price']
     ordering = ['departure_time']
+    conditional_collections = {
+        'list': FLIGHT_COLLECTIONS,
+        'retrieve': FLIGHT_COLLECTIONS,
+        'available': FLIGHT_COLLECTIONS,
+        # la búsqueda resuelve las ciudades con la tabla de aeropuertos
+        'search': (*FLIGHT_COLLECTIONS, 'airport'),
+        'passengers': ('flight', 'reservation', 'passenger', 'seat'),
+    }
 
     def get_permissions(self):
         """
         Solo los administradores pueden crear, editar o eliminar vuelos
         """
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'bulk', 'update', 'partial_update', 'destroy']:
             return [IsAdminUser()]
         return [AllowAny()]
 
@@ -56,8 +99,7 @@ class FlightViewSet(viewsets.ModelViewSet):
         Listar vuelos disponibles (no cancelados)
         """
         flights = self.get_queryset().filter(status__in=['scheduled', 'boarding'])
-        serializer = self.get_serializer(flights, many=True)
-        return Response(serializer.data)
+        return self.list_response(flights)
 
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     def search(self, request):
@@ -68,62 +110,142 @@ class FlightViewSet(viewsets.ModelViewSet):
         destination = request.query_params.get('destination')
         departure_date = request.query_params.get('departure_date')
         
-        queryset = self.get_queryset()
-        
-        if origin:
-            queryset = queryset.filter(origin__icontains=origin)
-        if destination:
-            queryset = queryset.filter(destination__icontains=destination)
+        date_obj = None
         if departure_date:
             try:
                 date_obj = datetime.strptime(departure_date, '%Y-%m-%d').date()
-                queryset = queryset.filter(departure_time__date=date_obj)
             except ValueError:
                 return Response(
                     {'error': 'Formato de fecha inválido. Use YYYY-MM-DD'}, 
                     status=status.HTTP_400_BAD_REQUEST
                 )
         
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = FlightService.search(
+            origin=origin,
+            destination=destination,
+            departure_date=date_obj,
+            queryset=self.get_queryset(),
+        )
+        
+        return self.list_response(queryset)
 
-    @action(detail=True, methods=['get'], permission_classes=[IsAdminUser])
-    def passengers(self, request, pk=None):
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
+    def calendar(self, request):
         """
-        Obtener listado de pasajeros por vuelo (solo administradores)
+        Tarifa mínima y asientos libres por día de un mes para una ruta
         """
-        flight = self.get_object()
-        reservations = flight.reservations.filter(status='reserved').select_related(
-            'passenger', 'seat'
+        origin = request.query_params.get('origin')
+        destination = request.query_params.get('destination')
+        month = request.query_params.get('month')
+        
+        if not origin or not destination or not month:
+            return Response(
+                {'error': 'origin, destination y month son requeridos'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            month_obj = datetime.strptime(month, '%Y-%m').date()
+        except ValueError:
+            return Response(
+                {'error': 'Formato de mes inválido. Use YYYY-MM'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response({
+            'origin': origin,
+            'destination': destination,
+            'month': month,
+            'days': FareCalendarService.get(origin, destination, month_obj)
+        })
+
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
+    def autocomplete(self, request):
+        """
+        Sugerir ciudades de origen/destino a partir de un prefijo (sin acentos ni mayúsculas)
+        """
+        query = request.query_params.get('q', '')
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 50))
+        except ValueError:
+            limit = 10
+        
+        return Response({
+            'query': query,
+            'suggestions': AutocompleteService.suggest(query, limit)
+        })
+
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
+    def connections(self, request):
+        """
+        Buscar itinerarios con hasta dos escalas entre dos ciudades en una fecha
+        """
+        origin = request.query_params.get('origin')
+        destination = request.query_params.get('destination')
+        departure_date = request.query_params.get('departure_date')
+        
+        if not origin or not destination or not departure_date:
+            return Response(
+                {'error': 'origin, destination y departure_date son requeridos'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            date_obj = datetime.strptime(departure_date, '%Y-%m-%d').date()
+            max_stops = int(request.query_params.get('max_stops', MAX_STOPS))
+            min_connection = int(request.query_params.get('min_connection', DEFAULT_MIN_CONNECTION.total_seconds() // 60))
+            max_connection = int(request.query_params.get('max_connection', DEFAULT_MAX_CONNECTION.total_seconds() // 60))
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            return Response(
+                {'error': 'Parámetros inválidos (fecha YYYY-MM-DD, el resto enteros)'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if not 0 <= max_stops <= MAX_STOPS or min_connection < 0 or max_connection < min_connection:
+            return Response(
+                {'error': f'max_stops debe estar entre 0 y {MAX_STOPS} y min_connection <= max_connection'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        start = timezone.make_aware(datetime.combine(date_obj, datetime.min.time()))
+        itineraries = ItineraryService.search(
+            origin,
+            destination,
+            start,
+            start + timedelta(days=1),
+            max_stops=max_stops,
+            min_connection=timedelta(minutes=min_connection),
+            max_connection=timedelta(minutes=max_connection),
+            limit=max(1, min(limit, 100)),
         )
         
-        passengers_data = []
-        for reservation in reservations:
-            passenger_data = {
-                'passenger': {
-                    'id': reservation.passenger.id,
-                    'full_name': reservation.passenger.full_name,
-                    'document_type': reservation.passenger.document_type,
-                    'document_number': reservation.passenger.document_number,
-                    'email': reservation.passenger.email,
-                    'phone': reservation.passenger.phone,
-                },
-                'reservation': {
-                    'id': reservation.id,
-                    'reservation_code': reservation.reservation_code,
-                    'reservation_date': reservation.reservation_date,
-                    'price': reservation.price,
-                    'status': reservation.status,
-                },
-                'seat': {
-                    'id': reservation.seat.id,
-                    'number': reservation.seat.number,
-                    'row': reservation.seat.row,
-                    'column': reservation.seat.column,
-                    'seat_type': reservation.seat.seat_type,
-                }
-            }
-            passengers_data.append(passenger_data)
+        return Response({
+            'origin': origin,
+            'destination': destination,
+            'departure_date': departure_date,
+            'count': len(itineraries),
+            'itineraries': itineraries
+        })
+
+    @action(detail=True, methods=['get'], permission_classes=[AllowAny])
+    def seats(self, request, pk=None):
+        """
+        Obtener el inventario de asientos de un vuelo
+        """
+        flight = self.get_object()
+        inventory = SeatInventoryService.get_for_flight(flight.id).order_by('seat__row', 'seat__column')
+        
+        seats_data = []
+        for flight_seat in inventory:
+            seats_data.append({
+                'id': flight_seat.seat.id,
+                'number': flight_seat.seat.number,
+                'row': flight_seat.seat.row,
+                'column': flight_seat.seat.column,
+                'seat_type': flight_seat.seat.seat_type,
+                'status': flight_seat.status,
+            })
         
         return Response({
             'flight': {
@@ -131,9 +253,24 @@ class FlightViewSet(viewsets.ModelViewSet):
                 'origin': flight.origin,
                 'destination': flight.destination,
                 'departure_time': flight.departure_time,
-                'arrival_time': flight.arrival_time,
-                'status': flight.status,
             },
+            'total_seats': len(seats_data),
+            'available_seats': sum(1 for seat in seats_data if seat['status'] == 'available'),
+            'seats': seats_data
+        })
+
+    @action(detail=True, methods=['get'], permission_classes=[IsAdminUser])
+    def passengers(self, request, pk=None):
+        """
+        Obtener listado de pasajeros por vuelo (solo administradores)
+        """
+        flight = FLIGHT_SUMMARY.get_or_404(self.get_queryset(), pk=pk)
+        passengers_data = FLIGHT_PASSENGER.rows(
+            Reservation.objects.filter(flight_id=flight['id']).exclude(status__in=Reservation.INACTIVE_STATUSES)
+        )
+        
+        return Response({
+            'flight': flight,
             'total_passengers': len(passengers_data),
             'passengers': passengers_data
         })
@@ -142,7 +279,7 @@ class FlightViewSet(viewsets.ModelViewSet):
 # GESTIÓN DE PASAJEROS (API)
 # =============================================================================
 
-class PassengerViewSet(viewsets.ModelViewSet):
+class PassengerViewSet(ConditionalGetMixin, BulkCreateMixin, QueryPlanMixin, SideloadListMixin, StreamingListMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar pasajeros
     """
@@ -151,12 +288,18 @@ class PassengerViewSet(viewsets.ModelViewSet):
     filter_backends = [filters.SearchFilter, DjangoFilterBackend]
     search_fields = ['full_name', 'document_number', 'email']
     filterset_fields = ['document_type']
+    conditional_collections = {
+        'list': ('passenger',),
+        'retrieve': ('passenger',),
+        'reservations': RESERVATION_COLLECTIONS,
+        'active_reservations': RESERVATION_COLLECTIONS,
+    }
 
     def get_permissions(self):
         """
         Solo los administradores pueden crear, editar o eliminar pasajeros
         """
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'bulk', 'update', 'partial_update', 'destroy']:
             return [IsAdminUser()]
         return [IsAuthenticated()]
 
@@ -165,53 +308,13 @@ class PassengerViewSet(viewsets.ModelViewSet):
         """
         Listar reservas asociadas a un pasajero
         """
-        passenger = self.get_object()
-        reservations = Reservation.objects.filter(
-            passenger=passenger
-        ).select_related('flight__plane', 'seat')
-        
-        reservations_data = []
-        for reservation in reservations:
-            reservation_data = {
-                'id': reservation.id,
-                'reservation_code': reservation.reservation_code,
-                'reservation_date': reservation.reservation_date,
-                'price': reservation.price,
-                'status': reservation.status,
-                'flight': {
-                    'id': reservation.flight.id,
-                    'origin': reservation.flight.origin,
-                    'destination': reservation.flight.destination,
-                    'departure_time': reservation.flight.departure_time,
-                    'arrival_time': reservation.flight.arrival_time,
-                    'duration': reservation.flight.duration,
-                    'status': reservation.flight.status,
-                    'base_price': reservation.flight.base_price,
-                    'plane': {
-                        'id': reservation.flight.plane.id,
-                        'model': reservation.flight.plane.model,
-                        'manufacturer': reservation.flight.plane.manufacturer,
-                        'capacity': reservation.flight.plane.capacity,
-                    }
-                },
-                'seat': {
-                    'id': reservation.seat.id,
-                    'number': reservation.seat.number,
-                    'row': reservation.seat.row,
-                    'column': reservation.seat.column,
-                    'seat_type': reservation.seat.seat_type,
-                    'status': reservation.seat.status,
-                }
-            }
-            reservations_data.append(reservation_data)
+        passenger = PASSENGER_SUMMARY.get_or_404(self.get_queryset(), pk=pk)
+        reservations_data = PASSENGER_RESERVATION.rows(
+            Reservation.objects.filter(passenger_id=passenger['id'])
+        )
         
         return Response({
-            'passenger': {
-                'id': passenger.id,
-                'full_name': passenger.full_name,
-                'document_number': passenger.document_number,
-                'email': passenger.email,
-            },
+            'passenger': passenger,
             'total_reservations': len(reservations_data),
             'reservations': reservations_data
         })
@@ -221,54 +324,13 @@ class PassengerViewSet(viewsets.ModelViewSet):
         """
         Obtener reservas activas de un pasajero
         """
-        passenger = self.get_object()
-        reservations = Reservation.objects.filter(
-            passenger=passenger, 
-            status='reserved'
-        ).select_related('flight__plane', 'seat')
-        
-        reservations_data = []
-        for reservation in reservations:
-            reservation_data = {
-                'id': reservation.id,
-                'reservation_code': reservation.reservation_code,
-                'reservation_date': reservation.reservation_date,
-                'price': reservation.price,
-                'status': reservation.status,
-                'flight': {
-                    'id': reservation.flight.id,
-                    'origin': reservation.flight.origin,
-                    'destination': reservation.flight.destination,
-                    'departure_time': reservation.flight.departure_time,
-                    'arrival_time': reservation.flight.arrival_time,
-                    'duration': reservation.flight.duration,
-                    'status': reservation.flight.status,
-                    'base_price': reservation.flight.base_price,
-                    'plane': {
-                        'id': reservation.flight.plane.id,
-                        'model': reservation.flight.plane.model,
-                        'manufacturer': reservation.flight.plane.manufacturer,
-                        'capacity': reservation.flight.plane.capacity,
-                    }
-                },
-                'seat': {
-                    'id': reservation.seat.id,
-                    'number': reservation.seat.number,
-                    'row': reservation.seat.row,
-                    'column': reservation.seat.column,
-                    'seat_type': reservation.seat.seat_type,
-                    'status': reservation.seat.status,
-                }
-            }
-            reservations_data.append(reservation_data)
+        passenger = PASSENGER_SUMMARY.get_or_404(self.get_queryset(), pk=pk)
+        reservations_data = PASSENGER_RESERVATION.rows(
+            Reservation.objects.filter(passenger_id=passenger['id']).exclude(status__in=Reservation.INACTIVE_STATUSES)
+        )
         
         return Response({
-            'passenger': {
-                'id': passenger.id,
-                'full_name': passenger.full_name,
-                'document_number': passenger.document_number,
-                'email': passenger.email,
-            },
+            'passenger': passenger,
             'total_active_reservations': len(reservations_data),
             'reservations': reservations_data
         })
@@ -277,7 +339,7 @@ class PassengerViewSet(viewsets.ModelViewSet):
 # SISTEMA DE RESERVAS (API)
 # =============================================================================
 
-class ReservationViewSet(viewsets.ModelViewSet):
+class ReservationViewSet(ConditionalGetMixin, BulkCreateMixin, QueryPlanMixin, SideloadListMixin, StreamingListMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar reservas
     """
@@ -287,12 +349,16 @@ class ReservationViewSet(viewsets.ModelViewSet):
     filterset_fields = ['passenger', 'flight', 'status']
     ordering_fields = ['reservation_date', 'id']
     ordering = ['-reservation_date']
+    conditional_collections = {
+        'list': RESERVATION_COLLECTIONS,
+        'retrieve': RESERVATION_COLLECTIONS,
+    }
 
     def get_permissions(self):
         """
-        Solo los administradores pueden eliminar reservas
+        Solo los administradores pueden eliminar reservas y cargarlas en lote
         """
-        if self.action in ['destroy']:
+        if self.action in ['bulk', 'destroy']:
             return [IsAdminUser()]
         return [IsAuthenticated()]
 
@@ -333,8 +399,9 @@ class ReservationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Verificar si está ocupado
-        occupied = flight.reservations.filter(seat=seat, status='reserved').exists()
+        # Verificar si está ocupado en el inventario del vuelo
+        # (una retención vencida cuenta como libre aunque no se haya barrido)
+        occupied = flight.seat_inventory.filter(seat=seat).taken().exists()
         
         return Response({
             'seat_id': seat_id,
@@ -343,6 +410,20 @@ class ReservationViewSet(viewsets.ModelViewSet):
             'seat_type': seat.seat_type
         })
 
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def group(self, request):
+        """
+        Reservar N asientos contiguos para un grupo de pasajeros en una sola llamada
+        """
+        serializer = GroupReservationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reservations = serializer.save()
+
+        return Response({
+            'message': f'{len(reservations)} asientos reservados exitosamente',
+            'reservations': ReservationSerializer(reservations, many=True).data
+        }, status=status.HTTP_201_CREATED)
+
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def confirm(self, request, pk=None):
         """
@@ -350,15 +431,13 @@ class ReservationViewSet(viewsets.ModelViewSet):
         """
         reservation = self.get_object()
         
-        if reservation.status != 'reserved':
+        result = ReservationService.confirm(reservation)
+        if not result.ok:
             return Response(
-                {'error': 'Solo se pueden confirmar reservas en estado "reserved"'}, 
+                {'error': result.error, 'code': result.code},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        reservation.status = 'confirmed'
-        reservation.save()
-        
         serializer = self.get_serializer(reservation)
         return Response({
             'message': 'Reserva confirmada exitosamente',
@@ -372,20 +451,14 @@ class ReservationViewSet(viewsets.ModelViewSet):
         """
         reservation = self.get_object()
         
-        if reservation.status == 'cancelled':
+        # Al cancelar se libera el asiento en el inventario del vuelo
+        result = ReservationService.cancel(reservation)
+        if not result.ok:
             return Response(
-                {'error': 'La reserva ya está cancelada'}, 
+                {'error': result.error, 'code': result.code},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        reservation.status = 'cancelled'
-        reservation.save()
-        
-        # Liberar el asiento
-        seat = reservation.seat
-        seat.status = 'available'
-        seat.save()
-        
         serializer = self.get_serializer(reservation)
         return Response({
             'message': 'Reserva cancelada exitosamente',
@@ -396,7 +469,7 @@ class ReservationViewSet(viewsets.ModelViewSet):
 # GESTIÓN DE AVIONES Y ASIENTOS (API)
 # =============================================================================
 
-class PlaneViewSet(viewsets.ModelViewSet):
+class PlaneViewSet(ConditionalGetMixin, QueryPlanMixin, SideloadListMixin, StreamingListMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar aviones
     """
@@ -404,6 +477,10 @@ class PlaneViewSet(viewsets.ModelViewSet):
     serializer_class = PlaneSerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ['model', 'manufacturer']
+    conditional_collections = {
+        'list': ('plane',),
+        'retrieve': ('plane',),
+    }
 
     def get_permissions(self):
         """
@@ -413,73 +490,85 @@ class PlaneViewSet(viewsets.ModelViewSet):
             return [IsAdminUser()]
         return [AllowAny()]
 
+    def perform_create(self, serializer):
+        """
+        Crear el avión junto con su mapa de asientos
+        """
+        with transaction.atomic():
+            plane = serializer.save()
+            FleetService.generate_seat_map(plane)
+
+    def perform_update(self, serializer):
+        """
+        Si aumenta la capacidad se agregan los asientos que faltan
+        """
+        with transaction.atomic():
+            plane = serializer.save()
+            FleetService.generate_seat_map(plane)
+
     @action(detail=True, methods=['get'], permission_classes=[AllowAny])
     def seats(self, request, pk=None):
         """
-        Obtener layout de asientos de un avión
+        Obtener layout de asientos de un avión (cacheado por versión de layout)
         """
         plane = self.get_object()
-        seats = Seat.objects.filter(plane=plane).order_by('row', 'column')
-        
-        seats_data = []
-        for seat in seats:
-            seat_data = {
-                'id': seat.id,
-                'number': seat.number,
-                'row': seat.row,
-                'column': seat.column,
-                'seat_type': seat.seat_type,
-                'status': seat.status
-            }
-            seats_data.append(seat_data)
-        
-        return Response({
-            'plane': {
-                'id': plane.id,
-                'model': plane.model,
-                'manufacturer': plane.manufacturer,
-                'capacity': plane.capacity
-            },
-            'total_seats': len(seats_data),
-            'seats': seats_data
+        etag = SeatMapService.layout_etag(plane)
+        last_modified = plane.updated_at.timestamp()
+        not_modified = conditional_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        layout = SeatMapService.get_layout(plane)
+        response = Response({
+            'plane': layout['plane'],
+            'total_seats': len(layout['seats']),
+            'seats': layout['seats']
         })
+        return set_validators(response, etag, last_modified)
 
     @action(detail=True, methods=['get'], permission_classes=[AllowAny])
     def available_seats(self, request, pk=None):
         """
-        Obtener asientos disponibles de un avión
+        Obtener asientos disponibles de un avión en un vuelo
+        (por defecto, el próximo vuelo programado del avión)
         """
         plane = self.get_object()
-        seats = Seat.objects.filter(plane=plane, status='available').order_by('row', 'column')
+        flight_id = request.query_params.get('flight_id')
+        flights = Flight.objects.filter(plane=plane)
         
-        seats_data = []
-        for seat in seats:
-            seat_data = {
-                'id': seat.id,
-                'number': seat.number,
-                'row': seat.row,
-                'column': seat.column,
-                'seat_type': seat.seat_type,
-                'status': seat.status
-            }
-            seats_data.append(seat_data)
+        if flight_id:
+            flight = flights.filter(id=flight_id).first()
+            if flight is None:
+                return Response(
+                    {'error': 'El vuelo no existe o no usa este avión'}, 
+                    status=status.HTTP_404_NOT_FOUND
+                )
+        else:
+            flight = flights.filter(
+                departure_time__gte=timezone.now()
+            ).order_by('departure_time').first()
         
-        return Response({
-            'plane': {
-                'id': plane.id,
-                'model': plane.model,
-                'manufacturer': plane.manufacturer,
-                'capacity': plane.capacity
-            },
+        # la disponibilidad se superpone al layout cacheado con el mapa de bits
+        # (sin vuelos programados todos los asientos están libres)
+        seats_data, etag = SeatMapService.availability(plane, flight)
+        # sin Last-Modified: una retención que vence libera el asiento sin escribir nada
+        not_modified = conditional_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+        
+        response = Response({
+            'plane': SeatMapService.get_layout(plane)['plane'],
+            'flight_id': flight.id if flight else None,
             'available_seats': len(seats_data),
             'seats': seats_data
         })
+        return set_validators(response, etag)
 
 # =============================================================================
 # GESTIÓN DE BOLETOS (API)
 # =============================================================================
 
-class TicketViewSet(viewsets.ModelViewSet):
+class TicketViewSet(ConditionalGetMixin, QueryPlanMixin, SideloadListMixin, StreamingListMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar boletos
     """
@@ -489,6 +578,11 @@ class TicketViewSet(viewsets.ModelViewSet):
     ordering_fields = ['issued_at', 'barcode']
     search_fields = ['barcode', 'reservation__reservation_code']
     ordering = ['-issued_at']
+    conditional_collections = {
+        'list': TICKET_COLLECTIONS,
+        'retrieve': TICKET_COLLECTIONS,
+        'by_barcode': TICKET_COLLECTIONS,
+    }
 
     def get_permissions(self):
         """
@@ -510,67 +604,14 @@ class TicketViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            ticket = Ticket.objects.select_related(
-                'reservation__passenger',
-                'reservation__flight__plane',
-                'reservation__seat'
-            ).get(barcode=barcode)
-            
-            ticket_data = {
-                'id': ticket.id,
-                'barcode': ticket.barcode,
-                'status': ticket.status,
-                'issued_at': ticket.issued_at,
-                'reservation': {
-                    'id': ticket.reservation.id,
-                    'reservation_code': ticket.reservation.reservation_code,
-                    'status': ticket.reservation.status,
-                    'reservation_date': ticket.reservation.reservation_date,
-                    'price': ticket.reservation.price,
-                    'passenger': {
-                        'id': ticket.reservation.passenger.id,
-                        'full_name': ticket.reservation.passenger.full_name,
-                        'document_type': ticket.reservation.passenger.document_type,
-                        'document_number': ticket.reservation.passenger.document_number,
-                        'email': ticket.reservation.passenger.email,
-                        'phone': ticket.reservation.passenger.phone,
-                        'birth_date': ticket.reservation.passenger.birth_date,
-                    },
-                    'flight': {
-                        'id': ticket.reservation.flight.id,
-                        'origin': ticket.reservation.flight.origin,
-                        'destination': ticket.reservation.flight.destination,
-                        'departure_time': ticket.reservation.flight.departure_time,
-                        'arrival_time': ticket.reservation.flight.arrival_time,
-                        'duration': ticket.reservation.flight.duration,
-                        'status': ticket.reservation.flight.status,
-                        'base_price': ticket.reservation.flight.base_price,
-                        'plane': {
-                            'id': ticket.reservation.flight.plane.id,
-                            'model': ticket.reservation.flight.plane.model,
-                            'manufacturer': ticket.reservation.flight.plane.manufacturer,
-                            'capacity': ticket.reservation.flight.plane.capacity,
-                        }
-                    },
-                    'seat': {
-                        'id': ticket.reservation.seat.id,
-                        'number': ticket.reservation.seat.number,
-                        'row': ticket.reservation.seat.row,
-                        'column': ticket.reservation.seat.column,
-                        'seat_type': ticket.reservation.seat.seat_type,
-                        'status': ticket.reservation.seat.status,
-                    }
-                }
-            }
-            
-            return Response(ticket_data)
-            
-        except Ticket.DoesNotExist:
+        ticket_data = TICKET.first(Ticket.objects.filter(barcode=barcode))
+        if ticket_data is None:
             return Response(
                 {'error': 'No se encontró un boleto con el código proporcionado'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+        
+        return Response(ticket_data)
 
     @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
     def generate(self, request, pk=None):
@@ -579,7 +620,7 @@ class TicketViewSet(viewsets.ModelViewSet):
         """
         reservation = self.get_object().reservation
         
-        if reservation.status != 'reserved':
+        if reservation.status not in ('reserved', 'confirmed'):
             return Response(
                 {'error': 'Solo se pueden generar boletos de reservas confirmadas'}, 
                 status=status.HTTP_400_BAD_REQUEST
@@ -591,7 +632,10 @@ class TicketViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        ticket = Ticket.objects.create(reservation=reservation)
+        try:
+            ticket = TicketService.issue(reservation)
+        except ValidationError as exc:
+            return Response({'error': '; '.join(exc.messages)}, status=status.HTTP_400_BAD_REQUEST)
         serializer = self.get_serializer(ticket)
         
         return Response({